@@ -0,0 +1,179 @@
+"""
+호감도 궤적 분석 벤치마크
+
+노트북에서 하던 방식(행 dict를 세션/상대별로 묶어 파이썬 루프로 집계, 특징마다 정규식 재검사)과
+services.affinity_analytics의 배열 집계가 같은 결과를 내는지 확인한 뒤 속도를 비교합니다.
+
+    - 변환: DB 행 → AffinityLogs 열 배열 (불러올 때 한 번, 캐시 유지 동안 재사용)
+    - 계산: compute_affinity_report (기간을 바꿀 때마다)
+
+실행: python -m benchmarks.bench_affinity_analytics [--sessions 20000] [--repeat 3]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+from services.affinity_analytics import (
+    PERSONAS,
+    TRIGGER_FEATURES,
+    AffinityLogs,
+    compute_affinity_report,
+)
+
+MESSAGES = (
+    "안녕하세요 반가워요!",
+    "주말에 보통 뭐 해요?",
+    "저는 영화 보는 거 좋아해요 ㅋㅋ",
+    "오늘 진짜 예쁘시네요",
+    "아 미안해요 제가 말을 잘못했네요",
+    "ㅇㅇ",
+    "요즘 회사 일이 너무 많아서 주말에도 계속 일하고 있는데 어떻게 쉬어야 할지 모르겠어요 😢",
+    "커피 좋아하세요?",
+)
+
+
+def make_rows(sessions: int, seed: int) -> List[Dict]:
+    """세션마다 상대 3명, 상대마다 1~10턴 (점수가 0이 되면 게임 오버로 끝남)"""
+    rng = random.Random(seed)
+    rows = []
+    for s in range(sessions):
+        session_id = f"session-{s}"
+        day = rng.randint(1, 28)
+        for persona in PERSONAS:
+            score = 50
+            for turn in range(1, 11):
+                message = rng.choice(MESSAGES)
+                change = rng.randint(-12, 8) + (4 if "?" in message else 0)
+                score = max(0, min(100, score + change))
+                rows.append(
+                    {
+                        "session_id": session_id,
+                        "partner_type": persona,
+                        "turn_index": turn,
+                        "score_change": change,
+                        "current_score": score,
+                        "trigger_message": message,
+                        "created_at": f"2026-09-{day:02d}T12:00:00+00:00",
+                    }
+                )
+                if score == 0 or rng.random() < 0.04:  # 게임 오버 또는 이탈
+                    break
+    rng.shuffle(rows)  # DB는 기본 키(UUID) 순서로 돌려주므로 세션/턴 순서가 섞여 있음
+    return rows
+
+
+def legacy_report(rows: List[Dict]) -> Dict:
+    """노트북 방식 (비교 기준)"""
+    import re
+
+    patterns = [(name, re.compile(pattern, re.DOTALL)) for name, pattern in TRIGGER_FEATURES]
+    conversations = defaultdict(list)
+    for row in rows:
+        conversations[(row["partner_type"], row["session_id"])].append(row)
+
+    curve = defaultdict(list)
+    last_turns = defaultdict(list)
+    game_overs = defaultdict(list)
+    for (persona, _), turns in conversations.items():
+        turns.sort(key=lambda row: row["turn_index"])
+        for row in turns:
+            curve[(persona, row["turn_index"])].append(row["current_score"])
+        last_turns[persona].append(turns[-1]["turn_index"])
+        game_overs[persona].append(turns[-1]["current_score"] <= 0)
+
+    effects = {}
+    for name, pattern in patterns:
+        with_feature = [row["score_change"] for row in rows if pattern.search(row["trigger_message"] or "")]
+        without = [row["score_change"] for row in rows if not pattern.search(row["trigger_message"] or "")]
+        if len(with_feature) > 1 and len(without) > 1:
+            m1, m0 = sum(with_feature) / len(with_feature), sum(without) / len(without)
+            ss = sum((x - m1) ** 2 for x in with_feature) + sum((x - m0) ** 2 for x in without)
+            pooled = math.sqrt(ss / (len(with_feature) + len(without) - 2))
+            effects[name] = (m1 - m0) / pooled if pooled else float("nan")
+        else:
+            effects[name] = float("nan")
+
+    return {
+        "mean": {key: sum(values) / len(values) for key, values in curve.items()},
+        "game_over_rate": {persona: sum(values) / len(values) for persona, values in game_overs.items()},
+        "last_turns": {persona: sorted(values) for persona, values in last_turns.items()},
+        "effects": effects,
+    }
+
+
+def check_equivalence(rows: List[Dict]) -> int:
+    """두 방식의 결과가 다른 항목 수"""
+    legacy = legacy_report(rows)
+    report = compute_affinity_report(AffinityLogs.from_rows(rows, {}))
+    mismatches = 0
+    for p, persona in enumerate(PERSONAS):
+        for t, turn in enumerate(report["turns"]):
+            expected = legacy["mean"].get((persona, turn))
+            actual = report["score_curve"]["mean"][p][t]
+            if expected is None and np.isnan(actual):
+                continue
+            if expected is None or not math.isclose(expected, actual, rel_tol=1e-9):
+                mismatches += 1
+        if not math.isclose(legacy["game_over_rate"][persona], report["game_over_rate"][p], rel_tol=1e-9):
+            mismatches += 1
+        expected_drop = np.bincount(legacy["last_turns"][persona], minlength=len(report["turns"]) + 1)[1:]
+        if not np.array_equal(expected_drop, report["drop_off"][p]):
+            mismatches += 1
+    for f, name in enumerate(report["trigger_features"]):
+        expected, actual = legacy["effects"][name], report["trigger_effects"]["effect_size"][0][f]
+        if not (math.isnan(expected) and np.isnan(actual)) and not math.isclose(expected, actual, rel_tol=1e-6):
+            mismatches += 1
+            print(f"  불일치 ({name}): {expected} != {actual}")
+    return mismatches
+
+
+def bench(label: str, fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<36} {best * 1000:10.1f} ms")
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="호감도 궤적 분석 동등성 검사 및 벤치마크")
+    parser.add_argument("--sessions", type=int, default=20000, help="가상 세션 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.sessions, args.seed)
+    print(f"가상 affinity_logs {len(rows):,}행 (세션 {args.sessions:,}개, seed={args.seed})")
+
+    print("\n[1] 동등성 검사")
+    mismatches = check_equivalence(rows[: min(len(rows), 50000)])
+    if mismatches:
+        print(f"  ❌ 불일치 {mismatches}건")
+        sys.exit(1)
+    print("  ✅ 점수 곡선, 이탈 턴 분포, 게임 오버 비율, 효과 크기 모두 동일")
+
+    print("\n[2] 벤치마크")
+    legacy = bench("legacy (dict + python loops)", lambda: legacy_report(rows), args.repeat)
+    convert = bench("AffinityLogs.from_rows (1회)", lambda: AffinityLogs.from_rows(rows, {}), args.repeat)
+    logs = AffinityLogs.from_rows(rows, {})
+    compute = bench("compute_affinity_report", lambda: compute_affinity_report(logs), args.repeat)
+    window = bench(
+        "compute_affinity_report (7일 기간)",
+        lambda: compute_affinity_report(logs.window(time.mktime((2026, 9, 21, 0, 0, 0, 0, 0, 0)))),
+        args.repeat,
+    )
+    print(f"\n  변환 포함 속도 향상: x{legacy / (convert + compute):.1f}")
+    print(f"  불러온 뒤 기간 변경 시 속도 향상: x{legacy / window:.0f}")
+
+
+if __name__ == "__main__":
+    main()
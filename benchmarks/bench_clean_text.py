@@ -0,0 +1,68 @@
+"""
+clean_text 마이크로벤치마크
+
+골든 출력 동등성 검사(preprocess.clean_text_check)를 먼저 통과시킨 뒤,
+기존 구현(패턴별 re.sub 17회 + 공백 정리)과 결합 정규식 구현의 속도를 비교합니다.
+
+실행: python -m benchmarks.bench_clean_text [--data-dir preprocess/data] [--lines 200000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from preprocess.clean_text_check import (
+    GOLDEN_CASES,
+    check_equivalence,
+    legacy_clean_text,
+    load_corpus_lines,
+    random_line,
+)
+from preprocess.data_preprocessor import clean_text, clean_texts
+
+
+def bench(label: str, fn, lines: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(lines)
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<28} {best * 1000:10.1f} ms  ({len(lines) / best:,.0f} lines/s)")
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="clean_text 벤치마크")
+    parser.add_argument("--data-dir", default=None, help="실제 원본 데이터 디렉토리 (선택)")
+    parser.add_argument("--lines", type=int, default=200000, help="벤치마크 줄 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    if args.data_dir and Path(args.data_dir).exists():
+        lines = load_corpus_lines(args.data_dir, args.lines)
+        print(f"원본 데이터에서 {len(lines)}줄 로드")
+    else:
+        lines = [random_line(rng) for _ in range(args.lines)]
+        print(f"무작위 입력 {len(lines)}줄 생성 (seed={args.seed})")
+
+    print("\n[1] 골든 출력 동등성 검사")
+    mismatches = check_equivalence(GOLDEN_CASES + lines)
+    if mismatches:
+        print(f"  ❌ 불일치 {mismatches}건")
+        sys.exit(1)
+    print(f"  ✅ {len(GOLDEN_CASES) + len(lines)}줄 모두 동일")
+
+    print("\n[2] 마이크로벤치마크")
+    legacy = bench("legacy (18 regex scans)", lambda ls: [legacy_clean_text(l) for l in ls], lines, args.repeat)
+    single = bench("clean_text (1 scan)", lambda ls: [clean_text(l) for l in ls], lines, args.repeat)
+    bench("clean_texts (batch)", clean_texts, lines, args.repeat)
+    print(f"\n  clean_text 속도 향상: x{legacy / single:.1f}")
+
+
+if __name__ == "__main__":
+    main()
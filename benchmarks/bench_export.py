@@ -0,0 +1,173 @@
+"""
+분석용 일괄 내보내기 벤치마크 (오프라인)
+
+BACKEND_MODE=fake의 메모리 Supabase 대역에 가상 세션 데이터를 채운 뒤 두 방식을 비교합니다.
+
+    - ad-hoc: 세션 목록을 받은 뒤 세션마다 chat_logs, affinity_logs, analysis_results를
+      session_id로 하나씩 조회 (지금 노트북에서 하는 방식). 샘플 세션으로 측정해 전체로 환산
+    - export: services.data_export의 키셋 페이지 + 파티션 파일 쓰기
+
+요청당 지연(--latency)이 실제 Supabase 왕복 시간을 흉내내므로, 차이는 대부분 요청 수에서 나옵니다.
+--memory를 주면 tracemalloc으로 내보내기 중 최대 메모리도 측정합니다.
+
+실행: python -m benchmarks.bench_export [--sessions 2000] [--latency 0.02] [--format parquet] [--memory]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Dict, List
+
+PARTNERS = ("EMOTIONAL", "LOGICAL", "TOUGH")
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def make_dataset(sessions: int, turns: int, seed: int) -> Dict[str, List[Dict]]:
+    """세션마다 라운드 3개(chat_logs 3행), 턴마다 affinity_logs 1행, 분석 결과 1행을 만듭니다."""
+    rng = random.Random(seed)
+    tables = {"game_sessions": [], "chat_logs": [], "affinity_logs": [], "analysis_results": []}
+    for _ in range(sessions):
+        session_id = _uuid(rng)
+        played_at = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00+00:00"
+        tables["game_sessions"].append(
+            {
+                "session_id": session_id,
+                "user_id": _uuid(rng),
+                "final_choice": rng.choice(PARTNERS),
+                "my_persona": {"style": "적극적인 리액션러", "type": rng.choice(PARTNERS), "keywords": ["공감", "질문"]},
+                "ideal_preference": {"best_match": rng.choice(PARTNERS), "best_reason": "대화가 잘 이어짐"},
+                "played_at": played_at,
+            }
+        )
+        for partner in PARTNERS:
+            history = []
+            score = 50
+            for turn in range(1, turns + 1):
+                message = f"{turn}번째 질문이에요, 주말에 뭐 하세요?"
+                history.append({"role": "user", "content": message})
+                history.append({"role": "assistant", "content": "저는 보통 산책해요 ㅎㅎ 당신은요?"})
+                change = rng.randint(-10, 10)
+                score = max(0, min(100, score + change))
+                tables["affinity_logs"].append(
+                    {
+                        "log_id": _uuid(rng),
+                        "session_id": session_id,
+                        "partner_type": partner,
+                        "turn_index": turn,
+                        "score_change": change,
+                        "current_score": score,
+                        "reason": "공감하는 대답" if change > 0 else "무성의한 대답",
+                        "trigger_message": message,
+                        "created_at": played_at,
+                    }
+                )
+            tables["chat_logs"].append(
+                {
+                    "log_id": _uuid(rng),
+                    "session_id": session_id,
+                    "partner_type": partner,
+                    "chat_history": history,
+                    "turn_count": turns,
+                }
+            )
+        tables["analysis_results"].append(
+            {
+                "analysis_id": _uuid(rng),
+                "session_id": session_id,
+                "style": "적극적인 리액션러",
+                "user_type": rng.choice(PARTNERS),
+                "keywords": ["공감", "질문"],
+                "summary": "대화를 잘 이끌어 가는 편입니다.",
+                "created_at": played_at,
+            }
+        )
+    return tables
+
+
+def adhoc_export(session_ids: List[str]) -> int:
+    """세션마다 테이블별로 한 번씩 조회합니다. 받은 행 수를 반환합니다."""
+    from services.db_service import get_supabase
+
+    client = get_supabase()
+    rows = 0
+    for session_id in session_ids:
+        for table in ("chat_logs", "affinity_logs", "analysis_results"):
+            rows += len(client.table(table).select("*").eq("session_id", session_id).execute().data)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="분석용 일괄 내보내기 벤치마크")
+    parser.add_argument("--sessions", type=int, default=2000, help="가상 세션 수")
+    parser.add_argument("--turns", type=int, default=8, help="라운드당 대화 턴 수")
+    parser.add_argument("--latency", default="0.02", help="Supabase 요청당 지연 분포")
+    parser.add_argument("--sample", type=int, default=50, help="ad-hoc 방식을 측정할 세션 수")
+    parser.add_argument("--format", default="parquet", help="내보내기 형식 (pyarrow가 없으면 jsonl)")
+    parser.add_argument("--rows-per-file", type=int, default=20000)
+    parser.add_argument("--memory", action="store_true", help="tracemalloc으로 최대 메모리 측정 (느려짐)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    os.environ["BACKEND_MODE"] = "fake"
+    os.environ["FAKE_SUPABASE_LATENCY"] = args.latency
+
+    from services import data_export
+    from services.db_service import get_supabase
+
+    fmt = args.format if data_export.pa is not None else "jsonl"
+    dataset = make_dataset(args.sessions, args.turns, args.seed)
+    client = get_supabase()
+    client.tables.update(dataset)
+    print(
+        f"가상 데이터: 세션 {args.sessions}개, "
+        + ", ".join(f"{table} {len(rows)}행" for table, rows in dataset.items())
+        + f" (요청당 지연 {args.latency})"
+    )
+
+    print("\n[1] ad-hoc (세션마다 테이블별 조회)")
+    sample = [row["session_id"] for row in dataset["game_sessions"][: args.sample]]
+    requests_before = client.request_count
+    started = time.perf_counter()
+    adhoc_export(sample)
+    sample_seconds = time.perf_counter() - started
+    estimated = sample_seconds / len(sample) * args.sessions
+    print(
+        f"  세션 {len(sample)}개: {sample_seconds:.2f}s, 요청 {client.request_count - requests_before}회"
+        f" → 전체 {args.sessions}개 환산 {estimated:.1f}s"
+    )
+
+    print(f"\n[2] export (키셋 페이지 + {fmt} 파티션 파일)")
+    out_dir = tempfile.mkdtemp(prefix="bench_export_")
+    try:
+        if args.memory:
+            tracemalloc.start()
+        requests_before = client.request_count
+        started = time.perf_counter()
+        results = data_export.export_tables(out_dir, fmt=fmt, rows_per_file=args.rows_per_file)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if args.memory else None
+        if args.memory:
+            tracemalloc.stop()
+        for table, stats in results.items():
+            print(f"  {table:<18}{stats['rows']:>9}행  파일 {stats['files']:>3}개  {stats['seconds']:6.2f}s")
+        size = sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(out_dir) for name in names
+        )
+        print(f"  전체 {elapsed:.2f}s, 요청 {client.request_count - requests_before}회, 파일 크기 {size / 1e6:.1f} MB")
+        if peak is not None:
+            print(f"  최대 메모리 (tracemalloc): {peak / 1e6:.1f} MB")
+        print(f"\n  ad-hoc 환산 대비 속도 향상: x{estimated / elapsed:.0f}")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+동시 접속 부하 테스트 (오프라인)
+
+Streamlit AppTest로 intro → story → game(3라운드) → result 흐름을 화면 없이 실행합니다.
+OpenAI, Supabase, ChromaDB는 BACKEND_MODE=fake의 메모리 대역(services.fakes)을 사용하며
+각 대역의 지연 분포를 옵션으로 주입할 수 있습니다.
+
+동시 세션 수를 늘려가며 단계마다 다음을 측정합니다.
+    - 처리량: 초당 대화 턴 수 (turns/sec)
+    - 화면 단계별 지연: intro, story, 턴, 라운드 전환, 결과 화면 (p50/p95/p99)
+    - 내부 구간별 지연: services.tracing의 span (OpenAI, RAG, DB 등)
+    - 세션당 메모리: 단계 전후 RSS 증가량 / 세션 수
+
+실행: python -m benchmarks.bench_load_test --concurrency 1,4,8 --turns 3 \\
+          [--openai-latency lognormal:0.6:0.4] [--json load_test.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / "main.py")
+
+USER_MESSAGES = (
+    "안녕하세요 반가워요!",
+    "주말에 보통 뭐 하세요?",
+    "저는 영화 보는 거 좋아해요 ㅎㅎ",
+    "요즘 날씨 진짜 좋네요",
+    "여행 가본 곳 중에 어디가 제일 좋았어요?",
+    "커피 좋아하세요?",
+    "오늘 회사에서 좀 힘들었어요",
+    "맛집 추천해 주실 수 있어요?",
+)
+
+
+def _configure_environment(args) -> None:
+    """앱 모듈을 import하기 전에 fake 백엔드와 지연 분포를 환경 변수로 설정합니다."""
+    os.environ["BACKEND_MODE"] = "fake"
+    os.environ["TRACING_ENABLED"] = "1"
+    os.environ["FAKE_OPENAI_LATENCY"] = args.openai_latency
+    os.environ["FAKE_OPENAI_TOKEN_INTERVAL"] = args.token_interval
+    os.environ["FAKE_SUPABASE_LATENCY"] = args.supabase_latency
+    os.environ["FAKE_RAG_LATENCY"] = args.rag_latency
+
+
+def _rss_bytes() -> int:
+    """현재 RSS (Linux는 /proc, 그 외에는 최대 RSS로 대체)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class _ScaledSleepTime:
+    """화면 모듈의 time 대신 넣어 연출용 time.sleep만 scale배로 줄입니다."""
+
+    def __init__(self, scale: float):
+        self._scale = scale
+
+    def sleep(self, seconds):
+        if self._scale > 0:
+            time.sleep(seconds * self._scale)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def _scale_ui_sleeps(scale: float) -> None:
+    import views.game_view
+    import views.intro_view
+    import views.result_view
+    import views.story_view
+
+    if scale == 1:
+        return
+    for module in (views.intro_view, views.story_view, views.game_view, views.result_view):
+        module.time = _ScaledSleepTime(scale)
+
+
+def _find_button(at, label_prefix: str):
+    for button in at.button:
+        if button.label.startswith(label_prefix):
+            return button
+    return None
+
+
+class PlayerSession:
+    """AppTest 하나로 게임 한 판을 진행하는 가상 사용자"""
+
+    def __init__(self, index: int, turns_per_round: int, timeout: float, seed: int):
+        self.index = index
+        self.turns_per_round = turns_per_round
+        self.timeout = timeout
+        self.random = random.Random(seed + index)
+        self.stage_seconds: Dict[str, List[float]] = {}
+        self.turns = 0
+        self.error: Optional[str] = None
+        self.app = None
+
+    def _step(self, stage: str, element):
+        started = time.perf_counter()
+        element.run(timeout=self.timeout)
+        self.stage_seconds.setdefault(stage, []).append(time.perf_counter() - started)
+        if self.app.exception:
+            raise RuntimeError(f"{stage}: {self.app.exception[0].message}")
+
+    def _state(self, key, default=None):
+        return self.app.session_state[key] if key in self.app.session_state else default
+
+    def _widget(self, find):
+        """
+        find(at)로 위젯을 찾습니다. 없으면 한 번 다시 그린 뒤 찾습니다.
+        (스레드 경합 중 st.rerun()으로 끝난 실행은 AppTest가 이전 화면의 요소 트리를 돌려줄 때가 있음)
+        """
+        widget = find(self.app)
+        if widget is None:
+            self._step("rerender", self.app)
+            widget = find(self.app)
+            if widget is None:
+                raise LookupError(f"단계 {self._state('step')}에서 위젯을 찾지 못했습니다.")
+        return widget
+
+    def _click(self, label_prefix: str):
+        return self._widget(lambda at: _find_button(at, label_prefix)).click()
+
+    def run(self) -> None:
+        from streamlit.testing.v1 import AppTest
+        from views.game_view import MAX_TURNS
+
+        try:
+            self.app = at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+            self._step("intro", at)
+
+            at.text_input[0].input(f"tester{self.index}")
+            at.checkbox[0].check()
+            self._step("intro_submit", self._click("🚀"))
+            self._step("story", self._click("☕"))
+
+            while self._state("step") == "game":
+                round_before = self._state("current_round", 1)
+                for _ in range(min(self.turns_per_round, MAX_TURNS)):
+                    chat_input = self._widget(lambda at: at.chat_input[0] if at.chat_input else None)
+                    self._step("turn", chat_input.set_value(self.random.choice(USER_MESSAGES)))
+                    self.turns += 1
+                    if self._state("step") != "game" or self._state("current_round", 1) != round_before:
+                        break  # 호감도 0 또는 마지막 턴으로 라운드가 자동 종료됨
+                if self._state("step") == "game" and self._state("current_round", 1) == round_before:
+                    self._step("round_switch", self._click("다음 라운드로"))
+
+            if self._state("step") != "result":
+                raise RuntimeError(f"예상하지 못한 단계: {self._state('step')}")
+            # 선택 전에는 완료 버튼이 비활성화되어 있으므로 선택 후 한 번 다시 그림
+            radio = self._widget(lambda at: at.radio[0] if at.radio else None)
+            self._step("result_select", radio.set_value(radio.options[0]))
+            # 분석 작업 대기 + 결과 화면 렌더링 + 결과 저장
+            self._step("result", self._click("선택 완료"))
+            if "analysis_result" not in at.session_state:
+                self._step("rerender", at)
+            analysis = at.session_state["analysis_result"] if "analysis_result" in at.session_state else None
+            if analysis is None or isinstance(analysis, dict):  # 실패하면 {"error": ...}
+                raise RuntimeError("분석 결과를 받지 못했습니다.")
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+
+def run_level(concurrency: int, args) -> Dict:
+    """동시 세션 concurrency개를 실행하고 측정 결과를 반환합니다."""
+    from services import metrics
+    from services.tracing import get_span_stats
+
+    metrics.reset()
+    gc.collect()
+    rss_before = _rss_bytes()
+
+    sessions = [
+        PlayerSession(i, args.turns, args.timeout, args.seed) for i in range(concurrency)
+    ]
+    threads = [threading.Thread(target=s.run, name=f"player-{s.index}") for s in sessions]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    # AppTest(세션 상태)가 살아 있는 동안 측정
+    gc.collect()
+    rss_after = _rss_bytes()
+
+    stages: Dict[str, metrics.Histogram] = {}
+    for session in sessions:
+        for stage, samples in session.stage_seconds.items():
+            histogram = stages.setdefault(stage, metrics.Histogram(window=100000))
+            for value in samples:
+                histogram.observe(value)
+
+    turns = sum(s.turns for s in sessions)
+    errors = [s.error for s in sessions if s.error]
+    return {
+        "concurrency": concurrency,
+        "completed": concurrency - len(errors),
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "turns": turns,
+        "turns_per_sec": turns / elapsed if elapsed else 0.0,
+        "memory_per_session_mb": max(0, rss_after - rss_before) / concurrency / (1024 * 1024),
+        "stages": {name: h.snapshot() for name, h in stages.items()},
+        "spans": get_span_stats(),
+    }
+
+
+def _ms(value) -> str:
+    return f"{value * 1000:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def print_level(result: Dict) -> None:
+    print(
+        f"\n=== 동시 세션 {result['concurrency']}: 완료 {result['completed']}/{result['concurrency']}, "
+        f"{result['turns']}턴 / {result['elapsed_seconds']:.1f}s = {result['turns_per_sec']:.2f} turns/sec, "
+        f"세션당 메모리 {result['memory_per_session_mb']:.1f} MB"
+    )
+    for error in result["errors"][:3]:
+        print(f"  ❌ {error}")
+    print(f"  {'stage':<32}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for title, rows in (("[화면 단계]", result["stages"]), ("[내부 구간]", result["spans"])):
+        print(f"  {title}")
+        for name, summary in rows.items():
+            print(
+                f"  {name:<32}{summary['count']:>7}{_ms(summary['p50'])} {_ms(summary['p95'])} {_ms(summary['p99'])}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 동시 접속 부하 테스트")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="쉼표로 구분한 동시 세션 수 단계")
+    parser.add_argument("--turns", type=int, default=3, help="라운드당 대화 턴 수 (10이면 자동 종료까지)")
+    parser.add_argument("--openai-latency", default="lognormal:0.6:0.4", help="OpenAI 첫 토큰 지연 분포")
+    parser.add_argument("--token-interval", default="0.01", help="스트리밍 청크 간격 분포")
+    parser.add_argument("--supabase-latency", default="lognormal:0.05:0.3", help="Supabase 요청 지연 분포")
+    parser.add_argument("--rag-latency", default="lognormal:0.03:0.3", help="쿼리 임베딩 지연 분포")
+    parser.add_argument("--ui-sleep-scale", type=float, default=0.0, help="화면 연출용 sleep 배율 (1이면 실제와 동일)")
+    parser.add_argument("--timeout", type=float, default=180.0, help="화면 한 번 실행의 최대 시간(초)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args(argv)
+
+    _configure_environment(args)
+    _scale_ui_sleeps(args.ui_sleep_scale)
+
+    print("[warmup] 세션 1개로 import/인메모리 ChromaDB 초기화")
+    warmup = PlayerSession(-1, 1, args.timeout, args.seed)
+    warmup.run()
+    if warmup.error:
+        print(f"  ❌ {warmup.error}")
+        sys.exit(1)
+
+    results = []
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        result = run_level(concurrency, args)
+        print_level(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+LLM 응답 파서 벤치마크
+
+기존 처리(json.loads + dict.get + 화면에서의 int 변환)와 response_models의 검증 파서를
+같은 응답 묶음으로 비교합니다.
+
+    - 정확성: 응답 종류(정상, 잘림, 코드 펜스, 잘못된 타입)별로 두 방식이 화면에 보여줄 수 있는
+      결과를 만든 비율. 기존 방식에서 실패한 응답은 "🚨 오류 발생"이 되거나 API를 다시 호출해야 함
+    - 속도: 응답 하나를 파싱하는 시간 (µs/op)
+
+실행: python -m benchmarks.bench_response_parse [--responses 20000] [--input raw_responses.jsonl]
+      (--input: 한 줄에 원본 응답 문자열 하나를 JSON 문자열로 저장한 파일, 예: 운영 로그에서 추출)
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from services.response_models import ResponseParseError, parse_turn_result
+
+REPLIES = (
+    "어머 진짜요? 저도 그 영화 좋아해요 ㅎㅎ",
+    "음... 그건 좀 생각해봐야 할 것 같아요.",
+    "오늘 하루 어땠어요? 힘든 일은 없었고요?",
+    "ㅋㅋㅋ 그런 얘기는 처음 들어봐요! \"진짜\"로요?",
+    "주말에는 보통 집에서 책 읽어요.\n가끔 산책도 하고요 🌿",
+    "그렇게 말하니까 좀 서운하네요 😢",
+)
+REASONS = ("공감하는 대답", "무성의한 대답", "질문으로 대화를 이어감", None)
+
+
+def _valid(rng: random.Random) -> str:
+    payload = {"response": rng.choice(REPLIES), "score": rng.randint(-10, 10)}
+    reason = rng.choice(REASONS)
+    if reason:
+        payload["reason"] = reason
+    return json.dumps(payload, ensure_ascii=rng.random() < 0.3)
+
+
+def _truncated(rng: random.Random) -> str:
+    text = _valid(rng)
+    start = text.index('"response"') + len('"response": "') + 1
+    return text[: rng.randint(start, len(text) - 1)]
+
+
+def _fenced(rng: random.Random) -> str:
+    return "```json\n" + _valid(rng) + "\n```"
+
+
+def _wrong_type(rng: random.Random) -> str:
+    score = rng.choice(('"+5"', '"-3점"', "4.0", "null", '"보통"'))
+    return '{"response": %s, "score": %s}' % (json.dumps(rng.choice(REPLIES), ensure_ascii=False), score)
+
+
+CASE_BUILDERS: Dict[str, Callable[[random.Random], str]] = {
+    "valid": _valid,
+    "truncated": _truncated,
+    "code_fence": _fenced,
+    "wrong_type": _wrong_type,
+}
+
+
+def make_corpus(count: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """(종류, 응답 문자열) 목록. 정상 응답이 대부분이고 나머지 종류가 섞이도록 만듭니다."""
+    weights = {"valid": 0.85, "truncated": 0.07, "code_fence": 0.04, "wrong_type": 0.04}
+    kinds = rng.choices(list(weights), weights=list(weights.values()), k=count)
+    return [(kind, CASE_BUILDERS[kind](rng)) for kind in kinds]
+
+
+def load_corpus(path: str) -> List[Tuple[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return [("input", json.loads(line)) for line in f if line.strip()]
+
+
+def legacy_parse(text: str) -> Tuple[str, int]:
+    """기존 방식 (비교 기준): json.loads 후 화면에서 .get과 int 변환"""
+    result = json.loads(text)
+    response = result.get("response", "...")
+    try:
+        score = int(result.get("score", 0))
+    except (ValueError, TypeError):
+        score = 0
+    return response, score
+
+
+def new_parse(text: str) -> Tuple[str, int]:
+    result = parse_turn_result(text)
+    return result.response, result.score
+
+
+def check_outcomes(corpus: List[Tuple[str, str]]) -> Dict[str, Dict[str, int]]:
+    """응답 종류별로 (전체, 기존 방식 성공, 새 파서 성공) 건수를 셉니다."""
+    outcomes: Dict[str, Dict[str, int]] = {}
+    for kind, text in corpus:
+        row = outcomes.setdefault(kind, {"total": 0, "legacy_ok": 0, "new_ok": 0})
+        row["total"] += 1
+        for name, parse in (("legacy_ok", legacy_parse), ("new_ok", new_parse)):
+            try:
+                parse(text)
+            except (ValueError, AttributeError):  # json.JSONDecodeError, ResponseParseError 포함
+                continue
+            row[name] += 1
+    return outcomes
+
+
+def bench(label: str, parse, texts: List[str], repeat: int) -> float:
+    """실패하는 응답은 예외 처리 비용까지 포함해서 측정합니다."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            try:
+                parse(text)
+            except (ValueError, AttributeError, ResponseParseError):
+                pass
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<24} {best / len(texts) * 1e6:8.2f} µs/op")
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM 응답 파서 정확성/속도 비교")
+    parser.add_argument("--responses", type=int, default=20000, help="생성할 응답 수")
+    parser.add_argument("--input", default=None, help="원본 응답 JSONL (한 줄에 JSON 문자열 하나)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.input:
+        corpus = load_corpus(args.input)
+        print(f"{args.input}에서 응답 {len(corpus)}개 로드")
+    else:
+        corpus = make_corpus(args.responses, random.Random(args.seed))
+        print(f"합성 응답 {len(corpus)}개 생성 (seed={args.seed})")
+
+    print("\n[1] 화면에 보여줄 수 있는 결과를 만든 비율")
+    print(f"  {'kind':<12}{'count':>8}{'legacy':>10}{'new':>10}")
+    totals = {"total": 0, "legacy_ok": 0, "new_ok": 0}
+    for kind, row in sorted(check_outcomes(corpus).items()):
+        for key in totals:
+            totals[key] += row[key]
+        print(
+            f"  {kind:<12}{row['total']:>8}{row['legacy_ok'] / row['total']:>10.1%}"
+            f"{row['new_ok'] / row['total']:>10.1%}"
+        )
+    print(
+        f"  {'all':<12}{totals['total']:>8}{totals['legacy_ok'] / totals['total']:>10.1%}"
+        f"{totals['new_ok'] / totals['total']:>10.1%}"
+    )
+
+    print("\n[2] 파싱 속도")
+    texts = [text for _, text in corpus]
+    valid_texts = [text for kind, text in corpus if kind in ("valid", "input")]
+    legacy = bench("legacy (all)", legacy_parse, texts, args.repeat)
+    new = bench("parse_turn_result (all)", new_parse, texts, args.repeat)
+    if valid_texts:
+        bench("legacy (valid)", legacy_parse, valid_texts, args.repeat)
+        bench("parse_turn_result (valid)", new_parse, valid_texts, args.repeat)
+    print(f"\n  전체 응답 기준 상대 속도: x{legacy / new:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,138 @@
 # config/prompts.py
+import functools
 import os
+import threading
+
+from config.settings import CHAT_MODEL
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성: 없으면 토큰 수를 근사치로 계산
+    tiktoken = None
 
 # 프롬프트 파일 경로
 PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "prompts")
 
+# 개발 중 프롬프트 파일 수정 시 재시작 없이 반영 (파일 mtime 확인)
+PROMPT_HOT_RELOAD = os.getenv("PROMPT_HOT_RELOAD", "").lower() in ("1", "true", "yes")
+
+# 페르소나별 이름 설정 (상대방 성별 기준)
+PERSONA_NAMES = {
+    "M": {"EMOTIONAL": "김민수", "LOGICAL": "이진우", "TOUGH": "박태양"},
+    "F": {"EMOTIONAL": "이지은", "LOGICAL": "김서윤", "TOUGH": "박하윤"},
+}
+
+# 페르소나별 프롬프트 파일
+PERSONA_FILES = {
+    "EMOTIONAL": "emotional.txt",
+    "LOGICAL": "logical.txt",
+    "TOUGH": "tough.txt",
+}
+
+# 미리 렌더링한 프롬프트에서 닉네임이 들어갈 자리 표시
+_NICKNAME_SLOT = "\x00user_nickname\x00"
+
+
+class PromptRegistry:
+    """
+    프롬프트 템플릿을 한 번만 읽어 보관하고, (페르소나, 성별)별 정적 부분을 미리 렌더링합니다.
+    세션마다 바뀌는 닉네임만 호출 시점에 채워 넣습니다.
+    """
+
+    def __init__(self, prompts_dir, hot_reload=False):
+        self.prompts_dir = prompts_dir
+        self.hot_reload = hot_reload
+        self._lock = threading.Lock()
+        self._templates = {}  # filename -> (mtime, text)
+        self._rendered = {}  # (persona_type, user_gender) -> 닉네임 자리로 나뉜 조각 리스트
+        self._load_all()
+
+    def _load_all(self):
+        templates = {}
+        for filename in sorted(os.listdir(self.prompts_dir)):
+            if filename.endswith(".txt"):
+                filepath = os.path.join(self.prompts_dir, filename)
+                with open(filepath, "r", encoding="utf-8") as f:
+                    templates[filename] = (os.path.getmtime(filepath), f.read())
+        self._templates = templates
+        self._rendered = {}
+
+    def _reload_if_changed(self):
+        for filename, (mtime, _) in self._templates.items():
+            filepath = os.path.join(self.prompts_dir, filename)
+            try:
+                changed = os.path.getmtime(filepath) != mtime
+            except OSError:
+                changed = True
+            if changed:
+                print(f"[prompts] {filename} 변경 감지, 템플릿을 다시 읽습니다.")
+                self._load_all()
+                return
+
+    def get(self, filename):
+        """프롬프트 파일 내용을 반환합니다."""
+        with self._lock:
+            if self.hot_reload:
+                self._reload_if_changed()
+            return self._templates[filename][1]
+
+    def render_system_prompt(self, persona_type, user_gender, user_nickname="OO"):
+        """(페르소나, 성별)별로 미리 렌더링한 시스템 프롬프트에 닉네임을 채워 반환합니다."""
+        key = (persona_type, user_gender)
+        with self._lock:
+            if self.hot_reload:
+                self._reload_if_changed()
+            parts = self._rendered.get(key)
+            if parts is None:
+                parts = self._prerender(persona_type, user_gender).split(_NICKNAME_SLOT)
+                self._rendered[key] = parts
+        return user_nickname.join(parts)
+
+    def _prerender(self, persona_type, user_gender):
+        # 상대방 호칭 및 성별 설정
+        target_role = "소개팅녀" if user_gender == "M" else "소개팅남"
+
+        opponent_gender = "F" if user_gender == "M" else "M"
+        current_name = PERSONA_NAMES.get(opponent_gender, {}).get(persona_type, "상대방")
+
+        # 공통 프롬프트 변수 치환 (닉네임은 자리 표시만 남겨둠)
+        base_prompt = self._templates["base.txt"][1].format(
+            target_role=target_role, current_name=current_name, user_nickname=_NICKNAME_SLOT
+        )
+
+        # 페르소나별 프롬프트
+        persona_file = PERSONA_FILES.get(persona_type)
+        if persona_file:
+            persona_prompt = self._templates[persona_file][1]
+        else:
+            persona_prompt = ""
+
+        return base_prompt + "\n\n" + persona_prompt + "\n\n"
+
+
+_registry = PromptRegistry(PROMPTS_DIR, hot_reload=PROMPT_HOT_RELOAD)
+
 
 def _load_prompt(filename):
-    """프롬프트 파일을 읽어서 반환합니다."""
-    filepath = os.path.join(PROMPTS_DIR, filename)
-    with open(filepath, "r", encoding="utf-8") as f:
-        return f.read()
+    """프롬프트 파일 내용을 반환합니다. (레지스트리에 캐시된 내용 사용)"""
+    return _registry.get(filename)
+
+
+@functools.lru_cache(maxsize=1024)
+def count_tokens(text, model=CHAT_MODEL):
+    """
+    텍스트의 토큰 수를 반환합니다.
+    tiktoken이 설치되어 있지 않으면 근사치(ASCII 4글자 ≈ 1토큰, 그 외 1글자 ≈ 1토큰)를 반환합니다.
+    """
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return len(encoding.encode(text))
+
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
 
 
 def get_system_prompt(persona_type, user_gender, user_nickname="OO", rag_context=""):
@@ -18,47 +141,17 @@ def get_system_prompt(persona_type, user_gender, user_nickname="OO", rag_context
     user_gender: 'M', 'F'
     user_nickname: 사용자 닉네임
     """
+    return _registry.render_system_prompt(persona_type, user_gender, user_nickname) + rag_context
 
-    # 상대방 호칭 및 성별 설정
-    target_role = "소개팅녀" if user_gender == "M" else "소개팅남"
-
-    # 페르소나별 이름 설정
-    names = {
-        "M": {"EMOTIONAL": "김민수", "LOGICAL": "이진우", "TOUGH": "박태양"},
-        "F": {"EMOTIONAL": "이지은", "LOGICAL": "김서윤", "TOUGH": "박하윤"},
-    }
-
-    opponent_gender = "F" if user_gender == "M" else "M"
-    current_name = names.get(opponent_gender, {}).get(persona_type, "상대방")
-
-    # 공통 프롬프트 로드 및 변수 치환
-    base_prompt = _load_prompt("base.txt").format(
-        target_role=target_role, current_name=current_name, user_nickname=user_nickname
-    )
-
-    # 페르소나별 프롬프트 로드
-    persona_files = {
-        "EMOTIONAL": "emotional.txt",
-        "LOGICAL": "logical.txt",
-        "TOUGH": "tough.txt",
-    }
 
-    persona_file = persona_files.get(persona_type)
-    if persona_file:
-        persona_prompt = _load_prompt(persona_file)
-    else:
-        persona_prompt = ""
-
-    return base_prompt + "\n\n" + persona_prompt + "\n\n" + rag_context
+def get_system_prompt_tokens(persona_type, user_gender, user_nickname="OO"):
+    """렌더링된 시스템 프롬프트의 토큰 수를 반환합니다. (프롬프트 예산 관리용)"""
+    return count_tokens(get_system_prompt(persona_type, user_gender, user_nickname))
 
 
 def get_persona_name(persona_type, user_gender):
-    names = {
-        "M": {"EMOTIONAL": "김민수", "LOGICAL": "이진우", "TOUGH": "박태양"},
-        "F": {"EMOTIONAL": "이지은", "LOGICAL": "김서윤", "TOUGH": "박하윤"},
-    }
     opponent_gender = "F" if user_gender == "M" else "M"
-    return names.get(opponent_gender, {}).get(persona_type, "알 수 없음")
+    return PERSONA_NAMES.get(opponent_gender, {}).get(persona_type, "알 수 없음")
 
 
 def get_first_greeting(persona_type, user_gender):
@@ -86,3 +179,10 @@ def get_analysis_prompt():
     사용자의 대화 스타일을 분석하는 시스템 프롬프트를 반환합니다.
     """
     return _load_prompt("analysis.txt")
+
+
+def get_round_digest_prompt():
+    """
+    라운드 하나의 대화에서 사용자 대화 습관을 요약 카드로 추출하는 시스템 프롬프트를 반환합니다.
+    """
+    return _load_prompt("round_digest.txt")
@@ -1,8 +1,112 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# 테이블별 기본 키 컬럼 (tables.sql 기준, 클라이언트에서 UUID를 생성해 채움)
+TABLE_PRIMARY_KEYS = {
+    "users": "user_id",
+    "game_sessions": "session_id",
+    "chat_logs": "log_id",
+    "analysis_results": "analysis_id",
+    "affinity_logs": "log_id",
+}
 CHAT_MODEL = "gpt-4.1-mini"
 ANALYSIS_MODEL = "gpt-5-nano"
+
+# 프롬프트 인젝션 탐지 규칙 파일 (환경 변수로 교체 가능)
+INJECTION_RULES_PATH = os.getenv(
+    "INJECTION_RULES_PATH", os.path.join(os.path.dirname(__file__), "injection_rules.json")
+)
+
+# 대화 컨텍스트 윈도우: 시스템 프롬프트 + 이전 대화 요약 + 최근 N턴만 전송
+CONTEXT_MAX_RECENT_TURNS = int(os.getenv("CONTEXT_MAX_RECENT_TURNS", "6"))  # 0이면 전체 기록 전송
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))  # 요청당 입력 토큰 예산 (RAG 제외)
+CONTEXT_SUMMARY_MAX_CHARS = 400
+CONTEXT_SUMMARY_SNIPPET_CHARS = 40
+
+# 초반 턴 응답 캐시 (opt-in): 비슷한 첫 대화에는 API 호출 없이 캐시된 응답 사용
+# 기본은 꺼져 있고 RESPONSE_CACHE_ENABLED=1 로 켬. 실행 중 끄기(kill switch)는
+# 디버그 대시보드의 토글 (set_response_cache_enabled)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAX_TURNS = int(os.getenv("RESPONSE_CACHE_MAX_TURNS", "2"))  # 캐시를 사용할 최대 사용자 턴 수
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))  # 코사인 유사도 임계값
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # 초
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))  # 대화 prefix 버킷 수
+
+# 디버그 대시보드 (캐시 적중률 등): DEBUG_DASHBOARD=1 이면 ?debug=1 로 접근 가능
+DEBUG_DASHBOARD = os.getenv("DEBUG_DASHBOARD", "").lower() in ("1", "true", "yes")
+
+# 대화 분석 작업 큐 (라운드 종료 시 백그라운드 분석)
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "2"))  # 동시 분석 요청 수
+ANALYSIS_MAX_RETRIES = int(os.getenv("ANALYSIS_MAX_RETRIES", "2"))
+ANALYSIS_WAIT_TIMEOUT = int(os.getenv("ANALYSIS_WAIT_TIMEOUT", "120"))  # 결과 화면에서 기다릴 최대 시간(초)
+ROUND_DIGEST_WAIT_TIMEOUT = int(os.getenv("ROUND_DIGEST_WAIT_TIMEOUT", "60"))  # 최종 분석이 라운드 요약을 기다릴 최대 시간(초)
+
+# 공용 HTTP 전송 계층 (커넥션 풀, 타임아웃, 재시도, 서킷 브레이커)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))  # 업스트림별 최대 커넥션 수
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))  # 유지할 유휴 keep-alive 커넥션 수
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # 유휴 커넥션 유지 시간(초)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+OPENAI_CHAT_TIMEOUT = float(os.getenv("OPENAI_CHAT_TIMEOUT", "30"))  # 채팅 응답 deadline(초)
+OPENAI_ANALYSIS_TIMEOUT = float(os.getenv("OPENAI_ANALYSIS_TIMEOUT", "120"))  # 분석 응답 deadline(초)
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+RAG_SEARCH_TIMEOUT = float(os.getenv("RAG_SEARCH_TIMEOUT", "3"))  # 넘으면 RAG 없이 응답
+IDEMPOTENT_MAX_RETRIES = int(os.getenv("IDEMPOTENT_MAX_RETRIES", "2"))  # 멱등 작업만 재시도
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # 연속 실패 시 차단
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))  # 차단 후 재시도까지 대기(초)
+
+# 턴 처리 구간 추적 (sanitize, RAG, OpenAI, DB 등 구간별 지연 히스토그램)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1").lower() in ("1", "true", "yes")  # 0이면 추적 비활성화
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0보다 크면 http://localhost:PORT/metrics 로 Prometheus 텍스트 노출
+
+# 백엔드 모드: live(실제 OpenAI/Supabase/ChromaDB) 또는 fake(services.fakes의 메모리 대역, 부하 테스트용)
+BACKEND_MODE = os.getenv("BACKEND_MODE", "live").lower()
+# fake 모드의 지연 분포: "0", "0.2"(고정), "uniform:0.1:0.5", "lognormal:중앙값:sigma" (초)
+FAKE_OPENAI_LATENCY = os.getenv("FAKE_OPENAI_LATENCY", "lognormal:0.6:0.4")  # 첫 토큰까지
+FAKE_OPENAI_TOKEN_INTERVAL = os.getenv("FAKE_OPENAI_TOKEN_INTERVAL", "0.01")  # 스트리밍 청크 간격
+FAKE_SUPABASE_LATENCY = os.getenv("FAKE_SUPABASE_LATENCY", "lognormal:0.05:0.3")
+FAKE_RAG_LATENCY = os.getenv("FAKE_RAG_LATENCY", "lognormal:0.03:0.3")  # 쿼리 임베딩
+
+# asyncio LLM 게이트웨이: 모든 OpenAI 호출을 하나의 이벤트 루프와 AsyncOpenAI 클라이언트로 처리
+LLM_GATEWAY_ENABLED = os.getenv("LLM_GATEWAY_ENABLED", "1").lower() in ("1", "true", "yes")  # 0이면 스레드별 동기 호출
+LLM_GATEWAY_MAX_CONNECTIONS = int(os.getenv("LLM_GATEWAY_MAX_CONNECTIONS", "16"))  # 게이트웨이 전체 커넥션 수
+LLM_GATEWAY_QUEUE_TIMEOUT = float(os.getenv("LLM_GATEWAY_QUEUE_TIMEOUT", "60"))  # 대기열에서 기다릴 최대 시간(초)
+LLM_GATEWAY_COMPLETION_TOKENS = int(os.getenv("LLM_GATEWAY_COMPLETION_TOKENS", "400"))  # 응답 토큰 추정치 (분당 토큰 한도 계산용)
+LLM_GATEWAY_MAX_QUEUE = int(os.getenv("LLM_GATEWAY_MAX_QUEUE", "64"))  # 우선순위별 최대 대기 요청 수 (넘으면 바로 거절)
+# 모델별 동시 요청 수, 분당 요청 수(RPM), 분당 토큰 수(TPM) 한도
+LLM_MODEL_LIMITS = {
+    CHAT_MODEL: {
+        "max_concurrency": int(os.getenv("CHAT_MODEL_MAX_CONCURRENCY", "12")),
+        "requests_per_minute": int(os.getenv("CHAT_MODEL_RPM", "500")),
+        "tokens_per_minute": int(os.getenv("CHAT_MODEL_TPM", "200000")),
+    },
+    ANALYSIS_MODEL: {
+        "max_concurrency": int(os.getenv("ANALYSIS_MODEL_MAX_CONCURRENCY", "4")),
+        "requests_per_minute": int(os.getenv("ANALYSIS_MODEL_RPM", "500")),
+        "tokens_per_minute": int(os.getenv("ANALYSIS_MODEL_TPM", "200000")),
+    },
+}
+
+# 모델별 토큰 버킷 속도 제한 (RPM/TPM)
+# memory: 프로세스 안의 스레드끼리 공유 / file: 같은 호스트의 여러 프로세스(Streamlit 워커 등)가 파일 락으로 공유
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_STATE_FILE = os.getenv("RATE_LIMIT_STATE_FILE", os.path.join(tempfile.gettempdir(), "dating_sim_rate_limit.json"))
+RATE_LIMIT_LOW_PRIORITY_RESERVE = float(os.getenv("RATE_LIMIT_LOW_PRIORITY_RESERVE", "0.2"))  # 분석 요청이 남겨 두는 버킷 비율 (채팅 몫)
+
+# 구조화된 출력: JSON 스키마(strict)로 응답 형식을 강제 (0이면 기존 JSON 모드 사용)
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT_ENABLED", "1").lower() in ("1", "true", "yes")
+
+# 분석용 일괄 내보내기 (services.data_export)
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))  # 키셋 페이지 크기 (Supabase 기본 최대 행 수가 1000)
+EXPORT_ROWS_PER_FILE = int(os.getenv("EXPORT_ROWS_PER_FILE", "100000"))  # 파티션 파일 하나의 최대 행 수 (메모리 상한)
+
+# 호감도 궤적 분석 (services.affinity_analytics, ?analytics=1 대시보드)
+AFFINITY_ANALYTICS_TTL = int(os.getenv("AFFINITY_ANALYTICS_TTL", "300"))  # 불러온 로그와 기간별 결과를 캐시하는 시간(초)
+
+# 벡터 DB 증분 동기화: 컬렉션의 이 비율보다 많은 문서가 삭제 대상이면
+# --rebuild 또는 --allow-mass-delete 없이는 동기화를 중단 (잘린 코퍼스로 컬렉션이 지워지는 것 방지)
+CHROMA_SYNC_MAX_DELETE_RATIO = float(os.getenv("CHROMA_SYNC_MAX_DELETE_RATIO", "0.2"))
@@ -1,10 +1,9 @@
-from views.intro_view import show_intro
-from views.story_view import show_story
-from views.game_view import show_game
-from views.result_view import show_result
 import streamlit as st
 import os
 from dotenv import load_dotenv
+from config.settings import BACKEND_MODE, DEBUG_DASHBOARD, METRICS_PORT
+from services.metrics import start_metrics_server
+from services.startup import start_warmup, timed
 
 # 페이지 설정 (브라우저 탭 제목 및 아이콘)
 st.set_page_config(
@@ -22,7 +21,7 @@ def get_secret(key):
     return os.getenv(key) or st.secrets.get(key)
 
 # API 키 확인 (디버깅용, 배포 시 삭제 권장)
-if not get_secret("OPENAI_API_KEY"):
+if BACKEND_MODE != "fake" and not get_secret("OPENAI_API_KEY"):
     st.error("🚨 API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
     st.stop()
 
@@ -38,19 +37,44 @@ if "user_data" not in st.session_state:
 if "game_logs" not in st.session_state:
     st.session_state["game_logs"] = [] # 대화 로그 임시 저장
 
+# 무거운 서비스(OpenAI, Supabase, ChromaDB, 임베딩 모델)는 백그라운드에서 미리 로드
+# (프로세스당 한 번만 실행되며 첫 화면 렌더링을 막지 않음)
+start_warmup()
+
+# METRICS_PORT가 설정되면 구간별 지연 지표를 Prometheus 텍스트로 노출 (프로세스당 한 번)
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+
 # ---------------------------------------------------------
 # 3. 메인 실행 로직
 # ---------------------------------------------------------
 def main():
     current_step = st.session_state["step"]
+
+    # 디버그 대시보드 (DEBUG_DASHBOARD=1 일 때만 ?debug=1, 호감도 분석은 ?analytics=1 로 접근 가능)
+    if DEBUG_DASHBOARD and st.query_params.get("debug") == "1":
+        from views.debug_view import show_debug
+        show_debug()
+        return
+    if DEBUG_DASHBOARD and st.query_params.get("analytics") == "1":
+        from views.analytics_view import show_analytics
+        show_analytics()
+        return
     
+    # 화면 모듈은 해당 단계에 들어갈 때 import (첫 화면에 필요 없는 의존성 로드 방지)
     if current_step == "intro":
+        with timed("import views.intro_view"):
+            from views.intro_view import show_intro
         show_intro()
     elif current_step == "story":
+        from views.story_view import show_story
         show_story()
     elif current_step == "game":
+        with timed("import views.game_view"):
+            from views.game_view import show_game
         show_game()
     elif current_step == "result":
+        from views.result_view import show_result
         show_result()
     else:
         st.error("알 수 없는 오류가 발생했습니다.")
@@ -0,0 +1,127 @@
+"""
+clean_text 골든 출력 동등성 검사
+
+기존 구현(패턴별 re.sub 17회 + 공백 정리)과 결합 정규식 구현(clean_text, clean_texts)의 출력이
+경계 조건 고정 입력(GOLDEN_CASES)과 무작위 입력, 선택적으로 원본 데이터에서 완전히 같은지 확인합니다.
+불일치가 있으면 종료 코드 1로 끝나므로 CHAT_NOISE_PATTERNS를 바꾼 뒤 바로 실행할 수 있습니다.
+
+실행: python -m preprocess.clean_text_check [--lines 20000] [--data-dir preprocess/data]
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from preprocess.data_preprocessor import CHAT_NOISE_PATTERNS, clean_text, clean_texts, iter_data_files
+
+
+def legacy_clean_text(text: str) -> str:
+    """기존 clean_text 구현 (비교 기준)"""
+    cleaned = text
+    for pattern in CHAT_NOISE_PATTERNS:
+        cleaned = re.sub(pattern, " ", cleaned)
+    cleaned = re.sub(r"\s+", " ", cleaned)
+    return cleaned.strip()
+
+
+# 경계 조건을 모아둔 고정 입력
+GOLDEN_CASES = [
+    "",
+    " ",
+    "ㅋ",
+    "ㅋㅋㅋ",
+    "안녕 ㅋㅋ 반가워",
+    "안녕ㅋㅋ반가워",
+    "하 하하 하하하",
+    "ㄱ ㄱㄱ ㄱㄱㄱ",
+    "ㅇ ㅇㅇ ㄷ ㄷㄷ",
+    "헤헤 호호 히히 헤 호 히",
+    "키키 웅웅 앜 엌",
+    "ㅠㅠㅜㅜ 슬퍼",
+    ". .. ... ....",
+    "; ;; ;;; ;;;;",
+    "ㄱㅋㄱ ㅇㅎㅇ",
+    "하ㅋ하 호;;;호",
+    "\t탭\n줄바꿈　전각공백 nbsp",
+    "밥 먹었어?ㅋㅋㅋ...ㅎㅎ",
+    "키보드 키가 고장났어",
+    "웅장한 하루",
+    "\x00널문자ㅋㅋ\x00",
+]
+
+NOISE_PIECES = [
+    "ㅋ", "ㅎ", "ㅜ", "ㅠ", "키", "웅", "앜", "엌", "ㄱ", "ㅇ", "ㄷ",
+    "헤", "하", "호", "히", ";", ".", " ", "  ", "\t", "\n", "　",
+]
+TEXT_PIECES = ["안녕", "밥", "먹었어", "?", "!", "오늘", "abc", "123", "좋아", "ㄴ", "ㅁ"]
+
+
+def random_line(rng: random.Random) -> str:
+    """노이즈 조각과 일반 텍스트 조각을 섞은 한 줄을 만듭니다."""
+    parts = []
+    for _ in range(rng.randint(0, 20)):
+        if rng.random() < 0.5:
+            parts.append(rng.choice(NOISE_PIECES) * rng.randint(1, 4))
+        else:
+            parts.append(rng.choice(TEXT_PIECES))
+    return "".join(parts)
+
+
+def load_corpus_lines(data_dir: str, limit: int) -> List[str]:
+    """원본 데이터에서 norm_text를 최대 limit개 읽어옵니다."""
+    lines = []
+    for _, json_file in iter_data_files(data_dir):
+        with open(json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for info in data.get("info", []):
+            for line in info.get("annotations", {}).get("lines", []):
+                norm_text = line.get("norm_text", "")
+                if norm_text:
+                    lines.append(norm_text)
+                    if len(lines) >= limit:
+                        return lines
+    return lines
+
+
+def check_equivalence(lines: List[str]) -> int:
+    """두 구현의 출력이 다른 줄 수를 반환합니다."""
+    mismatches = 0
+    for line, batch_cleaned in zip(lines, clean_texts(lines)):
+        expected = legacy_clean_text(line)
+        for label, cleaned in (("clean_text", clean_text(line)), ("clean_texts", batch_cleaned)):
+            if cleaned != expected:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"  불일치 ({label}): {line!r}")
+                break
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="clean_text 골든 출력 동등성 검사")
+    parser.add_argument("--data-dir", default=None, help="실제 원본 데이터 디렉토리 (선택)")
+    parser.add_argument("--lines", type=int, default=20000, help="무작위(또는 원본) 입력 줄 수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.data_dir and Path(args.data_dir).exists():
+        lines = load_corpus_lines(args.data_dir, args.lines)
+        print(f"원본 데이터에서 {len(lines)}줄 로드")
+    else:
+        rng = random.Random(args.seed)
+        lines = [random_line(rng) for _ in range(args.lines)]
+        print(f"무작위 입력 {len(lines)}줄 생성 (seed={args.seed})")
+
+    mismatches = check_equivalence(GOLDEN_CASES + lines)
+    if mismatches:
+        print(f"❌ 불일치 {mismatches}건")
+        sys.exit(1)
+    print(f"✅ 골든 입력 {len(GOLDEN_CASES)}개 포함 {len(GOLDEN_CASES) + len(lines)}줄 모두 동일")
+
+
+if __name__ == "__main__":
+    main()
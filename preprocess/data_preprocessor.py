@@ -17,11 +17,14 @@
 - 19: 방송/연예
 """
 
+import argparse
 import json
 import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 # 제외할 카테고리 번호 (파일명에서 추출)
@@ -73,21 +76,44 @@ def should_exclude_file(filename: str) -> bool:
     return category in EXCLUDED_CATEGORIES
 
 
+def _compile_noise_pattern(patterns: List[str]) -> "re.Pattern":
+    """
+    노이즈 패턴들과 공백 정리를 한 번의 스캔으로 처리하는 정규식을 만듭니다.
+
+    각 패턴은 매칭 부분을 공백으로 바꾸고 마지막에 연속 공백을 하나로 줄이므로,
+    결과적으로 "공백과 노이즈가 이어진 구간"이 공백 하나가 됩니다.
+    패턴들이 서로 다른 문자를 다루기 때문에 순서대로 적용한 결과와 동일합니다.
+    한 글자 반복 패턴(예: ㅋ+)은 문자 클래스로 합쳐 분기 수를 줄입니다.
+    """
+    single_chars = []
+    sequences = []
+    for pattern in patterns:
+        core = pattern.removeprefix(r"\s*").removesuffix(r"\s*")
+        if len(core) == 2 and core.endswith("+"):
+            single_chars.append(re.escape(core[0]))
+        else:
+            sequences.append(core)
+
+    char_class = "[\\s" + "".join(single_chars) + "]"
+    return re.compile("(?:" + "|".join([char_class] + sequences) + ")+")
+
+
+_NOISE_OR_SPACE_RE = _compile_noise_pattern(CHAT_NOISE_PATTERNS)
+
+
 def clean_text(text: str) -> str:
     """
     채팅 텍스트에서 불필요한 표현을 제거합니다.
     """
-    cleaned = text
-    for pattern in CHAT_NOISE_PATTERNS:
-        cleaned = re.sub(pattern, " ", cleaned)
+    # 노이즈 제거 + 연속 공백 정리를 한 번에 수행한 뒤 앞뒤 공백 제거
+    return _NOISE_OR_SPACE_RE.sub(" ", text).strip()
 
-    # 연속된 공백을 하나로 줄임
-    cleaned = re.sub(r"\s+", " ", cleaned)
 
-    # 앞뒤 공백 제거
-    cleaned = cleaned.strip()
-
-    return cleaned
+def clean_texts(lines: List[str]) -> List[str]:
+    """
+    여러 줄을 한 번에 정제합니다. 결과는 줄마다 clean_text를 호출한 것과 같습니다.
+    """
+    return [clean_text(line) for line in lines]
 
 
 def extract_conversation_from_file(file_path: Path) -> List[Dict]:
@@ -176,18 +202,8 @@ def extract_conversation_from_file(file_path: Path) -> List[Dict]:
     return conversations
 
 
-def process_all_data(data_dir: str) -> Tuple[List[Dict], Dict]:
-    """
-    모든 플랫폼의 채팅 데이터를 처리합니다.
-
-    Args:
-        data_dir: 데이터 디렉토리 경로
-
-    Returns:
-        (처리된 대화 리스트, 통계 정보)
-    """
-    all_conversations = []
-    stats = {
+def _new_stats() -> Dict:
+    return {
         "total_files": 0,
         "excluded_files": 0,
         "processed_files": 0,
@@ -195,20 +211,57 @@ def process_all_data(data_dir: str) -> Tuple[List[Dict], Dict]:
         "by_platform": {},
     }
 
-    data_path = Path(data_dir)
 
-    # 모든 플랫폼 폴더 순회
+def iter_data_files(data_dir: str) -> Iterator[Tuple[str, Path]]:
+    """
+    (플랫폼 이름, 파일 경로)를 결정적인 순서(플랫폼명, 파일명 정렬)로 반환합니다.
+    """
+    data_path = Path(data_dir)
     for platform_dir in sorted(data_path.iterdir()):
         if not platform_dir.is_dir():
             continue
+        for json_file in sorted(platform_dir.glob("*.json")):
+            yield platform_dir.name, json_file
 
-        platform_name = platform_dir.name
-        platform_stats = {"total": 0, "excluded": 0, "processed": 0, "conversations": 0}
 
-        # JSON 파일 순회
-        json_files = list(platform_dir.glob("*.json"))
+def _extract_files(file_paths: List[Path]) -> List[List[Dict]]:
+    """워커 프로세스에서 실행: 파일 묶음을 한 번에 처리합니다."""
+    return [extract_conversation_from_file(path) for path in file_paths]
 
-        for json_file in json_files:
+
+def iter_processed_conversations(
+    data_dir: str,
+    stats: Optional[Dict] = None,
+    workers: Optional[int] = None,
+    files_per_task: int = 16,
+    max_pending_tasks: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    모든 플랫폼의 채팅 데이터를 프로세스 풀에서 병렬로 처리하며 대화를 하나씩 반환합니다.
+
+    입력 파일 순서대로 결과를 내보내므로 워커 수와 관계없이 출력 순서가 같고,
+    동시에 대기하는 작업 수를 제한하여 메모리 사용량이 코퍼스 크기에 비례하지 않습니다.
+
+    Args:
+        data_dir: 데이터 디렉토리 경로
+        stats: 통계를 누적할 dict (None이면 내부에서 새로 만들고 버림)
+        workers: 워커 프로세스 수 (None이면 CPU 코어 수, 1이면 현재 프로세스에서 순차 처리)
+        files_per_task: 워커에 한 번에 넘길 파일 수
+        max_pending_tasks: 동시에 대기시킬 최대 작업 수 (기본: 워커 수 x 4)
+    """
+    if stats is None:
+        stats = _new_stats()
+    workers = workers or os.cpu_count() or 1
+    max_pending_tasks = max_pending_tasks or workers * 4
+
+    def tasks() -> Iterator[Tuple[str, List[Path]]]:
+        # 같은 플랫폼의 파일끼리만 묶어서 플랫폼별 통계를 정확히 집계
+        batch_platform, batch = None, []
+        for platform_name, json_file in iter_data_files(data_dir):
+            platform_stats = stats["by_platform"].setdefault(
+                platform_name,
+                {"total": 0, "excluded": 0, "processed": 0, "conversations": 0},
+            )
             stats["total_files"] += 1
             platform_stats["total"] += 1
 
@@ -218,52 +271,161 @@ def process_all_data(data_dir: str) -> Tuple[List[Dict], Dict]:
                 platform_stats["excluded"] += 1
                 continue
 
-            # 대화 추출
-            conversations = extract_conversation_from_file(json_file)
+            if batch and (platform_name != batch_platform or len(batch) >= files_per_task):
+                yield batch_platform, batch
+                batch = []
+            batch_platform = platform_name
+            batch.append(json_file)
 
+        if batch:
+            yield batch_platform, batch
+
+    def merge(platform_name: str, results: List[List[Dict]]) -> Iterator[Dict]:
+        platform_stats = stats["by_platform"][platform_name]
+        for conversations in results:
             stats["processed_files"] += 1
             platform_stats["processed"] += 1
-
             stats["total_conversations"] += len(conversations)
             platform_stats["conversations"] += len(conversations)
+            yield from conversations
+
+    if workers == 1:
+        for platform_name, paths in tasks():
+            yield from merge(platform_name, _extract_files(paths))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for platform_name, paths in tasks():
+            pending.append((platform_name, executor.submit(_extract_files, paths)))
+            if len(pending) >= max_pending_tasks:
+                platform_name, future = pending.popleft()
+                yield from merge(platform_name, future.result())
 
-            all_conversations.extend(conversations)
+        while pending:
+            platform_name, future = pending.popleft()
+            yield from merge(platform_name, future.result())
+
+
+def process_all_data(data_dir: str, workers: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+    """
+    모든 플랫폼의 채팅 데이터를 처리합니다.
 
-        stats["by_platform"][platform_name] = platform_stats
+    전체 결과를 메모리에 모으므로 대용량 코퍼스에서는
+    iter_processed_conversations + save_processed_jsonl 사용을 권장합니다.
 
+    Args:
+        data_dir: 데이터 디렉토리 경로
+        workers: 워커 프로세스 수
+
+    Returns:
+        (처리된 대화 리스트, 통계 정보)
+    """
+    stats = _new_stats()
+    all_conversations = list(
+        iter_processed_conversations(data_dir, stats=stats, workers=workers)
+    )
     return all_conversations, stats
 
 
 def save_processed_data(conversations: List[Dict], output_path: str) -> None:
     """
     처리된 대화 데이터를 JSON 파일로 저장합니다.
+    임시 파일에 쓴 뒤 교체하며, 저장할 대화가 없으면 기존 출력을 그대로 둡니다.
     """
     output = Path(output_path)
-    output.parent.mkdir(parents=True, exist_ok=True)
+    if not conversations:
+        print(f"No conversations to save, keeping existing {output}")
+        return
 
-    with open(output, "w", encoding="utf-8") as f:
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_output = output.with_name(output.name + ".tmp")
+    with open(tmp_output, "w", encoding="utf-8") as f:
         json.dump(conversations, f, ensure_ascii=False, indent=2)
 
+    os.replace(tmp_output, output)
     print(f"Saved {len(conversations)} conversations to {output}")
 
 
-def main():
-    """메인 실행 함수"""
-    # 현재 스크립트 위치 기준으로 경로 설정
+def save_processed_jsonl(conversations: Iterator[Dict], output_path: str) -> int:
+    """
+    대화를 한 줄에 하나씩 JSON Lines 파일로 스트리밍 저장합니다.
+    임시 파일에 쓴 뒤 교체하므로 중간에 실패해도 기존 출력이 깨지지 않고,
+    저장된 대화가 없으면 기존 출력을 그대로 둡니다.
+
+    Returns:
+        저장된 대화 수
+    """
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_output = output.with_name(output.name + ".tmp")
+
+    count = 0
+    with open(tmp_output, "w", encoding="utf-8") as f:
+        for conversation in conversations:
+            f.write(json.dumps(conversation, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+
+    # 처리된 대화가 없으면 기존 출력을 빈 파일로 덮어쓰지 않음
+    if count == 0:
+        tmp_output.unlink()
+        print(f"No conversations to save, keeping existing {output}")
+        return 0
+
+    os.replace(tmp_output, output)
+    print(f"Saved {count} conversations to {output}")
+    return count
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     script_dir = Path(__file__).parent
-    data_dir = script_dir / "data"
-    output_path = script_dir / "processed" / "chat_data_cleaned_v2.json"
+    parser = argparse.ArgumentParser(description="채팅 데이터 전처리")
+    parser.add_argument(
+        "--data-dir", default=str(script_dir / "data"), help="원본 데이터 디렉토리"
+    )
+    parser.add_argument(
+        "--output",
+        default=str(script_dir / "processed" / "chat_data_cleaned_v2.jsonl"),
+        help="출력 파일 경로 (.jsonl: 스트리밍 저장, .json: 단일 배열)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="워커 프로세스 수 (기본: CPU 코어 수, 1: 순차 처리)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """메인 실행 함수"""
+    args = parse_args(argv)
+    data_dir = Path(args.data_dir)
+    output_path = Path(args.output)
+    workers = args.workers or os.cpu_count() or 1
 
     print("=" * 60)
     print("채팅 데이터 전처리 시작")
     print("=" * 60)
     print(f"\n데이터 디렉토리: {data_dir}")
     print(f"출력 파일: {output_path}")
+    print(f"워커 수: {workers}")
     print(f"\n제외할 카테고리: {sorted(EXCLUDED_CATEGORIES)}")
     print()
 
-    # 데이터 처리
-    conversations, stats = process_all_data(str(data_dir))
+    # 데이터 처리 및 저장 (JSONL은 스트리밍, JSON은 메모리에 모아서 저장)
+    stats = _new_stats()
+    conversations = iter_processed_conversations(
+        str(data_dir), stats=stats, workers=workers
+    )
+    if output_path.suffix == ".jsonl":
+        saved_count = save_processed_jsonl(conversations, str(output_path))
+    else:
+        conversations = list(conversations)
+        saved_count = len(conversations)
+        if conversations:
+            save_processed_data(conversations, str(output_path))
 
     # 통계 출력
     print("\n" + "=" * 60)
@@ -282,9 +444,7 @@ def main():
         print(f"    - 처리됨: {pstats['processed']}")
         print(f"    - 대화 수: {pstats['conversations']}")
 
-    # 결과 저장
-    if conversations:
-        save_processed_data(conversations, str(output_path))
+    if saved_count:
         print(f"\n처리 완료! {output_path}에 저장됨")
     else:
         print("\n처리된 대화가 없습니다.")
@@ -0,0 +1,375 @@
+"""
+호감도 궤적 분석 모듈
+
+affinity_logs를 키셋 페이지로 한꺼번에 읽어 (세션, 상대, 턴)마다 한 행인 NumPy 배열로 보관하고,
+정렬 한 번과 bincount/행렬곱 집계로 다음 지표를 함께 계산합니다.
+
+- 점수 곡선: 상대 타입별, 턴별 current_score 평균/표준편차와 표본 수
+- 이탈 턴 분포: 대화(세션 x 상대)마다 마지막으로 기록된 턴의 분포
+- 게임 오버 비율: 마지막 점수가 0 이하로 끝난 대화의 비율
+- 트리거 효과 크기: 사용자 메시지 특징(질문, 웃음, 칭찬 등)이 있는 턴과 없는 턴의
+  score_change 차이 (Cohen's d)
+
+불러온 로그는 AFFINITY_ANALYTICS_TTL 동안 재사용하고, 기간(since, until)별 결과도 따로 캐시합니다.
+
+실행: python -m services.affinity_analytics [--days 7]
+"""
+
+import argparse
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import AFFINITY_ANALYTICS_TTL, EXPORT_PAGE_SIZE
+from services.cache import MISSING, TTLCache
+
+PERSONAS = ("EMOTIONAL", "LOGICAL", "TOUGH")
+_PERSONA_CODES = {persona: code for code, persona in enumerate(PERSONAS)}
+
+# 사용자 메시지 특징 (이름, 정규식) - 효과 크기를 계산할 트리거
+TRIGGER_FEATURES: Tuple[Tuple[str, str], ...] = (
+    ("question", r"\?|까요|나요|어때|뭐 ?해"),
+    ("laughter", r"ㅋ|ㅎㅎ"),
+    ("emoji", r"[\U0001F300-\U0001FAFF☀-➿]"),
+    ("compliment", r"예쁘|멋지|멋있|귀엽|잘생|최고"),
+    ("apology", r"미안|죄송"),
+    ("self_disclosure", r"저는|제가|나는|내가"),
+    ("long", r"^.{40,}$"),
+    ("short", r"^.{0,5}$"),
+)
+_TRIGGER_PATTERNS = [re.compile(pattern, re.DOTALL) for _, pattern in TRIGGER_FEATURES]
+TRIGGER_NAMES = tuple(name for name, _ in TRIGGER_FEATURES)
+
+_SELECT_COLUMNS = "log_id,session_id,partner_type,turn_index,score_change,current_score,trigger_message,created_at"
+
+
+def _epoch(value) -> float:
+    """ISO 8601 문자열을 epoch 초로 (없거나 해석할 수 없으면 nan)"""
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def trigger_matrix(messages: List[Optional[str]]) -> np.ndarray:
+    """메시지마다 TRIGGER_FEATURES 해당 여부를 (len(messages), 특징 수) bool 배열로 만듭니다."""
+    matrix = np.zeros((len(messages), len(_TRIGGER_PATTERNS)), dtype=bool)
+    seen: Dict[str, np.ndarray] = {}  # 같은 메시지(인사말 등)는 한 번만 검사
+    for i, message in enumerate(messages):
+        if not message:
+            continue
+        row = seen.get(message)
+        if row is None:
+            row = seen[message] = np.array([pattern.search(message) is not None for pattern in _TRIGGER_PATTERNS])
+        matrix[i] = row
+    return matrix
+
+
+@dataclass(frozen=True)
+class AffinityLogs:
+    """
+    affinity_logs 열 배열 (행 하나 = 세션 x 상대 x 턴)
+
+    Attributes:
+        session: 세션 코드 (int32, 세션 ID를 불러온 순서대로 번호 매김)
+        partner: 상대 타입 코드 (int8, PERSONAS 인덱스, 알 수 없는 타입은 -1)
+        turn: turn_index (int16)
+        score_change: 호감도 변화량 (int16)
+        current_score: 변화 후 점수 (int16)
+        created_at: 기록 시각 epoch 초 (float64, 없으면 nan)
+        triggers: 트리거 특징 (bool, 행 수 x len(TRIGGER_FEATURES))
+    """
+
+    session: np.ndarray
+    partner: np.ndarray
+    turn: np.ndarray
+    score_change: np.ndarray
+    current_score: np.ndarray
+    created_at: np.ndarray
+    triggers: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.session)
+
+    @classmethod
+    def empty(cls) -> "AffinityLogs":
+        return cls.from_rows([], {})
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], session_codes: Dict[str, int]) -> "AffinityLogs":
+        """
+        DB 행 리스트를 열 배열로 바꿉니다.
+
+        Args:
+            session_codes: 세션 ID → 코드 (여러 페이지에 걸쳐 같은 dict를 넘겨야 코드가 이어짐)
+        """
+        session = np.fromiter(
+            (session_codes.setdefault(row.get("session_id"), len(session_codes)) for row in rows),
+            dtype=np.int32,
+            count=len(rows),
+        )
+        return cls(
+            session=session,
+            partner=np.fromiter((_PERSONA_CODES.get(row.get("partner_type"), -1) for row in rows), np.int8, len(rows)),
+            turn=np.fromiter((row.get("turn_index") or 0 for row in rows), np.int16, len(rows)),
+            score_change=np.fromiter((row.get("score_change") or 0 for row in rows), np.int16, len(rows)),
+            current_score=np.fromiter((row.get("current_score") or 0 for row in rows), np.int16, len(rows)),
+            created_at=np.fromiter((_epoch(row.get("created_at")) for row in rows), np.float64, len(rows)),
+            triggers=trigger_matrix([row.get("trigger_message") for row in rows]),
+        )
+
+    @classmethod
+    def concatenate(cls, chunks: List["AffinityLogs"]) -> "AffinityLogs":
+        if not chunks:
+            return cls.empty()
+        if len(chunks) == 1:
+            return chunks[0]
+        return cls(
+            *(np.concatenate([getattr(chunk, name) for chunk in chunks]) for name in cls.__dataclass_fields__)
+        )
+
+    def select(self, mask: np.ndarray) -> "AffinityLogs":
+        return AffinityLogs(*(getattr(self, name)[mask] for name in self.__dataclass_fields__))
+
+    def window(self, since: Optional[float] = None, until: Optional[float] = None) -> "AffinityLogs":
+        """[since, until) 기간의 행만 남깁니다. 기간을 주면 기록 시각이 없는 행은 제외됩니다."""
+        if since is None and until is None:
+            return self
+        mask = np.ones(len(self), dtype=bool)
+        if since is not None:
+            mask &= self.created_at >= since
+        if until is not None:
+            mask &= self.created_at < until
+        return self.select(mask)
+
+
+def load_affinity_logs(page_size: int = EXPORT_PAGE_SIZE) -> AffinityLogs:
+    """affinity_logs 전체를 키셋 페이지로 읽습니다. 페이지마다 배열로 바꾸므로 dict 행은 한 페이지만 메모리에 남습니다."""
+    from services.data_export import iter_pages
+
+    session_codes: Dict[str, int] = {}
+    chunks = [
+        AffinityLogs.from_rows(page, session_codes)
+        for page, _ in iter_pages("affinity_logs", "log_id", page_size=page_size, columns=_SELECT_COLUMNS)
+    ]
+    return AffinityLogs.concatenate(chunks)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+def _effect_sizes(change: np.ndarray, triggers: np.ndarray) -> Dict[str, np.ndarray]:
+    """특징마다 있는 턴 vs 없는 턴의 score_change 평균 차이와 Cohen's d (행렬곱 한 번씩으로 전체 특징 계산)"""
+    x = change.astype(np.float64)
+    features = triggers.astype(np.float64)
+    n = len(x)
+    n1 = features.sum(axis=0)
+    s1 = x @ features
+    q1 = (x * x) @ features
+    n0, s0, q0 = n - n1, x.sum() - s1, (x * x).sum() - q1
+    mean1, mean0 = _safe_divide(s1, n1), _safe_divide(s0, n0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 합동 분산: (Σx² - n·평균²)을 두 그룹에서 더해 자유도 n-2로 나눔
+        ss = (q1 - n1 * np.nan_to_num(mean1) ** 2) + (q0 - n0 * np.nan_to_num(mean0) ** 2)
+        pooled = np.sqrt(np.maximum(ss, 0) / (n - 2))
+        d = np.where((n1 > 1) & (n0 > 1) & (pooled > 0), (mean1 - mean0) / pooled, np.nan)
+    return {"count": n1.astype(np.int64), "mean_with": mean1, "mean_without": mean0, "effect_size": d}
+
+
+def compute_affinity_report(logs: AffinityLogs) -> Dict:
+    """
+    점수 곡선, 이탈 턴 분포, 게임 오버 비율, 트리거 효과 크기를 계산합니다.
+    (상대, 세션, 턴) 순서로 한 번 정렬한 뒤 대화 경계를 찾아 모든 지표를 bincount로 모읍니다.
+
+    Returns:
+        dict: personas, turns와 지표별 (상대 타입 수 x 턴 수) 배열. 트리거 효과 크기는
+              (전체 + 상대 타입별) x 특징 수 배열입니다.
+    """
+    started = time.perf_counter()
+    logs = logs.select(logs.partner >= 0) if len(logs) and logs.partner.min() < 0 else logs
+    personas = len(PERSONAS)
+    max_turn = int(logs.turn.max()) if len(logs) else 0
+    report = {
+        "personas": PERSONAS,
+        "turns": list(range(1, max_turn + 1)),
+        "trigger_features": TRIGGER_NAMES,
+        "rows": len(logs),
+        "sessions": int(len(np.unique(logs.session))) if len(logs) else 0,
+    }
+
+    order = np.lexsort((logs.turn, logs.session, logs.partner))
+    partner = logs.partner[order].astype(np.int64)
+    session = logs.session[order]
+    turn = np.clip(logs.turn[order], 1, max(max_turn, 1)).astype(np.int64)
+    score = logs.current_score[order].astype(np.float64)
+
+    # 대화(세션 x 상대) 경계: 정렬된 상태에서 (상대, 세션)이 바뀌는 위치
+    boundary = np.ones(len(order), dtype=bool)
+    boundary[1:] = (partner[1:] != partner[:-1]) | (session[1:] != session[:-1])
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], len(order))[: len(starts)] - 1
+    conversation_partner = partner[starts]
+    last_turn = turn[ends]
+    game_over = score[ends] <= 0
+
+    # 점수 곡선: (상대, 턴) 칸마다 개수/합/제곱합
+    width = max(max_turn, 1)
+    cell = partner * width + (turn - 1)
+    counts = np.bincount(cell, minlength=personas * width).reshape(personas, width)
+    sums = np.bincount(cell, weights=score, minlength=personas * width).reshape(personas, width)
+    squares = np.bincount(cell, weights=score * score, minlength=personas * width).reshape(personas, width)
+    mean = _safe_divide(sums, counts)
+    report["score_curve"] = {
+        "count": counts[:, :max_turn],
+        "mean": mean[:, :max_turn],
+        "std": np.sqrt(np.maximum(_safe_divide(squares, counts) - mean * mean, 0))[:, :max_turn],
+    }
+
+    # 이탈 턴 분포와 게임 오버 비율 (대화 단위)
+    conversations = np.bincount(conversation_partner, minlength=personas)
+    report["conversations"] = conversations
+    report["drop_off"] = np.bincount(
+        conversation_partner * width + (last_turn - 1), minlength=personas * width
+    ).reshape(personas, width)[:, :max_turn]
+    report["game_over_rate"] = _safe_divide(
+        np.bincount(conversation_partner, weights=game_over, minlength=personas), conversations
+    )
+
+    # 트리거 효과 크기: 전체 + 상대 타입별
+    change = logs.score_change[order]
+    triggers = logs.triggers[order]
+    groups = [_effect_sizes(change, triggers)]
+    if len(order):
+        # 정렬되어 있으므로 상대 타입별 구간은 연속
+        bounds = np.searchsorted(partner, np.arange(personas + 1))
+        groups += [
+            _effect_sizes(change[bounds[p] : bounds[p + 1]], triggers[bounds[p] : bounds[p + 1]])
+            for p in range(personas)
+        ]
+    else:
+        groups += [groups[0]] * personas
+    report["trigger_effects"] = {key: np.vstack([group[key] for group in groups]) for key in groups[0]}
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+class AffinityAnalytics:
+    """
+    불러온 로그와 기간별 결과를 캐시하는 분석 서비스
+
+    Args:
+        loader: AffinityLogs를 반환하는 함수 (기본: load_affinity_logs)
+        ttl: 캐시 유지 시간(초)
+    """
+
+    def __init__(self, loader=load_affinity_logs, ttl: float = AFFINITY_ANALYTICS_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self._logs = TTLCache(maxsize=1, ttl=ttl)
+        self._reports = TTLCache(maxsize=32, ttl=ttl)
+        self._load_lock = threading.Lock()
+        self._stats = {"loads": 0, "load_seconds": 0.0, "computes": 0, "compute_seconds": 0.0}
+
+    def logs(self) -> AffinityLogs:
+        logs = self._logs.get("all")
+        if logs is not MISSING:
+            return logs
+        with self._load_lock:  # 동시에 여러 화면이 열어도 DB에서는 한 번만 읽음
+            logs = self._logs.get("all")
+            if logs is MISSING:
+                started = time.perf_counter()
+                logs = self.loader()
+                self._stats["loads"] += 1
+                self._stats["load_seconds"] += time.perf_counter() - started
+                self._logs.set("all", logs)
+                self._reports.clear()
+        return logs
+
+    def window_bounds(self, days: Optional[float], now: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+        """최근 days일 기간. 시작 시각을 ttl 단위로 내림해서 같은 기간 요청이 같은 캐시 키를 쓰도록 합니다."""
+        if days is None:
+            return None, None
+        now = time.time() if now is None else now
+        bucket = max(self.ttl, 1)
+        return math.floor((now - days * 86400) / bucket) * bucket, None
+
+    def report(self, since: Optional[float] = None, until: Optional[float] = None) -> Dict:
+        """[since, until) 기간(epoch 초, None이면 제한 없음)의 리포트를 반환합니다."""
+        logs = self.logs()
+        key = (since, until)
+        report = self._reports.get(key)
+        if report is MISSING:
+            report = compute_affinity_report(logs.window(since, until))
+            report["window"] = {"since": since, "until": until}
+            self._stats["computes"] += 1
+            self._stats["compute_seconds"] += report["seconds"]
+            self._reports.set(key, report)
+        return report
+
+    def invalidate(self) -> None:
+        """다음 요청에서 로그를 다시 읽도록 캐시를 비웁니다."""
+        self._logs.clear()
+        self._reports.clear()
+
+    def get_stats(self) -> Dict:
+        return {**self._stats, "report_cache": self._reports.stats()}
+
+
+_analytics = AffinityAnalytics()
+
+
+def get_affinity_report(days: Optional[float] = None) -> Dict:
+    """최근 days일(None이면 전체) 호감도 궤적 리포트"""
+    return _analytics.report(*_analytics.window_bounds(days))
+
+
+def refresh_affinity_logs() -> None:
+    _analytics.invalidate()
+
+
+def get_affinity_analytics_stats() -> Dict:
+    return _analytics.get_stats()
+
+
+def format_report(report: Dict) -> str:
+    """CLI용 텍스트 요약"""
+    lines = [f"행 {report['rows']}개, 세션 {report['sessions']}개 (계산 {report['seconds'] * 1000:.1f}ms)"]
+    for p, persona in enumerate(report["personas"]):
+        conversations = int(report["conversations"][p])
+        if not conversations:
+            continue
+        curve = " ".join(f"{value:5.1f}" for value in report["score_curve"]["mean"][p])
+        lines.append(
+            f"[{persona}] 대화 {conversations}개, 게임 오버 {report['game_over_rate'][p]:.1%}\n"
+            f"  턴별 평균 점수: {curve}\n"
+            f"  마지막 턴 분포: {' '.join(str(int(c)) for c in report['drop_off'][p])}"
+        )
+    effects = report["trigger_effects"]
+    lines.append("트리거 효과 크기 (전체, Cohen's d / 해당 턴 수):")
+    for f, name in enumerate(report["trigger_features"]):
+        lines.append(f"  {name:<16}{effects['effect_size'][0][f]:+7.2f}  ({int(effects['count'][0][f])})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="호감도 궤적 분석")
+    parser.add_argument("--days", type=float, default=None, help="최근 N일만 분석 (기본: 전체)")
+    args = parser.parse_args(argv)
+
+    print(format_report(get_affinity_report(args.days)))
+    stats = get_affinity_analytics_stats()
+    print(f"\n불러오기 {stats['load_seconds']:.1f}s, 계산 {stats['compute_seconds'] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+대화 분석 작업 큐 모듈
+
+analyze_conversation은 세 라운드 전체를 한 번에 분석하는 무거운 호출이라,
+결과 화면에서 바로 실행하면 사용자가 스피너 앞에서 기다려야 합니다.
+마지막 라운드가 끝나는 즉시 분석 작업을 큐에 넣고, 사용자가 최종 선택을 하는 동안
+제한된 워커 풀에서 분석(실패 시 재시도)과 저장(save_analysis_result)을 진행합니다.
+결과 화면은 완료된 결과를 가져가기만 합니다.
+
+각 라운드가 끝날 때마다 그 라운드의 요약 카드(digest_round)를 미리 만들어 두므로,
+최종 분석은 세 라운드의 원문 대신 짧은 요약 카드 세 개만 보내면 됩니다.
+
+실행 (과거 chat_logs 일괄 재분석): python -m services.analysis_jobs --limit 100 --workers 2
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from config.settings import ANALYSIS_MAX_RETRIES, ANALYSIS_MAX_WORKERS, ROUND_DIGEST_WAIT_TIMEOUT
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# 라운드 순서 (chat_logs에서 history를 복원할 때 사용)
+ROUND_ORDER = {"EMOTIONAL": 1, "LOGICAL": 2, "TOUGH": 3}
+
+
+def history_fingerprint(history: List[Dict]) -> str:
+    """같은 대화 기록을 중복 분석하지 않도록 history의 해시를 계산합니다."""
+    payload = json.dumps(history, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisJob:
+    """분석 작업 하나의 상태와 결과"""
+
+    def __init__(self, session_id, history, fingerprint):
+        self.job_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.history = history
+        self.fingerprint = fingerprint
+        self.status = QUEUED
+        self.attempts = 0
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.persisted = False
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._done_event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done_event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """작업이 끝날 때까지 기다립니다. 시간 안에 끝났으면 True."""
+        return self._done_event.wait(timeout)
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self._done_event.set()
+
+
+class AnalysisJobQueue:
+    """
+    제한된 워커 풀에서 분석 작업을 실행하는 큐
+
+    같은 (session_id, history) 작업은 한 번만 실행되며, 분석이 {"error": ...}를 반환하거나
+    예외가 나면 지수 백오프로 재시도합니다. 성공한 결과는 persist 함수로 저장합니다.
+    """
+
+    def __init__(
+        self,
+        analyze: Callable[[List[Dict]], Dict],
+        persist: Optional[Callable[[str, Dict], object]] = None,
+        max_workers: int = ANALYSIS_MAX_WORKERS,
+        max_retries: int = ANALYSIS_MAX_RETRIES,
+        base_backoff: float = 1.0,
+        max_finished_jobs: int = 1000,
+    ):
+        """
+        Args:
+            analyze: history를 받아 분석 결과 dict를 반환하는 함수
+            persist: (session_id, result)를 저장하는 함수, 실패 시 falsy 반환 (None이면 저장 안 함)
+            max_workers: 동시에 실행할 최대 분석 수
+            max_retries: 작업당 최대 재시도 횟수
+            base_backoff: 첫 재시도 대기 시간(초), 이후 2배씩 증가
+            max_finished_jobs: 메모리에 보관할 완료 작업 수
+        """
+        self.analyze = analyze
+        self.persist = persist
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_finished_jobs = max_finished_jobs
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._by_key: Dict[tuple, str] = {}
+        self._stats = {"submitted": 0, "deduplicated": 0, "succeeded": 0, "failed": 0, "retries": 0, "persist_failures": 0}
+
+    def submit(self, session_id, history: List[Dict]) -> str:
+        """
+        분석 작업을 큐에 넣고 job_id를 반환합니다.
+        같은 세션의 같은 대화 기록이 이미 큐에 있거나 끝났으면 그 작업의 job_id를 반환합니다.
+        """
+        fingerprint = history_fingerprint(history)
+        key = (session_id, fingerprint)
+        with self._lock:
+            existing = self._by_key.get(key)
+            if existing in self._jobs and self._jobs[existing].status != FAILED:
+                self._stats["deduplicated"] += 1
+                return existing
+
+            job = AnalysisJob(session_id, history, fingerprint)
+            self._jobs[job.job_id] = job
+            self._by_key[key] = job.job_id
+            self._stats["submitted"] += 1
+            self._evict_finished()
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis-job")
+            executor = self._executor
+
+        executor.submit(self._run, job)
+        return job.job_id
+
+    def get(self, job_id) -> Optional[AnalysisJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout: Optional[float] = None) -> Optional[AnalysisJob]:
+        """작업이 끝날 때까지 기다렸다가 작업을 반환합니다. 없는 job_id면 None."""
+        job = self.get(job_id)
+        if job is not None:
+            job.wait(timeout)
+        return job
+
+    def get_stats(self) -> Dict:
+        """작업 수, 상태별 개수, 재시도/저장 실패 횟수를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["status"] = {
+                status: sum(1 for job in self._jobs.values() if job.status == status)
+                for status in (QUEUED, RUNNING, DONE, FAILED)
+            }
+        return stats
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - self.max_finished_jobs)]:
+            job = self._jobs.pop(job_id)
+            self._by_key.pop((job.session_id, job.fingerprint), None)
+
+    def _record(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def _run(self, job: AnalysisJob):
+        job.status = RUNNING
+        error = None
+        for attempt in range(self.max_retries + 1):
+            job.attempts = attempt + 1
+            if attempt:
+                self._record(retries=1)
+                # 지터를 더해 여러 작업의 재시도가 한꺼번에 몰리지 않도록 함
+                time.sleep(self.base_backoff * (2 ** (attempt - 1)) * (1 + random.random()))
+            try:
+                result = self.analyze(job.history)
+            except Exception as e:
+                error = str(e)
+                continue
+            if result is not None and not (isinstance(result, dict) and "error" in result):
+                break
+            error = result.get("error") if isinstance(result, dict) else "잘못된 분석 결과"
+        else:
+            print(f"[analysis-job] {job.job_id} 실패 ({job.attempts}회 시도): {error}")
+            self._record(failed=1)
+            job._finish(FAILED, result={"error": error}, error=error)
+            return
+
+        if self.persist and job.session_id:
+            try:
+                job.persisted = bool(self.persist(job.session_id, result))
+            except Exception as e:
+                print(f"[analysis-job] {job.job_id} 저장 실패: {e}")
+            if not job.persisted:
+                self._record(persist_failures=1)
+
+        self._record(succeeded=1)
+        job._finish(DONE, result=result)
+
+
+def _digest(history):
+    from services.llm_service import digest_round
+
+    return digest_round(history[0])
+
+
+# 라운드 요약 카드 큐 (요약은 대화 내용만으로 결정되므로 session_id 없이 내용 해시로 중복 제거)
+round_digests = AnalysisJobQueue(_digest, persist=None)
+
+
+def submit_round_digest(entry):
+    """끝난 라운드의 요약 카드 생성을 백그라운드에서 시작하고 job_id를 반환합니다."""
+    return round_digests.submit(None, [entry])
+
+
+def _collect_digests(history):
+    """
+    라운드별 요약 카드를 모읍니다. 라운드 종료 시 시작된 작업은 결과를 재사용하고,
+    아직 없는 라운드는 지금 병렬로 만듭니다. 실패하거나 시간 안에 끝나지 않은 라운드는 None (원문 사용).
+    """
+    job_ids = [submit_round_digest(entry) for entry in history]
+    deadline = time.monotonic() + ROUND_DIGEST_WAIT_TIMEOUT
+    digests = []
+    for job_id in job_ids:
+        job = round_digests.wait(job_id, timeout=max(0.0, deadline - time.monotonic()))
+        digests.append(job.result if job is not None and job.status == DONE else None)
+    return digests
+
+
+def _analyze(history):
+    from services.llm_service import analyze_conversation
+
+    return analyze_conversation(history, digests=_collect_digests(history))
+
+
+def _analyze_transcripts(history):
+    from services.llm_service import analyze_conversation
+
+    return analyze_conversation(history)
+
+
+def _persist(session_id, analysis):
+    from services.db_service import save_analysis_result
+
+    return save_analysis_result(session_id, analysis)
+
+
+def _persist_replace(session_id, analysis):
+    from services.db_service import replace_analysis_result
+
+    return replace_analysis_result(session_id, analysis)
+
+
+# 앱 전체에서 공유하는 분석 작업 큐 (워커 스레드는 첫 작업 제출 시 생성)
+analysis_jobs = AnalysisJobQueue(_analyze, persist=_persist)
+
+
+def submit_analysis(session_id, history):
+    """대화 기록 분석을 백그라운드에서 시작하고 job_id를 반환합니다."""
+    return analysis_jobs.submit(session_id, history)
+
+
+def wait_for_analysis(job_id, timeout=None):
+    """
+    분석 작업이 끝날 때까지 기다립니다.
+
+    Returns:
+        AnalysisJob | None: 작업 (시간 초과 시 job.done이 False), 없는 job_id면 None
+    """
+    return analysis_jobs.wait(job_id, timeout)
+
+
+def get_analysis_job_stats():
+    """분석 작업 큐의 상태별 작업 수와 재시도 통계를 반환합니다."""
+    return analysis_jobs.get_stats()
+
+
+# ---------------------------------------------------------
+# 과거 chat_logs 일괄 재분석 (backfill)
+# ---------------------------------------------------------
+def load_session_histories(
+    limit_sessions: Optional[int] = None, page_size: int = 100, skip_analyzed: bool = False
+) -> Dict[str, List[Dict]]:
+    """
+    game_sessions를 페이지 단위로 읽고, 페이지마다 chat_logs(와 analysis_results)를 session_id in 조건으로
+    한 번씩 조회해 세션별 history([{"round", "persona", "messages", ...}])로 묶습니다.
+    limit_sessions개를 모으면 더 읽지 않으므로 --limit이 작으면 테이블 전체를 읽지 않습니다.
+    chat_logs에는 최종 호감도가 없으므로 final_score는 "N/A"입니다.
+
+    Args:
+        limit_sessions: 모을 최대 세션 수 (None이면 전체)
+        page_size: game_sessions 페이지 크기 (session_id 목록이 조회 URL에 들어가므로 수백 개 이내)
+        skip_analyzed: analysis_results가 이미 있는 세션은 건너뜀
+    """
+    from services.db_service import fetch_rows_for_sessions, fetch_table_page
+
+    histories: Dict[str, List[Dict]] = {}
+    after_session_id = None
+    while limit_sessions is None or len(histories) < limit_sessions:
+        page = fetch_table_page("game_sessions", after_key=after_session_id, limit=page_size, columns="session_id")
+        if not page:
+            break
+        after_session_id = page[-1]["session_id"]
+
+        session_ids = [row["session_id"] for row in page]
+        if skip_analyzed:
+            analyzed = {
+                row["session_id"]
+                for row in fetch_rows_for_sessions("analysis_results", session_ids, columns="session_id")
+            }
+            session_ids = [session_id for session_id in session_ids if session_id not in analyzed]
+        if limit_sessions is not None and len(session_ids) > limit_sessions - len(histories):
+            # 남은 수만큼만 chat_logs를 조회하고, 다음 페이지는 그 다음 세션부터 이어서 읽음
+            session_ids = session_ids[: limit_sessions - len(histories)]
+            after_session_id = session_ids[-1]
+
+        logs_by_session: Dict[str, List[Dict]] = {}
+        for log in fetch_rows_for_sessions("chat_logs", session_ids, columns="session_id,partner_type,chat_history"):
+            logs_by_session.setdefault(log["session_id"], []).append(log)
+
+        for session_id in session_ids:
+            logs = logs_by_session.get(session_id)
+            if not logs:
+                continue
+            entries = []
+            for log in logs:
+                partner_type = log.get("partner_type") or "UNKNOWN"
+                entries.append(
+                    {
+                        "round": ROUND_ORDER.get(partner_type, "?"),
+                        "persona": partner_type,
+                        "messages": log.get("chat_history") or [],
+                        "final_score": "N/A",
+                    }
+                )
+            entries.sort(key=lambda entry: ROUND_ORDER.get(entry["persona"], len(ROUND_ORDER) + 1))
+            histories[session_id] = entries
+    return histories
+
+
+def backfill(
+    limit_sessions: Optional[int] = None,
+    workers: int = ANALYSIS_MAX_WORKERS,
+    persist: bool = True,
+    force: bool = False,
+) -> Dict:
+    """
+    과거 세션들을 현재 분석 프롬프트로 다시 분석합니다.
+    요약 카드로 나눠 호출할 이유(화면 대기 시간)가 없으므로 세션당 원문 분석 한 번만 호출합니다.
+    이미 분석 결과가 있는 세션은 건너뛰고, force이면 다시 분석해 기존 행을 덮어씁니다.
+    """
+    persist_fn = _persist_replace if force else _persist
+    queue = AnalysisJobQueue(_analyze_transcripts, persist=persist_fn if persist else None, max_workers=workers)
+    histories = load_session_histories(limit_sessions, skip_analyzed=not force)
+    print(f"재분석 대상 세션: {len(histories)}개 (workers={workers})")
+
+    job_ids = [queue.submit(session_id, history) for session_id, history in histories.items()]
+    for i, job_id in enumerate(job_ids, 1):
+        job = queue.wait(job_id)
+        status = "✅" if job.status == DONE else f"❌ {job.error}"
+        print(f"[{i}/{len(job_ids)}] session={job.session_id} {status}")
+
+    stats = queue.get_stats()
+    print(f"\n완료: {stats['succeeded']}, 실패: {stats['failed']}, 재시도: {stats['retries']}, 저장 실패: {stats['persist_failures']}")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="과거 chat_logs 일괄 재분석")
+    parser.add_argument("--limit", type=int, default=None, help="재분석할 최대 세션 수")
+    parser.add_argument("--workers", type=int, default=ANALYSIS_MAX_WORKERS, help="동시 분석 수")
+    parser.add_argument("--dry-run", action="store_true", help="분석만 하고 analysis_results에 저장하지 않음")
+    parser.add_argument("--force", action="store_true", help="분석 결과가 있는 세션도 다시 분석해 기존 행을 덮어씀")
+    args = parser.parse_args(argv)
+
+    backfill(limit_sessions=args.limit, workers=args.workers, persist=not args.dry_run, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
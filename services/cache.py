@@ -0,0 +1,76 @@
+"""
+메모리 캐시 유틸리티
+
+크기 제한(LRU)과 만료 시간(TTL)을 함께 지원하는 스레드 안전 캐시를 제공합니다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# 캐시에 값이 없음을 나타내는 센티널 (None도 유효한 캐시 값이므로 구분)
+MISSING = object()
+
+
+class TTLCache:
+    """LRU + TTL 캐시"""
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = None):
+        """
+        Args:
+            maxsize: 최대 항목 수 (초과 시 가장 오래 사용하지 않은 항목부터 제거)
+            ttl: 항목 유효 시간(초), None이면 만료 없음
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """키에 해당하는 값을 반환합니다. 없거나 만료되었으면 default를 반환합니다."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+            self._misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """값을 저장합니다."""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """모든 항목을 삭제합니다. (통계는 유지)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        """적중/실패 횟수와 적중률을 반환합니다."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
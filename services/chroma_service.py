@@ -5,15 +5,100 @@ ChromaDB 벡터 데이터베이스 서비스 모듈
 유사 대화를 검색하는 기능을 제공합니다.
 """
 
+import argparse
+import hashlib
 import json
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from chromadb.utils import embedding_functions
 
+from config.settings import CHROMA_SYNC_MAX_DELETE_RATIO
+from services.embedding_store import EmbeddingStore
+from services.tracing import span
+
+
+def build_record(conv: Dict) -> Optional[Tuple[str, str, Dict]]:
+    """
+    대화 하나를 ChromaDB 레코드 (id, document, metadata)로 변환합니다.
+
+    metadata의 content_hash는 대화 본문과 메타데이터로 계산되어,
+    증분 인덱싱 시 변경 여부를 판단하는 데 사용됩니다.
+
+    Returns:
+        (id, document, metadata) 튜플, 대화 내용이 없으면 None
+    """
+    dialogue = conv.get("dialogue", "")
+    if not dialogue:
+        return None
+
+    # 메타데이터 (ChromaDB는 중첩 객체를 지원하지 않으므로 평탄화)
+    metadata = {
+        "platform": conv.get("platform", ""),
+        "subject": conv.get("subject", ""),
+        "speaker_type": conv.get("speaker_type", ""),
+        "source_file": conv.get("source_file", ""),
+        "turn_count": len(conv.get("turns", [])),
+    }
+
+    hash_source = json.dumps([dialogue, metadata], ensure_ascii=False, sort_keys=True)
+    content_hash = hashlib.sha1(hash_source.encode("utf-8")).hexdigest()
+    metadata["content_hash"] = content_hash
+
+    conv_id = conv.get("conversation_id") or f"conv_{content_hash[:16]}"
+    return conv_id, dialogue, metadata
+
+
+# 임베딩 워커 프로세스에 로드된 모델 (프로세스마다 한 번만 로드)
+_worker_model = None
+
+
+def _init_embedding_worker(model_name: str, num_threads: int) -> None:
+    """임베딩 워커 프로세스 초기화: 모델을 로드하고 스레드 수를 제한합니다."""
+    global _worker_model
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # 프로세스 수 x 스레드 수가 코어 수를 넘지 않도록 제한
+    torch.set_num_threads(num_threads)
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _embed_documents(documents: List[str], encode_batch_size: int) -> Tuple[List[List[float]], float]:
+    """
+    워커 프로세스에서 문서 묶음을 임베딩합니다.
+    SentenceTransformerEmbeddingFunction과 같은 설정(정규화 없음)으로 인코딩합니다.
+
+    Returns:
+        (임베딩 리스트, 인코딩 소요 시간(초))
+    """
+    started = time.perf_counter()
+    embeddings = _worker_model.encode(
+        documents,
+        batch_size=encode_batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=False,
+    )
+    return embeddings.tolist(), time.perf_counter() - started
+
+
+def _length_bucketed_batches(
+    records: List[Tuple[str, str, Dict]], batch_size: int
+) -> List[List[Tuple[str, str, Dict]]]:
+    """
+    문서 길이순으로 정렬한 뒤 배치로 나눕니다.
+    비슷한 길이끼리 묶이므로 인코딩 시 패딩 낭비가 줄어듭니다.
+    """
+    ordered = sorted(records, key=lambda record: len(record[1]))
+    return [ordered[i : i + batch_size] for i in range(0, len(ordered), batch_size)]
+
 
 class ChromaService:
     """ChromaDB 벡터 데이터베이스 서비스"""
@@ -23,6 +108,7 @@ class ChromaService:
         persist_dir: Optional[str] = None,
         collection_name: str = "chat_conversations",
         embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        embedding_cache_dir: Optional[str] = None,
     ):
         """
         ChromaDB 서비스 초기화
@@ -31,13 +117,23 @@ class ChromaService:
             persist_dir: ChromaDB 저장 경로 (None이면 기본 경로 사용)
             collection_name: 컬렉션 이름
             embedding_model: 사용할 임베딩 모델
+            embedding_cache_dir: 문서 임베딩 영구 캐시 경로 (None이면 persist_dir 옆 embedding_cache)
         """
         # 기본 저장 경로 설정
         if persist_dir is None:
             persist_dir = str(Path(__file__).parent.parent / "chroma_db")
+        if embedding_cache_dir is None:
+            embedding_cache_dir = str(Path(persist_dir).parent / "embedding_cache")
 
         self.persist_dir = persist_dir
         self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.embedding_cache_dir = embedding_cache_dir
+        self._embedding_store: Optional[EmbeddingStore] = None
+        # 마지막 병렬 임베딩 파이프라인의 단계별 처리량
+        self.last_ingest_stats: Optional[Dict] = None
+        # 컬렉션 내용이 바뀔 때마다 증가 (검색 캐시 무효화용)
+        self.version = 0
 
         # ChromaDB 클라이언트 초기화
         self.client = chromadb.PersistentClient(
@@ -59,8 +155,148 @@ class ChromaService:
         print(f"ChromaDB initialized at {persist_dir}")
         print(f"Collection '{collection_name}' has {self.collection.count()} documents")
 
+    @property
+    def embedding_store(self) -> EmbeddingStore:
+        """문서 임베딩 영구 캐시 (인덱싱할 때 처음 열림)"""
+        if self._embedding_store is None:
+            self._embedding_store = EmbeddingStore(
+                self.embedding_cache_dir, self.embedding_model
+            )
+        return self._embedding_store
+
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """
+        문서 임베딩을 계산합니다. 영구 캐시에 있는 문서는 다시 인코딩하지 않습니다.
+
+        Args:
+            documents: 문서 텍스트 리스트
+
+        Returns:
+            문서별 임베딩 벡터 리스트
+        """
+        embeddings = self.embedding_store.get_many(documents)
+        missing = [i for i, vector in enumerate(embeddings) if vector is None]
+        if missing:
+            missing_docs = [documents[i] for i in missing]
+            vectors = [[float(x) for x in v] for v in self.embedding_fn(missing_docs)]
+            self.embedding_store.put_many(missing_docs, vectors)
+            for i, vector in zip(missing, vectors):
+                embeddings[i] = vector
+        return embeddings
+
+    def _ingest_parallel(
+        self,
+        records: List[Tuple[str, str, Dict]],
+        write_method: str,
+        embed_workers: int,
+        batch_size: int = 512,
+        encode_batch_size: int = 64,
+    ) -> int:
+        """
+        프로세스 풀에서 임베딩을 미리 계산하여 embeddings=로 ChromaDB에 기록합니다.
+
+        길이순 배치를 워커들에 나눠 인코딩하는 동안 메인 프로세스는 완료된 배치를
+        ChromaDB에 기록하므로 임베딩과 쓰기가 겹쳐서 진행됩니다.
+        영구 캐시에 있는 문서는 워커로 보내지 않습니다.
+
+        Args:
+            records: build_record로 만든 (id, document, metadata) 리스트
+            write_method: "add" 또는 "upsert"
+            embed_workers: 임베딩 워커 프로세스 수
+            batch_size: 워커 하나에 넘길 문서 수
+            encode_batch_size: 워커 내부 encode()의 배치 크기
+
+        Returns:
+            기록된 문서 수
+        """
+        write = getattr(self.collection, write_method)
+        batches = _length_bucketed_batches(records, batch_size)
+        num_threads = max(1, (os.cpu_count() or 1) // embed_workers)
+        # 포크 시 부모의 torch 스레드 상태를 물려받지 않도록 spawn 사용
+        context = multiprocessing.get_context("spawn")
+
+        written = 0
+        embedded = 0
+        embed_seconds = 0.0
+        write_seconds = 0.0
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(
+            max_workers=embed_workers,
+            mp_context=context,
+            initializer=_init_embedding_worker,
+            initargs=(self.embedding_model, num_threads),
+        ) as executor:
+            # 메모리 사용량을 제한하기 위해 워커 수의 2배까지만 미리 제출
+            max_in_flight = embed_workers * 2
+            pending = []
+            next_batch = 0
+
+            while next_batch < len(batches) or pending:
+                while next_batch < len(batches) and len(pending) < max_in_flight:
+                    batch = batches[next_batch]
+                    documents = [r[1] for r in batch]
+                    embeddings = self.embedding_store.get_many(documents)
+                    missing = [i for i, vector in enumerate(embeddings) if vector is None]
+                    future = None
+                    if missing:
+                        future = executor.submit(
+                            _embed_documents,
+                            [documents[i] for i in missing],
+                            encode_batch_size,
+                        )
+                    pending.append((batch, embeddings, missing, future))
+                    next_batch += 1
+
+                batch, embeddings, missing, future = pending.pop(0)
+                if future is not None:
+                    vectors, batch_embed_seconds = future.result()
+                    embed_seconds += batch_embed_seconds
+                    embedded += len(vectors)
+                    self.embedding_store.put_many(
+                        [batch[i][1] for i in missing], vectors
+                    )
+                    for i, vector in zip(missing, vectors):
+                        embeddings[i] = vector
+
+                write_started = time.perf_counter()
+                write(
+                    ids=[r[0] for r in batch],
+                    documents=[r[1] for r in batch],
+                    metadatas=[r[2] for r in batch],
+                    embeddings=embeddings,
+                )
+                write_seconds += time.perf_counter() - write_started
+                written += len(batch)
+                print(f"Ingested {written}/{len(records)} documents")
+
+        if written:
+            self.version += 1
+
+        elapsed = time.perf_counter() - started
+        self.last_ingest_stats = {
+            "documents": written,
+            "embedded": embedded,
+            "embedding_cache_hits": written - embedded,
+            "embed_workers": embed_workers,
+            "elapsed_seconds": elapsed,
+            # 워커당 처리량 x 워커 수 = 임베딩 단계의 총 처리량
+            "embed_docs_per_sec": (
+                embedded / embed_seconds * embed_workers if embed_seconds else 0.0
+            ),
+            "write_docs_per_sec": written / write_seconds if write_seconds else 0.0,
+            "overall_docs_per_sec": written / elapsed if elapsed else 0.0,
+        }
+        print(
+            f"Embedding cache hits: {self.last_ingest_stats['embedding_cache_hits']}, "
+            f"Embedding: {self.last_ingest_stats['embed_docs_per_sec']:.1f} docs/s, "
+            f"Chroma write: {self.last_ingest_stats['write_docs_per_sec']:.1f} docs/s, "
+            f"Overall: {self.last_ingest_stats['overall_docs_per_sec']:.1f} docs/s"
+        )
+        return written
+
     def add_conversations(
-        self, conversations: List[Dict], batch_size: int = 100
+        self, conversations: List[Dict], batch_size: int = 100, embed_workers: int = 0
     ) -> int:
         """
         대화 데이터를 벡터 DB에 추가합니다.
@@ -68,10 +304,18 @@ class ChromaService:
         Args:
             conversations: 대화 데이터 리스트
             batch_size: 배치 크기
+            embed_workers: 0보다 크면 해당 수의 프로세스로 임베딩을 미리 계산
 
         Returns:
             추가된 문서 수
         """
+        if embed_workers > 0:
+            records = [r for r in map(build_record, conversations) if r is not None]
+            added_count = self._ingest_parallel(records, "add", embed_workers)
+            print(f"Total documents added: {added_count}")
+            print(f"Collection now has {self.collection.count()} documents")
+            return added_count
+
         added_count = 0
 
         for i in range(0, len(conversations), batch_size):
@@ -82,28 +326,24 @@ class ChromaService:
             metadatas = []
 
             for conv in batch:
-                conv_id = conv.get("conversation_id", f"conv_{i + len(ids)}")
-                dialogue = conv.get("dialogue", "")
-
-                if not dialogue:
+                record = build_record(conv)
+                if record is None:
                     continue
 
+                conv_id, dialogue, metadata = record
                 ids.append(conv_id)
                 documents.append(dialogue)
-
-                # 메타데이터 (ChromaDB는 중첩 객체를 지원하지 않으므로 평탄화)
-                metadata = {
-                    "platform": conv.get("platform", ""),
-                    "subject": conv.get("subject", ""),
-                    "speaker_type": conv.get("speaker_type", ""),
-                    "source_file": conv.get("source_file", ""),
-                    "turn_count": len(conv.get("turns", [])),
-                }
                 metadatas.append(metadata)
 
             if ids:
-                self.collection.add(ids=ids, documents=documents, metadatas=metadatas)
+                self.collection.add(
+                    ids=ids,
+                    documents=documents,
+                    metadatas=metadatas,
+                    embeddings=self.embed_documents(documents),
+                )
                 added_count += len(ids)
+                self.version += 1
                 print(f"Added batch {i // batch_size + 1}: {len(ids)} documents")
 
         print(f"Total documents added: {added_count}")
@@ -111,12 +351,133 @@ class ChromaService:
 
         return added_count
 
+    def embed_query(self, query: str) -> List[float]:
+        """
+        검색 쿼리의 임베딩을 계산합니다.
+
+        Args:
+            query: 검색 쿼리
+
+        Returns:
+            임베딩 벡터
+        """
+        with span("chroma.embed_query"):
+            return [float(x) for x in self.embedding_fn([query])[0]]
+
+    def get_indexed_hashes(self, page_size: int = 5000) -> Dict[str, Optional[str]]:
+        """
+        컬렉션에 저장된 문서의 id → content_hash 맵을 반환합니다.
+        (content_hash가 없는 이전 버전 문서는 None)
+        """
+        hashes = {}
+        offset = 0
+        while True:
+            page = self.collection.get(
+                include=["metadatas"], limit=page_size, offset=offset
+            )
+            ids = page["ids"]
+            if not ids:
+                break
+            for doc_id, metadata in zip(ids, page["metadatas"]):
+                hashes[doc_id] = (metadata or {}).get("content_hash")
+            offset += len(ids)
+        return hashes
+
+    def sync_conversations(
+        self,
+        conversations: List[Dict],
+        batch_size: int = 100,
+        embed_workers: int = 0,
+        allow_mass_delete: bool = False,
+    ) -> Dict[str, int]:
+        """
+        대화 데이터와 컬렉션을 증분 동기화합니다.
+
+        conversation_id와 content_hash를 기존 문서와 비교하여
+        새로 생기거나 바뀐 대화만 임베딩해 upsert하고, 사라진 대화는 삭제합니다.
+        입력이 비어 있거나 컬렉션의 CHROMA_SYNC_MAX_DELETE_RATIO보다 많은 문서가
+        삭제 대상이면 잘린 코퍼스로 보고 아무것도 바꾸지 않은 채 중단합니다.
+
+        Args:
+            conversations: 전체 대화 데이터 리스트 (현재 코퍼스 기준)
+            batch_size: 배치 크기
+            embed_workers: 0보다 크면 해당 수의 프로세스로 임베딩을 미리 계산
+            allow_mass_delete: 삭제 비율 제한을 넘어도 동기화할지 여부
+
+        Returns:
+            {"added", "updated", "deleted", "unchanged"} 건수
+
+        Raises:
+            ValueError: 입력이 비어 있거나 삭제 비율 제한을 넘은 경우
+        """
+        indexed = self.get_indexed_hashes()
+
+        records = {}
+        for conv in conversations:
+            record = build_record(conv)
+            if record is not None:
+                records[record[0]] = record
+
+        changed = []
+        counts = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        for conv_id, record in records.items():
+            if conv_id not in indexed:
+                counts["added"] += 1
+                changed.append(record)
+            elif indexed[conv_id] != record[2]["content_hash"]:
+                counts["updated"] += 1
+                changed.append(record)
+            else:
+                counts["unchanged"] += 1
+
+        if indexed and not records:
+            raise ValueError(
+                f"입력 대화가 없어 동기화를 중단합니다. (컬렉션 문서 {len(indexed)}개가 모두 삭제될 수 있음) "
+                "전처리 결과를 확인하세요."
+            )
+
+        removed_ids = [doc_id for doc_id in indexed if doc_id not in records]
+        counts["deleted"] = len(removed_ids)
+        if not allow_mass_delete and len(removed_ids) > len(indexed) * CHROMA_SYNC_MAX_DELETE_RATIO:
+            raise ValueError(
+                f"컬렉션 문서 {len(indexed)}개 중 {len(removed_ids)}개가 삭제 대상이라 동기화를 중단합니다. "
+                f"(제한 {CHROMA_SYNC_MAX_DELETE_RATIO:.0%}) 의도한 변경이면 --rebuild 또는 --allow-mass-delete를 사용하세요."
+            )
+
+        if embed_workers > 0:
+            if changed:
+                self._ingest_parallel(changed, "upsert", embed_workers)
+        else:
+            for i in range(0, len(changed), batch_size):
+                batch = changed[i : i + batch_size]
+                documents = [r[1] for r in batch]
+                self.collection.upsert(
+                    ids=[r[0] for r in batch],
+                    documents=documents,
+                    metadatas=[r[2] for r in batch],
+                    embeddings=self.embed_documents(documents),
+                )
+                print(f"Upserted batch {i // batch_size + 1}: {len(batch)} documents")
+
+        for i in range(0, len(removed_ids), batch_size):
+            self.collection.delete(ids=removed_ids[i : i + batch_size])
+
+        if changed or removed_ids:
+            self.version += 1
+
+        print(
+            f"Sync done: +{counts['added']} added, ~{counts['updated']} updated, "
+            f"-{counts['deleted']} deleted, {counts['unchanged']} unchanged"
+        )
+        return counts
+
     def search(
         self,
         query: str,
         n_results: int = 5,
         platform_filter: Optional[str] = None,
         subject_filter: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None,
     ) -> Dict:
         """
         쿼리와 유사한 대화를 검색합니다.
@@ -126,6 +487,7 @@ class ChromaService:
             n_results: 반환할 결과 수
             platform_filter: 플랫폼 필터 (KAKAO, FACEBOOK 등)
             subject_filter: 주제 필터
+            query_embedding: 미리 계산된 쿼리 임베딩 (있으면 인코딩 생략)
 
         Returns:
             검색 결과 (documents, distances, metadatas)
@@ -145,27 +507,50 @@ class ChromaService:
             else:
                 where_filter = {"$and": conditions}
 
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results,
-            where=where_filter,
-            include=["documents", "metadatas", "distances"],
-        )
+        if query_embedding is not None:
+            query_args = {"query_embeddings": [query_embedding]}
+        else:
+            query_args = {"query_texts": [query]}
+
+        # HNSW 근접 이웃 검색 (query_texts만 있으면 임베딩 시간 포함)
+        with span("chroma.hnsw_query"):
+            results = self.collection.query(
+                **query_args,
+                n_results=n_results,
+                where=where_filter,
+                include=["documents", "metadatas", "distances"],
+            )
 
         return results
 
-    def get_similar_conversations(self, query: str, n_results: int = 3) -> List[Dict]:
+    def get_similar_conversations(
+        self,
+        query: str,
+        n_results: int = 3,
+        platform_filter: Optional[str] = None,
+        subject_filter: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Dict]:
         """
         사용자 쿼리와 유사한 대화를 반환합니다.
 
         Args:
             query: 사용자 입력
             n_results: 반환할 대화 수
+            platform_filter: 플랫폼 필터
+            subject_filter: 주제 필터
+            query_embedding: 미리 계산된 쿼리 임베딩
 
         Returns:
             유사 대화 리스트
         """
-        results = self.search(query, n_results=n_results)
+        results = self.search(
+            query,
+            n_results=n_results,
+            platform_filter=platform_filter,
+            subject_filter=subject_filter,
+            query_embedding=query_embedding,
+        )
 
         conversations = []
 
@@ -192,6 +577,7 @@ class ChromaService:
             embedding_function=self.embedding_fn,
             metadata={"hnsw:space": "cosine"},
         )
+        self.version += 1
         print(f"Collection '{self.collection_name}' cleared")
 
     def get_stats(self) -> Dict:
@@ -203,13 +589,38 @@ class ChromaService:
         }
 
 
-def load_and_index_data(data_path: str, clear_existing: bool = False) -> ChromaService:
+def iter_conversations(data_path: str) -> Iterator[Dict]:
+    """
+    정제된 데이터 파일을 읽어 대화를 하나씩 반환합니다.
+
+    Args:
+        data_path: .jsonl (한 줄에 대화 하나) 또는 .json (대화 배열) 파일 경로
+    """
+    with open(data_path, "r", encoding="utf-8") as f:
+        if str(data_path).endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def load_and_index_data(
+    data_path: str,
+    clear_existing: bool = False,
+    embed_workers: int = 0,
+    allow_mass_delete: bool = False,
+) -> ChromaService:
     """
     정제된 데이터를 로드하여 ChromaDB에 인덱싱합니다.
 
+    기본적으로 기존 컬렉션과 비교하여 바뀐 대화만 반영하는 증분 인덱싱을 수행합니다.
+
     Args:
         data_path: 정제된 데이터 파일 경로
-        clear_existing: 기존 데이터 삭제 여부
+        clear_existing: 기존 데이터를 삭제하고 전체를 다시 임베딩할지 여부
+        embed_workers: 임베딩 워커 프로세스 수 (0이면 워커 없이 embed_documents로 순차 임베딩, 영구 캐시 재사용)
+        allow_mass_delete: 증분 동기화에서 삭제 비율 제한을 넘어도 진행할지 여부
 
     Returns:
         ChromaService 인스턴스
@@ -217,42 +628,67 @@ def load_and_index_data(data_path: str, clear_existing: bool = False) -> ChromaS
     # ChromaDB 서비스 초기화
     service = ChromaService()
 
-    if clear_existing:
-        service.clear_collection()
-
-    # 이미 데이터가 있으면 건너뛰기
-    if service.collection.count() > 0:
-        print(
-            f"Collection already has {service.collection.count()} documents. Skipping indexing."
-        )
-        return service
-
-    # 데이터 로드
-    with open(data_path, "r", encoding="utf-8") as f:
-        conversations = json.load(f)
+    # 데이터 로드 (.jsonl / .json 모두 지원)
+    conversations = list(iter_conversations(data_path))
 
     print(f"Loaded {len(conversations)} conversations from {data_path}")
 
     # 인덱싱
-    service.add_conversations(conversations)
+    if clear_existing:
+        service.clear_collection()
+        service.add_conversations(conversations, embed_workers=embed_workers)
+    else:
+        service.sync_conversations(
+            conversations, embed_workers=embed_workers, allow_mass_delete=allow_mass_delete
+        )
 
     return service
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """테스트 및 인덱싱 실행"""
-    script_dir = Path(__file__).parent
-    data_path = (
-        script_dir.parent / "preprocess" / "processed" / "chat_data_cleaned_v2.json"
+    parser = argparse.ArgumentParser(description="ChromaDB 인덱싱")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="컬렉션을 비우고 전체 코퍼스를 다시 임베딩 (기본: 변경분만 반영)",
     )
+    parser.add_argument(
+        "--embed-workers",
+        type=int,
+        default=0,
+        help="임베딩 워커 프로세스 수 (0: 단일 프로세스에서 순차 임베딩, 영구 캐시(EmbeddingStore)에 있는 문서는 재사용)",
+    )
+    parser.add_argument(
+        "--allow-mass-delete",
+        action="store_true",
+        help="증분 동기화에서 삭제 대상이 CHROMA_SYNC_MAX_DELETE_RATIO를 넘어도 진행",
+    )
+    args = parser.parse_args(argv)
+
+    script_dir = Path(__file__).parent
+    processed_dir = script_dir.parent / "preprocess" / "processed"
+    data_path = processed_dir / "chat_data_cleaned_v2.jsonl"
+    if not data_path.exists():
+        # 이전 버전 전처리 결과 (단일 JSON 배열)
+        data_path = processed_dir / "chat_data_cleaned_v2.json"
 
     if not data_path.exists():
         print(f"Data file not found: {data_path}")
         print("Please run data_preprocessor.py first.")
         return
 
-    # 데이터 인덱싱
-    service = load_and_index_data(str(data_path), clear_existing=True)
+    # 데이터 인덱싱 (기본: 변경분만 반영)
+    try:
+        service = load_and_index_data(
+            str(data_path),
+            clear_existing=args.rebuild,
+            embed_workers=args.embed_workers,
+            allow_mass_delete=args.allow_mass_delete,
+        )
+    except ValueError as e:
+        print(f"Sync aborted: {e}")
+        return
 
     # 테스트 검색
     print("\n" + "=" * 60)
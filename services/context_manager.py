@@ -0,0 +1,253 @@
+"""
+대화 컨텍스트 윈도우 관리 모듈
+
+매 턴 전체 대화 기록을 보내면 턴이 쌓일수록 입력 토큰과 지연이 늘어납니다.
+시스템 프롬프트와 최근 N턴만 그대로 보내고, 그보다 오래된 턴은
+한 줄 요약(사용자 발언 발췌 + 현재 호감도)으로 압축하여 요청당 토큰 예산을 지킵니다.
+
+응답 JSON의 score는 여전히 "이번 발언에 대한 호감도 변화량"이므로
+요약에는 누적 호감도만 참고용으로 넣고, 점수 규칙은 시스템 프롬프트를 그대로 따릅니다.
+
+메시지 배치 (프롬프트 캐시 친화적):
+    [시스템 프롬프트 (불변)] [이전 대화 요약] [최근 N턴] [RAG 컨텍스트 (매 턴 변경)]
+시스템 프롬프트는 (페르소나, 성별, 닉네임)마다 바이트 단위로 같게 유지되어
+OpenAI의 프롬프트 캐시가 긴 base.txt + 페르소나 프롬프트를 재사용할 수 있습니다.
+PromptCacheMeter는 응답의 usage에서 캐시된 토큰 수를 기록해 효과를 측정합니다.
+"""
+
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config.prompts import count_tokens
+from config.settings import (
+    CONTEXT_MAX_RECENT_TURNS,
+    CONTEXT_SUMMARY_MAX_CHARS,
+    CONTEXT_SUMMARY_SNIPPET_CHARS,
+    CONTEXT_TOKEN_BUDGET,
+)
+
+# 메시지 하나당 역할/구분자 오버헤드 (OpenAI chat 포맷 기준 근사치)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """메시지 리스트의 대략적인 입력 토큰 수를 계산합니다."""
+    return sum(count_tokens(msg["content"]) + _MESSAGE_OVERHEAD_TOKENS for msg in messages)
+
+
+def split_turns(messages: List[Dict]) -> Tuple[List[Dict], List[List[Dict]]]:
+    """
+    메시지를 (시스템 메시지, 턴 리스트)로 나눕니다.
+    턴은 사용자 메시지 하나와 그 뒤의 어시스턴트 응답들로 이루어지며,
+    첫 사용자 메시지 이전의 인사말은 별도의 턴(0번)으로 취급합니다.
+    """
+    system_messages = []
+    turns: List[List[Dict]] = []
+    for msg in messages:
+        if msg["role"] == "system":
+            system_messages.append(msg)
+        elif msg["role"] == "user" or not turns:
+            turns.append([msg])
+        else:
+            turns[-1].append(msg)
+    return system_messages, turns
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class ContextWindowManager:
+    """시스템 프롬프트 + 요약 + 최근 N턴으로 요청 메시지를 구성하는 컨텍스트 관리자"""
+
+    def __init__(
+        self,
+        max_recent_turns: int = CONTEXT_MAX_RECENT_TURNS,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        summary_max_chars: int = CONTEXT_SUMMARY_MAX_CHARS,
+        snippet_chars: int = CONTEXT_SUMMARY_SNIPPET_CHARS,
+    ):
+        """
+        Args:
+            max_recent_turns: 원문 그대로 보낼 최근 턴 수 (0 이하이면 윈도우 비활성화)
+            token_budget: 요청당 입력 토큰 예산 (RAG 컨텍스트 제외)
+            summary_max_chars: 이전 대화 요약의 최대 글자 수
+            snippet_chars: 요약에 넣을 사용자 발언 하나의 최대 글자 수
+        """
+        self.max_recent_turns = max_recent_turns
+        self.token_budget = token_budget
+        self.summary_max_chars = summary_max_chars
+        self.snippet_chars = snippet_chars
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._trimmed_requests = 0
+        self._tokens_full = 0
+        self._tokens_sent = 0
+        self._last: Dict = {}
+
+    def build_summary(self, older_turns: List[List[Dict]], affection_score: Optional[int] = None) -> str:
+        """오래된 턴을 한 줄 요약으로 압축합니다. (최근 발언 우선으로 글자 수 제한)"""
+        user_turns = sum(1 for turn in older_turns if turn[0]["role"] == "user")
+        header = f"[이전 대화 요약] 앞선 대화 {user_turns}턴은 생략됨."
+        if affection_score is not None:
+            header += f" 현재 호감도: {affection_score}/100."
+
+        snippets = []
+        used = len(header)
+        for turn in reversed(older_turns):
+            if turn[0]["role"] != "user":
+                continue
+            snippet = f'"{_clip(turn[0]["content"], self.snippet_chars)}"'
+            if used + len(snippet) + 3 > self.summary_max_chars:
+                break
+            snippets.append(snippet)
+            used += len(snippet) + 3
+
+        if not snippets:
+            return header
+        return header + " 상대가 했던 말: " + " / ".join(reversed(snippets))
+
+    def build(self, messages: List[Dict], affection_score: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+        """
+        요청에 보낼 메시지를 만듭니다.
+
+        Args:
+            messages: 전체 대화 기록 (시스템 프롬프트 포함)
+            affection_score: 현재 누적 호감도 (요약 줄에 표시, 없으면 생략)
+
+        Returns:
+            tuple: (window_messages: list, stats: dict)
+                   stats = {tokens_full, tokens_sent, tokens_saved, turns_total, turns_kept}
+        """
+        system_messages, turns = split_turns(messages)
+        tokens_full = count_message_tokens(messages)
+
+        keep = len(turns) if self.max_recent_turns <= 0 else min(len(turns), self.max_recent_turns)
+        while True:
+            if keep >= len(turns):
+                window = list(messages)
+            else:
+                older, recent = turns[: len(turns) - keep], turns[len(turns) - keep :]
+                summary = {"role": "system", "content": self.build_summary(older, affection_score)}
+                window = system_messages + [summary] + [msg for turn in recent for msg in turn]
+
+            tokens_sent = count_message_tokens(window)
+            # 예산을 넘으면 가장 오래된 턴부터 요약으로 이동 (현재 턴은 항상 유지)
+            if tokens_sent <= self.token_budget or keep <= 1:
+                break
+            keep -= 1
+
+        stats = {
+            "tokens_full": tokens_full,
+            "tokens_sent": tokens_sent,
+            "tokens_saved": tokens_full - tokens_sent,
+            "turns_total": len(turns),
+            "turns_kept": keep,
+        }
+
+        with self._lock:
+            self._requests += 1
+            self._tokens_full += tokens_full
+            self._tokens_sent += tokens_sent
+            if keep < len(turns):
+                self._trimmed_requests += 1
+            self._last = stats
+
+        return window, stats
+
+    def get_stats(self) -> Dict:
+        """누적 요청 수, 보낸/절약한 토큰 수와 마지막 요청의 통계를 반환합니다."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "trimmed_requests": self._trimmed_requests,
+                "tokens_full": self._tokens_full,
+                "tokens_sent": self._tokens_sent,
+                "tokens_saved": self._tokens_full - self._tokens_sent,
+                "last": dict(self._last),
+            }
+
+
+def prompt_cache_key(messages: List[Dict]) -> str:
+    """
+    고정 prefix(맨 앞 시스템 프롬프트)의 해시를 반환합니다.
+    같은 prefix를 가진 요청이 같은 캐시 서버로 라우팅되도록 prompt_cache_key로 전달합니다.
+    """
+    prefix = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+    return hashlib.sha1(prefix.encode("utf-8")).hexdigest()[:16]
+
+
+class PromptCacheMeter:
+    """API 응답의 usage에서 입력 토큰 중 캐시 적중 토큰 수와 지연 시간을 집계합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._cached_requests = 0
+        self._prompt_tokens = 0
+        self._cached_tokens = 0
+        self._completion_tokens = 0
+        # 캐시 적중 여부별 (요청 수, 누적 지연 시간) - 지연 감소 효과 비교용
+        self._latency = {True: [0, 0.0], False: [0, 0.0]}
+
+    def record(self, usage, latency: Optional[float] = None) -> Optional[Dict]:
+        """
+        Args:
+            usage: OpenAI 응답의 usage 객체 (없으면 무시)
+            latency: 요청 지연 시간(초)
+
+        Returns:
+            이번 요청의 {prompt_tokens, cached_tokens, completion_tokens}, usage가 없으면 None
+        """
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        prompt = usage.prompt_tokens or 0
+        completion = usage.completion_tokens or 0
+
+        with self._lock:
+            self._requests += 1
+            self._prompt_tokens += prompt
+            self._cached_tokens += cached
+            self._completion_tokens += completion
+            if cached:
+                self._cached_requests += 1
+            if latency is not None:
+                bucket = self._latency[bool(cached)]
+                bucket[0] += 1
+                bucket[1] += latency
+        return {"prompt_tokens": prompt, "cached_tokens": cached, "completion_tokens": completion}
+
+    def get_stats(self) -> Dict:
+        """누적 입력/캐시 토큰 수, 캐시 비율, 캐시 적중 여부별 평균 지연 시간을 반환합니다."""
+        with self._lock:
+            hit_count, hit_total = self._latency[True]
+            miss_count, miss_total = self._latency[False]
+            return {
+                "requests": self._requests,
+                "cached_requests": self._cached_requests,
+                "prompt_tokens": self._prompt_tokens,
+                "cached_tokens": self._cached_tokens,
+                "completion_tokens": self._completion_tokens,
+                "cached_ratio": self._cached_tokens / self._prompt_tokens if self._prompt_tokens else 0.0,
+                "avg_latency_cached": hit_total / hit_count if hit_count else None,
+                "avg_latency_uncached": miss_total / miss_count if miss_count else None,
+            }
+
+
+context_window = ContextWindowManager()
+prompt_cache_meter = PromptCacheMeter()
+
+
+def get_context_stats() -> Dict:
+    """컨텍스트 윈도우의 누적 토큰 절약 통계를 반환합니다."""
+    return context_window.get_stats()
+
+
+def get_prompt_cache_stats() -> Dict:
+    """프롬프트 캐시 적중 토큰 통계를 반환합니다."""
+    return prompt_cache_meter.get_stats()
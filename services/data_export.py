@@ -0,0 +1,432 @@
+"""
+분석용 일괄 내보내기 모듈 (Parquet / Arrow IPC)
+
+모델 학습과 페르소나 튜닝에 쓸 데이터를 세션마다 쿼리하지 않고, 테이블 전체를 기본 키 순서의
+키셋 페이지(fetch_table_page)로 훑어 컬럼 형식 파일로 내보냅니다.
+
+- 평탄화: chat_logs.chat_history(JSONB 리스트)는 메시지 하나당 한 행으로 펼치고,
+  game_sessions의 my_persona/ideal_preference는 자주 쓰는 필드를 컬럼으로 꺼냅니다.
+- 파티션: <out>/<table>/part-00000.parquet 처럼 EXPORT_ROWS_PER_FILE 행마다 파일을 나눠
+  바로 쓰므로, 메모리에는 파일 하나 분량의 행과 미리 받아둔 다음 페이지만 올라갑니다.
+- 이어서 하기: 파일을 하나 쓸 때마다 테이블별 마지막 키를 <out>/_export_state.json에 기록합니다.
+  중단된 뒤 --resume으로 실행하면 기록된 키 다음 페이지부터 이어서 내보냅니다.
+- 페이지 미리 받기: 다음 페이지 요청은 현재 페이지를 펼치고 쓰는 동안 백그라운드에서 진행됩니다.
+
+pyarrow는 선택 의존성입니다. 설치되어 있지 않으면 jsonl 형식으로만 내보낼 수 있습니다.
+
+실행: python -m services.data_export --out exports/ [--format parquet|arrow|jsonl] \\
+          [--tables game_sessions,chat_logs] [--resume]
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 선택 의존성: 없으면 jsonl 형식만 사용
+    pa = pq = None
+
+from config.settings import EXPORT_PAGE_SIZE, EXPORT_ROWS_PER_FILE, TABLE_PRIMARY_KEYS
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "jsonl": ".jsonl"}
+STATE_FILE_NAME = "_export_state.json"
+
+
+def _json_text(value) -> Optional[str]:
+    """JSONB 값을 문자열 컬럼으로 (None은 그대로)"""
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _section(value) -> Dict:
+    return value if isinstance(value, dict) else {}
+
+
+# ---------------------------------------------------------
+# 테이블별 컬럼과 평탄화
+# ---------------------------------------------------------
+def _flatten_game_session(row: Dict) -> Iterator[Dict]:
+    persona = _section(row.get("my_persona"))
+    preference = _section(row.get("ideal_preference"))
+    yield {
+        "session_id": row.get("session_id"),
+        "user_id": row.get("user_id"),
+        "final_choice": row.get("final_choice"),
+        "persona_style": persona.get("style"),
+        "persona_type": persona.get("type"),
+        "best_match": preference.get("best_match"),
+        "my_persona": _json_text(row.get("my_persona")),
+        "ideal_preference": _json_text(row.get("ideal_preference")),
+        "played_at": row.get("played_at"),
+    }
+
+
+def _flatten_chat_log(row: Dict) -> Iterator[Dict]:
+    """대화 메시지 하나당 한 행. turn_index는 사용자 발언 순번 (상대의 대답은 직전 발언과 같은 번호)"""
+    turn_index = 0
+    for message_index, message in enumerate(row.get("chat_history") or []):
+        if not isinstance(message, dict):
+            continue
+        role = message.get("role")
+        if role == "user":
+            turn_index += 1
+        yield {
+            "log_id": row.get("log_id"),
+            "session_id": row.get("session_id"),
+            "partner_type": row.get("partner_type"),
+            "turn_count": row.get("turn_count"),
+            "message_index": message_index,
+            "turn_index": turn_index,
+            "role": role,
+            "content": message.get("content"),
+        }
+
+
+def _passthrough(row: Dict) -> Iterator[Dict]:
+    yield row
+
+
+class TableSpec:
+    """
+    내보낼 테이블 하나의 정의
+
+    Args:
+        name: 테이블 이름 (출력 디렉토리 이름)
+        columns: 출력 컬럼 [(이름, 종류)] - 종류는 string, int32, timestamp, string_list
+        flatten: DB 행 하나를 출력 행(dict) 여러 개로 바꾸는 함수
+        select: 조회할 컬럼 (select 문법)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        columns: Sequence[Tuple[str, str]],
+        flatten: Callable[[Dict], Iterator[Dict]] = _passthrough,
+        select: Optional[str] = None,
+    ):
+        self.name = name
+        self.key = TABLE_PRIMARY_KEYS[name]
+        self.columns = list(columns)
+        self.flatten = flatten
+        self.select = select or ",".join(column for column, _ in self.columns)
+
+
+TABLE_SPECS = {
+    spec.name: spec
+    for spec in (
+        TableSpec(
+            "game_sessions",
+            [
+                ("session_id", "string"),
+                ("user_id", "string"),
+                ("final_choice", "string"),
+                ("persona_style", "string"),
+                ("persona_type", "string"),
+                ("best_match", "string"),
+                ("my_persona", "string"),
+                ("ideal_preference", "string"),
+                ("played_at", "timestamp"),
+            ],
+            _flatten_game_session,
+            select="session_id,user_id,final_choice,my_persona,ideal_preference,played_at",
+        ),
+        TableSpec(
+            "chat_logs",
+            [
+                ("log_id", "string"),
+                ("session_id", "string"),
+                ("partner_type", "string"),
+                ("turn_count", "int32"),
+                ("message_index", "int32"),
+                ("turn_index", "int32"),
+                ("role", "string"),
+                ("content", "string"),
+            ],
+            _flatten_chat_log,
+            select="log_id,session_id,partner_type,chat_history,turn_count",
+        ),
+        TableSpec(
+            "affinity_logs",
+            [
+                ("log_id", "string"),
+                ("session_id", "string"),
+                ("partner_type", "string"),
+                ("turn_index", "int32"),
+                ("score_change", "int32"),
+                ("current_score", "int32"),
+                ("reason", "string"),
+                ("trigger_message", "string"),
+                ("created_at", "timestamp"),
+            ],
+        ),
+        TableSpec(
+            "analysis_results",
+            [
+                ("analysis_id", "string"),
+                ("session_id", "string"),
+                ("style", "string"),
+                ("user_type", "string"),
+                ("keywords", "string_list"),
+                ("strength", "string"),
+                ("weakness", "string"),
+                ("best_match", "string"),
+                ("best_reason", "string"),
+                ("similar_style", "string"),
+                ("similar_chemistry", "string"),
+                ("opposite_style", "string"),
+                ("opposite_chemistry", "string"),
+                ("positive", "string"),
+                ("improvement", "string"),
+                ("dating_tip", "string"),
+                ("warning", "string"),
+                ("summary", "string"),
+                ("created_at", "timestamp"),
+            ],
+        ),
+    )
+}
+
+
+# ---------------------------------------------------------
+# 파티션 파일 쓰기
+# ---------------------------------------------------------
+def _arrow_table(spec: TableSpec, rows: List[Dict]):
+    """행 리스트를 컬럼별 배열로 모아 pyarrow Table로 만듭니다."""
+    types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "string_list": pa.list_(pa.string()),
+    }
+    arrays = []
+    for column, kind in spec.columns:
+        values = [row.get(column) for row in rows]
+        if kind == "timestamp":
+            # Supabase는 ISO 8601 문자열로 돌려주므로 UTC 타임스탬프로 변환
+            arrays.append(pa.array(values, pa.string()).cast(pa.timestamp("us", tz="UTC")))
+        else:
+            arrays.append(pa.array(values, types[kind]))
+    return pa.Table.from_arrays(arrays, names=[column for column, _ in spec.columns])
+
+
+def _write_part(fmt: str, path: str, spec: TableSpec, rows: List[Dict]) -> None:
+    """임시 파일에 쓴 뒤 이름을 바꿔서, 중단되어도 반쯤 쓰인 파티션 파일이 남지 않도록 합니다."""
+    tmp_path = path + ".tmp"
+    if fmt == "jsonl":
+        names = [column for column, _ in spec.columns]
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({name: row.get(name) for name in names}, ensure_ascii=False, default=str))
+                f.write("\n")
+    else:
+        table = _arrow_table(spec, rows)
+        if fmt == "parquet":
+            pq.write_table(table, tmp_path, compression="zstd")
+        else:
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _part_path(table_dir: str, part: int, fmt: str) -> str:
+    return os.path.join(table_dir, f"part-{part:05d}{FORMATS[fmt]}")
+
+
+# ---------------------------------------------------------
+# 진행 상태 (이어서 하기)
+# ---------------------------------------------------------
+class ExportState:
+    """
+    <out>/_export_state.json에 테이블별 진행 상황을 저장합니다.
+    {"format": "parquet", "tables": {"chat_logs": {"after_key", "next_part", "rows", "pages", "done"}}}
+    """
+
+    def __init__(self, out_dir: str, fmt: str, resume: bool):
+        self.path = os.path.join(out_dir, STATE_FILE_NAME)
+        self._lock = threading.Lock()
+        exists = os.path.exists(self.path)
+        if exists and not resume:
+            raise FileExistsError(
+                f"{out_dir}에 이전 내보내기 기록이 있습니다. --resume으로 이어서 하거나 다른 --out을 지정하세요."
+            )
+        if resume and exists:
+            with open(self.path, encoding="utf-8") as f:
+                self._state = json.load(f)
+            if self._state.get("format") != fmt:
+                raise ValueError(f"이전 내보내기 형식({self._state.get('format')})과 --format({fmt})이 다릅니다.")
+        else:
+            self._state = {"format": fmt, "tables": {}}
+
+    def table(self, name: str) -> Dict:
+        with self._lock:
+            return self._state["tables"].setdefault(
+                name, {"after_key": None, "next_part": 0, "rows": 0, "pages": 0, "done": False}
+            )
+
+    def save(self) -> None:
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+# ---------------------------------------------------------
+# 내보내기
+# ---------------------------------------------------------
+def iter_pages(table: str, key: str, after_key=None, page_size: int = EXPORT_PAGE_SIZE, columns: str = "*"):
+    """
+    키셋 페이지를 순서대로 돌려줍니다. (page, 마지막 키)
+    페이지를 받자마자 다음 페이지 요청을 백그라운드에서 시작하므로, 호출한 쪽이 페이지를
+    처리하는 시간과 다음 요청의 왕복 시간이 겹칩니다.
+    """
+    from services.db_service import fetch_table_page
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"export-{table}") as pool:
+        future = pool.submit(fetch_table_page, table, after_key, page_size, columns)
+        while future is not None:
+            page = future.result()
+            if not page:
+                return
+            last_key = page[-1][key]
+            # 덜 찬 페이지는 마지막 페이지이므로 빈 페이지를 확인하러 한 번 더 요청하지 않음
+            future = pool.submit(fetch_table_page, table, last_key, page_size, columns) if len(page) >= page_size else None
+            yield page, last_key
+
+
+def export_table(
+    spec: TableSpec,
+    out_dir: str,
+    fmt: str,
+    state: ExportState,
+    page_size: int = EXPORT_PAGE_SIZE,
+    rows_per_file: int = EXPORT_ROWS_PER_FILE,
+) -> Dict:
+    """테이블 하나를 파티션 파일로 내보내고 {"rows", "files", "pages", "seconds"}를 반환합니다."""
+    progress = state.table(spec.name)
+    table_dir = os.path.join(out_dir, spec.name)
+    os.makedirs(table_dir, exist_ok=True)
+    started = time.perf_counter()
+    stats = {"rows": 0, "files": 0, "pages": 0, "seconds": 0.0}
+    if progress["done"]:
+        print(f"[export] {spec.name}: 이미 완료됨 (건너뜀)")
+        return stats
+
+    # 진행 상태에 기록되지 않은 파일(중단 직전에 쓴 파일)은 다시 씀
+    for path in glob.glob(os.path.join(table_dir, f"part-*{FORMATS[fmt]}*")):
+        name = os.path.basename(path)
+        if path.endswith(".tmp") or int(name[5:10]) >= progress["next_part"]:
+            os.remove(path)
+
+    buffer: List[Dict] = []
+    pending_pages = 0
+
+    def commit(last_key):
+        nonlocal buffer, pending_pages
+        _write_part(fmt, _part_path(table_dir, progress["next_part"], fmt), spec, buffer)
+        progress.update(
+            after_key=last_key,
+            next_part=progress["next_part"] + 1,
+            rows=progress["rows"] + len(buffer),
+            pages=progress["pages"] + pending_pages,
+        )
+        state.save()
+        stats["rows"] += len(buffer)
+        stats["files"] += 1
+        stats["pages"] += pending_pages
+        buffer, pending_pages = [], 0
+
+    last_key = progress["after_key"]
+    for page, last_key in iter_pages(spec.name, spec.key, progress["after_key"], page_size, spec.select):
+        pending_pages += 1
+        for row in page:
+            buffer.extend(spec.flatten(row))
+        # 페이지 경계에서만 파일을 나눠야 마지막 키로 이어서 할 수 있음
+        if len(buffer) >= rows_per_file:
+            commit(last_key)
+    if buffer:
+        commit(last_key)
+    elif pending_pages:
+        # 행이 펼쳐지지 않는 페이지(빈 chat_history)만 남은 경우에도 진행 위치는 기록
+        progress.update(after_key=last_key, pages=progress["pages"] + pending_pages)
+        stats["pages"] += pending_pages
+
+    progress["done"] = True
+    state.save()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def export_tables(
+    out_dir: str,
+    tables: Sequence[str] = tuple(TABLE_SPECS),
+    fmt: str = "parquet",
+    resume: bool = False,
+    page_size: int = EXPORT_PAGE_SIZE,
+    rows_per_file: int = EXPORT_ROWS_PER_FILE,
+    workers: int = 4,
+) -> Dict[str, Dict]:
+    """
+    여러 테이블을 동시에(workers개) 내보냅니다.
+
+    Returns:
+        테이블별 {"rows", "files", "pages", "seconds"} (이번 실행에서 처리한 양)
+
+    Raises:
+        RuntimeError: parquet/arrow 형식인데 pyarrow가 설치되어 있지 않은 경우
+        FileExistsError: out_dir에 이전 기록이 있는데 resume=False인 경우
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt} ({', '.join(FORMATS)})")
+    if fmt != "jsonl" and pa is None:
+        raise RuntimeError("parquet/arrow 형식에는 pyarrow가 필요합니다. (pip install pyarrow 또는 --format jsonl)")
+    unknown = [table for table in tables if table not in TABLE_SPECS]
+    if unknown:
+        raise ValueError(f"내보낼 수 없는 테이블입니다: {', '.join(unknown)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    state = ExportState(out_dir, fmt, resume)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="export") as pool:
+        futures = {
+            table: pool.submit(export_table, TABLE_SPECS[table], out_dir, fmt, state, page_size, rows_per_file)
+            for table in tables
+        }
+        return {table: future.result() for table, future in futures.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="분석용 일괄 내보내기 (Parquet / Arrow IPC)")
+    parser.add_argument("--out", required=True, help="출력 디렉토리")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet", help="파일 형식")
+    parser.add_argument("--tables", default=",".join(TABLE_SPECS), help="쉼표로 구분한 테이블 목록")
+    parser.add_argument("--resume", action="store_true", help="중단된 내보내기를 이어서 진행")
+    parser.add_argument("--page-size", type=int, default=EXPORT_PAGE_SIZE, help="키셋 페이지 크기")
+    parser.add_argument("--rows-per-file", type=int, default=EXPORT_ROWS_PER_FILE, help="파티션 파일당 최대 행 수")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 내보낼 테이블 수")
+    args = parser.parse_args(argv)
+
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    results = export_tables(
+        args.out,
+        tables,
+        fmt=args.format,
+        resume=args.resume,
+        page_size=args.page_size,
+        rows_per_file=args.rows_per_file,
+        workers=args.workers,
+    )
+    for table, stats in results.items():
+        rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        print(
+            f"[export] {table}: {stats['rows']}행, 파일 {stats['files']}개, 페이지 {stats['pages']}개, "
+            f"{stats['seconds']:.1f}s ({rate:,.0f} rows/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
 # services/db_service.py
+import atexit
 import os
+import queue
+import random
+import threading
+import time
+import uuid
 import streamlit as st
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from config.settings import BACKEND_MODE, FAKE_SUPABASE_LATENCY, SUPABASE_TIMEOUT, TABLE_PRIMARY_KEYS
+from services.startup import timed
+from services.tracing import record, traced
+from services.transport import call_with_policy, get_breaker, get_http_client
+
 # .env 파일 로드 (로컬 환경용)
 load_dotenv()
 
@@ -11,14 +21,89 @@ load_dotenv()
 def get_secret(key):
     return os.getenv(key) or (st.secrets[key] if key in st.secrets else None)
 
-SUPABASE_URL = get_secret("SUPABASE_URL")
-SUPABASE_KEY = get_secret("SUPABASE_KEY")
+# fake 모드(부하 테스트)에서는 접속 정보가 필요 없음
+SUPABASE_URL = get_secret("SUPABASE_URL") if BACKEND_MODE != "fake" else None
+SUPABASE_KEY = get_secret("SUPABASE_KEY") if BACKEND_MODE != "fake" else None
+
+# 클라이언트는 처음 사용할 때 생성 (앱 시작 시간 단축)
+_supabase = None
+_supabase_lock = threading.Lock()
+
+
+def get_supabase():
+    """
+    Supabase 클라이언트를 반환합니다. 처음 호출될 때 생성됩니다.
+    """
+    global _supabase
+    if _supabase is not None:
+        return _supabase
+
+    with _supabase_lock:
+        if _supabase is None and BACKEND_MODE == "fake":
+            # 부하 테스트용 메모리 대역
+            from services.fakes import FakeSupabaseClient
+
+            _supabase = FakeSupabaseClient(latency=FAKE_SUPABASE_LATENCY)
+        if _supabase is None:
+            if not SUPABASE_URL or not SUPABASE_KEY:
+                raise ValueError("🚨 Supabase URL 또는 Key가 설정되지 않았습니다.")
+
+            with timed("import supabase"):
+                from supabase import ClientOptions, create_client
+            with timed("init Supabase client"):
+                # 공용 keep-alive 커넥션 풀과 요청 deadline 사용
+                _supabase = create_client(
+                    SUPABASE_URL,
+                    SUPABASE_KEY,
+                    options=ClientOptions(
+                        httpx_client=get_http_client("supabase", SUPABASE_TIMEOUT),
+                        postgrest_client_timeout=SUPABASE_TIMEOUT,
+                    ),
+                )
+        return _supabase
+
+
+def _new_id():
+    return str(uuid.uuid4())
+
+
+def _insert_idempotent(table, row):
+    """
+    클라이언트에서 만든 기본 키로 upsert(ignore_duplicates)합니다.
+    같은 행을 다시 보내도 중복이 생기지 않으므로 실패 시 안전하게 재시도할 수 있습니다.
+    """
+    return call_with_policy(
+        "supabase",
+        f"{table}.insert",
+        lambda: get_supabase()
+        .table(table)
+        .upsert(row, on_conflict=TABLE_PRIMARY_KEYS[table], ignore_duplicates=True)
+        .execute(),
+        idempotent=True,
+    )
+
 
-# 클라이언트 생성
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("🚨 Supabase URL 또는 Key가 설정되지 않았습니다.")
+def _insert_confirmed(table, row):
+    """
+    _insert_idempotent로 행을 넣고, 행이 실제로 저장되었는지 확인합니다.
+    upsert가 행을 돌려주지 않으면(재시도 중 이미 들어간 행이 무시되었거나 쓰기가 걸러진 경우)
+    기본 키로 다시 조회합니다.
+
+    Returns:
+        bool: 행이 테이블에 있으면 True
+    """
+    if _insert_idempotent(table, row).data:
+        return True
+
+    key = TABLE_PRIMARY_KEYS[table]
+    response = call_with_policy(
+        "supabase",
+        f"{table}.select",
+        lambda: get_supabase().table(table).select(key).eq(key, row[key]).execute(),
+        idempotent=True,
+    )
+    return bool(response.data)
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def register_user(nickname, gender):
     """
@@ -26,18 +111,16 @@ def register_user(nickname, gender):
     """
     try:
         user_data = {
+            "user_id": _new_id(),
             "nickname": nickname,
             "gender": gender,
             "marketing_agree": True # Intro에서 체크했다고 가정
         }
         
-        # 1. Insert 하고 방금 생성된 데이터(user_id 포함)를 돌려받음
-        response = supabase.table("users").insert(user_data).execute()
-        
-        # 2. 성공 시 user_id 반환
-        if response.data:
-            user_id = response.data[0]['user_id']
-            return user_id
+        # 1. user_id를 미리 만들어 Insert (재시도해도 중복 생성되지 않음)
+        # 2. 행이 실제로 저장된 경우에만 user_id 반환
+        if _insert_confirmed("users", user_data):
+            return user_data["user_id"]
         return None
 
     except Exception as e:
@@ -52,16 +135,15 @@ def create_game_session(user_id, final_choice=None, my_persona=None, ideal_prefe
     """
     try:
         session_data = {
+            "session_id": _new_id(),
             "user_id": user_id,
             "final_choice": final_choice,
             "my_persona": my_persona,
             "ideal_preference": ideal_preference
         }
         
-        response = supabase.table("game_sessions").insert(session_data).execute()
-        
-        if response.data:
-            return response.data[0]['session_id']
+        if _insert_confirmed("game_sessions", session_data):
+            return session_data["session_id"]
         return None
 
     except Exception as e:
@@ -80,7 +162,13 @@ def update_game_session(session_id, final_choice, my_persona, ideal_preference):
             "ideal_preference": ideal_preference
         }
         
-        response = supabase.table("game_sessions").update(update_data).eq("session_id", session_id).execute()
+        # eq 조건 update는 여러 번 실행해도 결과가 같으므로 재시도 가능
+        response = call_with_policy(
+            "supabase",
+            "game_sessions.update",
+            lambda: get_supabase().table("game_sessions").update(update_data).eq("session_id", session_id).execute(),
+            idempotent=True,
+        )
         return response.data is not None
 
     except Exception as e:
@@ -96,21 +184,10 @@ def save_chat_log(session_id, partner_type, chat_history, turn_count):
     turn_count: 대화 턴 수
     """
     try:
-        # system 메시지 제외한 대화만 저장
-        filtered_history = [msg for msg in chat_history if msg["role"] != "system"]
-        
-        log_data = {
-            "session_id": session_id,
-            "partner_type": partner_type,
-            "chat_history": filtered_history,
-            "turn_count": turn_count
-        }
-        
-        response = supabase.table("chat_logs").insert(log_data).execute()
+        log_data = _build_chat_log_row(session_id, partner_type, chat_history, turn_count)
         
-        if response.data:
-            return response.data[0]['log_id']
-        return None
+        _insert_idempotent("chat_logs", log_data)
+        return log_data["log_id"]
 
     except Exception as e:
         st.error(f"채팅 로그 저장 실패: {e}")
@@ -123,55 +200,55 @@ def save_analysis_result(session_id, analysis):
     
     Args:
         session_id: 게임 세션 ID
-        analysis: LLM 분석 결과 dict (my_persona, compatibility, insights, summary)
+        analysis: LLM 분석 결과 (AnalysisResult)
     
     Returns:
         analysis_id: 저장된 분석 결과 ID (실패 시 None)
     """
     try:
-        my_persona = analysis.get("my_persona", {})
-        compatibility = analysis.get("compatibility", {})
-        insights = analysis.get("insights", {})
-        
-        analysis_data = {
-            "session_id": session_id,
-            
-            # 사용자 연애 스타일
-            "style": my_persona.get("style"),
-            "user_type": my_persona.get("type"),
-            "keywords": my_persona.get("keywords", []),
-            "strength": my_persona.get("strength"),
-            "weakness": my_persona.get("weakness"),
-            
-            # 호환성 분석
-            "best_match": compatibility.get("best_match"),
-            "best_reason": compatibility.get("best_reason"),
-            "similar_style": compatibility.get("similar_style"),
-            "similar_chemistry": compatibility.get("similar_chemistry"),
-            "opposite_style": compatibility.get("opposite_style"),
-            "opposite_chemistry": compatibility.get("opposite_chemistry"),
-            
-            # 인사이트
-            "positive": insights.get("positive"),
-            "improvement": insights.get("improvement"),
-            "dating_tip": insights.get("dating_tip"),
-            "warning": insights.get("warning"),
-            
-            # 전체 요약
-            "summary": analysis.get("summary")
-        }
+        analysis_data = _build_analysis_row(session_id, analysis)
         
-        response = supabase.table("analysis_results").insert(analysis_data).execute()
-        
-        if response.data:
-            return response.data[0]['analysis_id']
+        _insert_idempotent("analysis_results", analysis_data)
+        return analysis_data["analysis_id"]
+
+    except Exception as e:
+        st.error(f"분석 결과 저장 실패: {e}")
         return None
 
+
+def replace_analysis_result(session_id, analysis):
+    """
+    세션의 기존 analysis_results 행을 새 분석 결과로 덮어씁니다. (backfill --force)
+    기존 행이 없으면 save_analysis_result처럼 새로 저장합니다.
+    
+    Returns:
+        analysis_id: 덮어쓰거나 저장한 분석 결과 ID (실패 시 None)
+    """
+    try:
+        # eq 조건 update는 여러 번 실행해도 결과가 같으므로 재시도 가능
+        response = call_with_policy(
+            "supabase",
+            "analysis_results.update",
+            lambda: get_supabase()
+            .table("analysis_results")
+            .update(analysis.to_row())
+            .eq("session_id", session_id)
+            .execute(),
+            idempotent=True,
+        )
+        if response.data:
+            return response.data[0]["analysis_id"]
+
+        analysis_data = _build_analysis_row(session_id, analysis)
+        _insert_idempotent("analysis_results", analysis_data)
+        return analysis_data["analysis_id"]
+
     except Exception as e:
         st.error(f"분석 결과 저장 실패: {e}")
         return None
 
 
+@traced("db.save_affinity_log")
 def save_affinity_log(session_id, partner_type, turn_index, score_change, current_score, reason=None, trigger_message=None):
     """
     호감도 변경 로그를 affinity_logs 테이블에 저장합니다.
@@ -189,22 +266,404 @@ def save_affinity_log(session_id, partner_type, turn_index, score_change, curren
         log_id: 저장된 로그 ID (실패 시 None)
     """
     try:
-        log_data = {
-            "session_id": session_id,
-            "partner_type": partner_type,
-            "turn_index": turn_index,
-            "score_change": score_change,
-            "current_score": current_score,
-            "reason": reason,
-            "trigger_message": trigger_message
-        }
-        
-        response = supabase.table("affinity_logs").insert(log_data).execute()
+        log_data = _build_affinity_log_row(
+            session_id, partner_type, turn_index, score_change, current_score, reason, trigger_message
+        )
         
-        if response.data:
-            return response.data[0]['log_id']
-        return None
+        _insert_idempotent("affinity_logs", log_data)
+        return log_data["log_id"]
 
     except Exception as e:
         st.error(f"호감도 로그 저장 실패: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def fetch_table_page(table, after_key=None, limit=500, columns="*"):
+    """
+    테이블을 기본 키(TABLE_PRIMARY_KEYS) 순서로 한 페이지씩 조회합니다. (키셋 페이지네이션)
+    offset과 달리 뒤쪽 페이지도 인덱스 범위 조회 한 번이므로 전체를 훑어도 페이지당 비용이 같습니다.
+    
+    Args:
+        table: 테이블 이름
+        after_key: 이전 페이지의 마지막 기본 키 값 (None이면 처음부터)
+        limit: 페이지 크기
+        columns: 조회할 컬럼 (select 문법, 기본 키 포함 필요)
+    
+    Returns:
+        list: 행 리스트 (마지막 페이지 이후에는 빈 리스트)
+    """
+    key = TABLE_PRIMARY_KEYS[table]
+
+    def request():
+        query = get_supabase().table(table).select(columns).order(key).limit(limit)
+        if after_key is not None:
+            query = query.gt(key, after_key)
+        return query.execute()
+
+    return call_with_policy("supabase", f"{table}.select", request, idempotent=True).data or []
+
+
+def fetch_chat_logs_page(after_log_id=None, limit=500):
+    """
+    chat_logs를 log_id 순서로 한 페이지씩 조회합니다. (키셋 페이지네이션)
+    
+    Args:
+        after_log_id: 이전 페이지의 마지막 log_id (None이면 처음부터)
+        limit: 페이지 크기
+    
+    Returns:
+        list: chat_logs 행 리스트 (마지막 페이지 이후에는 빈 리스트)
+    """
+    return fetch_table_page("chat_logs", after_key=after_log_id, limit=limit)
+
+
+def fetch_rows_for_sessions(table, session_ids, columns="*"):
+    """
+    여러 세션의 행을 session_id in (...) 조건 한 번으로 조회합니다. (세션 페이지 단위로 읽는 backfill 등에서 사용)
+    session_ids가 요청 URL에 들어가므로 한 번에 수백 개 이내로 넘깁니다.
+    
+    Args:
+        table: session_id 컬럼이 있는 테이블 이름
+        session_ids: 게임 세션 ID 리스트
+        columns: 조회할 컬럼 (select 문법)
+    
+    Returns:
+        list: 행 리스트 (순서 보장 없음)
+    """
+    if not session_ids:
+        return []
+    return call_with_policy(
+        "supabase",
+        f"{table}.select",
+        lambda: get_supabase().table(table).select(columns).in_("session_id", list(session_ids)).execute(),
+        idempotent=True,
+    ).data or []
+
+
+# ---------------------------------------------------------
+# 행(row) 생성 헬퍼 - 동기 저장과 write-behind 큐가 함께 사용
+# (기본 키를 클라이언트에서 생성하여 insert를 멱등하게 만듦)
+# ---------------------------------------------------------
+def _build_chat_log_row(session_id, partner_type, chat_history, turn_count):
+    # system 메시지 제외한 대화만 저장
+    filtered_history = [msg for msg in chat_history if msg["role"] != "system"]
+    
+    return {
+        "log_id": _new_id(),
+        "session_id": session_id,
+        "partner_type": partner_type,
+        "chat_history": filtered_history,
+        "turn_count": turn_count
+    }
+
+
+def _build_analysis_row(session_id, analysis):
+    # AnalysisResult의 필드가 analysis_results 컬럼과 1:1로 대응
+    return {
+        "analysis_id": _new_id(),
+        "session_id": session_id,
+        **analysis.to_row(),
+    }
+
+
+def _build_affinity_log_row(session_id, partner_type, turn_index, score_change, current_score, reason=None, trigger_message=None):
+    return {
+        "log_id": _new_id(),
+        "session_id": session_id,
+        "partner_type": partner_type,
+        "turn_index": turn_index,
+        "score_change": score_change,
+        "current_score": current_score,
+        "reason": reason,
+        "trigger_message": trigger_message
+    }
+
+
+# ---------------------------------------------------------
+# Write-behind 큐 (비동기 배치 저장)
+# ---------------------------------------------------------
+class WriteBehindQueue:
+    """
+    Supabase 쓰기를 메모리 큐에 쌓아두고 백그라운드 스레드에서 배치로 반영합니다.
+
+    작업은 큐에 들어온 순서대로 반영하며, 연속된 같은 테이블의 insert는 여러 행을
+    한 번의 요청으로 묶어 보내고 실패 시 지수 백오프로 재시도합니다. insert는 클라이언트에서
+    만든 기본 키로 upsert(ignore_duplicates)하므로 재시도해도 중복 행이 생기지 않습니다.
+    재시도를 모두 소진한 다중 행 배치는 반씩 나눠 다시 보내(split_batches) 문제 행만 버립니다.
+    큐가 가득 차거나 재시도를 모두 소진한 행은 버려지고 dropped_rows 카운터에 집계되며,
+    Supabase 서킷 브레이커가 열려 있는 동안의 행은 저장을 건너뛰고 skipped_rows에 집계됩니다.
+    """
+
+    def __init__(
+        self,
+        get_client,
+        batch_size=50,
+        flush_interval=0.5,
+        max_queue_size=10000,
+        max_retries=4,
+        base_backoff=0.5,
+    ):
+        """
+        Args:
+            get_client: Supabase 클라이언트를 반환하는 함수 (flush 시점에 호출)
+            batch_size: 한 번에 꺼내서 처리할 최대 작업 수
+            flush_interval: 새 작업을 기다리는 최대 시간(초)
+            max_queue_size: 큐에 쌓을 수 있는 최대 작업 수
+            max_retries: 배치당 최대 재시도 횟수
+            base_backoff: 첫 재시도 대기 시간(초), 이후 2배씩 증가
+        """
+        self.get_client = get_client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued_rows": 0,
+            "flushed_rows": 0,
+            "dropped_rows": 0,
+            "skipped_rows": 0,
+            "flushed_batches": 0,
+            "retries": 0,
+            "split_batches": 0,
+            "last_flush_latency_ms": 0.0,
+            "max_flush_latency_ms": 0.0,
+            "total_flush_latency_ms": 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="db-write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _put(self, op):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(op)
+        except queue.Full:
+            self._record(dropped_rows=1)
+            print(f"[write-behind] 큐가 가득 차서 {op[1]} 행을 버립니다.")
+            return False
+        self._record(enqueued_rows=1)
+        return True
+
+    def enqueue_insert(self, table, row):
+        """insert할 행을 큐에 추가합니다. 큐가 가득 차면 False를 반환합니다."""
+        return self._put(("insert", table, row))
+
+    def enqueue_update(self, table, values, match_column, match_value):
+        """update 작업을 큐에 추가합니다. 큐가 가득 차면 False를 반환합니다."""
+        return self._put(("update", table, values, (match_column, match_value)))
+
+    def flush(self):
+        """현재 큐에 쌓인 작업이 모두 처리될 때까지 기다립니다."""
+        if self._thread and self._thread.is_alive():
+            self._queue.join()
+
+    def shutdown(self, timeout=10.0):
+        """남은 작업을 반영한 뒤 워커 스레드를 종료합니다."""
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"[write-behind] 종료 시간 초과: {self._queue.qsize()}건 미반영")
+
+    def get_stats(self):
+        """큐 깊이, 배치 지연 시간, 버려진 행 수 등의 카운터를 반환합니다."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        batches = stats["flushed_batches"]
+        stats["avg_flush_latency_ms"] = (
+            stats["total_flush_latency_ms"] / batches if batches else 0.0
+        )
+        return stats
+
+    def _record(self, **deltas):
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return
+                continue
+
+            ops = [first]
+            while len(ops) < self.batch_size:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._process(ops)
+            finally:
+                for _ in ops:
+                    self._queue.task_done()
+
+    def _process(self, ops):
+        try:
+            client = self.get_client()
+        except Exception as e:
+            print(f"[write-behind] 클라이언트 생성 실패, {len(ops)}행을 버립니다: {e}")
+            self._record(dropped_rows=len(ops))
+            return
+
+        # 큐 순서대로 실행: 연속된 같은 테이블의 insert만 다중 행 insert로 묶고, update는 개별 실행
+        i = 0
+        while i < len(ops):
+            op = ops[i]
+            if op[0] == "update":
+                _, table, values, (column, value) = op
+                self._execute(
+                    f"{table} update",
+                    1,
+                    lambda: client.table(table).update(values).eq(column, value).execute(),
+                )
+                i += 1
+                continue
+
+            table = op[1]
+            rows = []
+            while i < len(ops) and ops[i][0] == "insert" and ops[i][1] == table:
+                rows.append(ops[i][2])
+                i += 1
+            self._insert_rows(client, table, rows)
+
+    def _insert_rows(self, client, table, rows, split=False):
+        """
+        행들을 다중 행 upsert 한 번으로 보냅니다. 재시도를 모두 소진하면 반으로 나눠 다시 보내
+        (나눈 배치는 이미 재시도한 요청이므로 한 번씩만 시도) 제약 조건 위반 같은 문제 행만 버립니다.
+        """
+        sent = self._execute(
+            f"{table} insert",
+            len(rows),
+            lambda: client.table(table)
+            .upsert(rows, on_conflict=TABLE_PRIMARY_KEYS[table], ignore_duplicates=True)
+            .execute(),
+            max_retries=0 if split else self.max_retries,
+            drop_on_failure=len(rows) == 1,
+            record_failure=not split,
+        )
+        if sent or len(rows) == 1:
+            return
+        self._record(split_batches=1)
+        mid = len(rows) // 2
+        self._insert_rows(client, table, rows[:mid], split=True)
+        self._insert_rows(client, table, rows[mid:], split=True)
+
+    def _execute(self, label, row_count, request, max_retries=None, drop_on_failure=True, record_failure=True):
+        """
+        Returns:
+            bool: 반영했거나 서킷이 열려 건너뛰었으면 True, 재시도를 모두 소진했으면 False
+                  (drop_on_failure이면 이때 행을 버린 것으로 집계)
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+        breaker = get_breaker("supabase")
+        if not breaker.allow():
+            # Supabase 장애 중에는 로그 저장을 건너뛰어 큐가 재시도로 막히지 않도록 함
+            self._record(skipped_rows=row_count)
+            return True
+
+        for attempt in range(max_retries + 1):
+            started = time.perf_counter()
+            try:
+                request()
+            except Exception as e:
+                if attempt == max_retries:
+                    if record_failure:
+                        breaker.record_failure()
+                    else:
+                        breaker.release()
+                    if drop_on_failure:
+                        print(f"[write-behind] {label} 실패, {row_count}행을 버립니다: {e}")
+                        self._record(dropped_rows=row_count)
+                    else:
+                        print(f"[write-behind] {label} 실패, {row_count}행을 나눠서 다시 보냅니다: {e}")
+                    return False
+                self._record(retries=1)
+                # 종료 중에는 남은 작업을 빨리 비우기 위해 짧게 대기
+                backoff = self.base_backoff * (2 ** attempt)
+                if self._stop_event.is_set():
+                    backoff = min(backoff, 0.1)
+                time.sleep(backoff + random.uniform(0, backoff / 2))
+                continue
+
+            elapsed = time.perf_counter() - started
+            latency_ms = elapsed * 1000
+            record("db.write_behind_flush", elapsed)
+            breaker.record_success()
+            with self._stats_lock:
+                self._stats["flushed_rows"] += row_count
+                self._stats["flushed_batches"] += 1
+                self._stats["last_flush_latency_ms"] = latency_ms
+                self._stats["total_flush_latency_ms"] += latency_ms
+                self._stats["max_flush_latency_ms"] = max(
+                    self._stats["max_flush_latency_ms"], latency_ms
+                )
+            return True
+
+
+write_behind = WriteBehindQueue(get_supabase)
+atexit.register(write_behind.shutdown)
+
+
+@traced("db.queue_affinity_log")
+def queue_affinity_log(session_id, partner_type, turn_index, score_change, current_score, reason=None, trigger_message=None):
+    """
+    save_affinity_log의 fire-and-forget 버전. 응답을 기다리지 않고 큐에 넣습니다.
+    
+    Returns:
+        bool: 큐에 정상적으로 추가되었는지 여부
+    """
+    row = _build_affinity_log_row(
+        session_id, partner_type, turn_index, score_change, current_score, reason, trigger_message
+    )
+    return write_behind.enqueue_insert("affinity_logs", row)
+
+
+def queue_chat_log(session_id, partner_type, chat_history, turn_count):
+    """save_chat_log의 fire-and-forget 버전"""
+    row = _build_chat_log_row(session_id, partner_type, chat_history, turn_count)
+    return write_behind.enqueue_insert("chat_logs", row)
+
+
+def queue_analysis_result(session_id, analysis):
+    """save_analysis_result의 fire-and-forget 버전"""
+    row = _build_analysis_row(session_id, analysis)
+    return write_behind.enqueue_insert("analysis_results", row)
+
+
+def queue_game_session_update(session_id, final_choice, my_persona, ideal_preference):
+    """update_game_session의 fire-and-forget 버전"""
+    update_data = {
+        "final_choice": final_choice,
+        "my_persona": my_persona,
+        "ideal_preference": ideal_preference
+    }
+    return write_behind.enqueue_update("game_sessions", update_data, "session_id", session_id)
+
+
+def get_write_behind_stats():
+    """write-behind 큐의 카운터(queue_depth, flush 지연, dropped_rows 등)를 반환합니다."""
+    return write_behind.get_stats()
@@ -0,0 +1,214 @@
+"""
+임베딩 영구 캐시 모듈
+
+문서 텍스트의 해시를 키로 임베딩 벡터를 디스크에 저장합니다.
+재인덱싱, 컬렉션 마이그레이션, HNSW 파라미터 실험 시 바뀌지 않은 문서의
+임베딩을 다시 계산하지 않고 재사용하기 위해 사용합니다.
+
+저장 구조 (store_dir 아래):
+- vectors.f32: float32 행렬 (memmap, 행 = 문서 하나)
+- index.sqlite: 텍스트 해시 → 행 번호 인덱스 및 메타데이터(모델명, 차원, 행 수)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """텍스트 해시 기반 임베딩 저장소 (memmap float32 행렬 + sqlite 인덱스)"""
+
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.sqlite"
+
+    def __init__(self, store_dir: str, model_name: str, initial_capacity: int = 1024):
+        """
+        Args:
+            store_dir: 저장 디렉토리
+            model_name: 임베딩 모델 이름 (저장된 모델과 다르면 캐시를 초기화)
+            initial_capacity: 처음 할당할 행 수
+        """
+        self.store_dir = Path(store_dir)
+        self.model_name = model_name
+        self.initial_capacity = initial_capacity
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.store_dir / self.VECTORS_FILE
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+
+        self._db = sqlite3.connect(
+            str(self.store_dir / self.INDEX_FILE), check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+        )
+        self._db.commit()
+
+        stored_model = self._get_meta("model_name")
+        if stored_model is not None and stored_model != model_name:
+            print(
+                f"Embedding cache model changed ({stored_model} -> {model_name}), resetting cache"
+            )
+            self._reset()
+        self._set_meta("model_name", model_name)
+
+        stored_dim = self._get_meta("dim")
+        if stored_dim is not None:
+            self.dim = int(stored_dim)
+            self._open_matrix()
+        self._rows = int(self._get_meta("rows") or 0)
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """문서 텍스트의 캐시 키를 계산합니다."""
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        텍스트별 임베딩을 조회합니다. 캐시에 없으면 해당 위치는 None입니다.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        with self._lock:
+            rows = self._lookup_rows(hashes)
+            results = []
+            for text_hash in hashes:
+                row = rows.get(text_hash)
+                if row is None or self._matrix is None:
+                    results.append(None)
+                else:
+                    results.append(self._matrix[row].tolist())
+        found = sum(1 for vector in results if vector is not None)
+        self.hits += found
+        self.misses += len(results) - found
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """텍스트별 임베딩을 저장합니다. 이미 있는 텍스트는 건너뜁니다."""
+        if not texts:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(array.shape[1])
+                self._set_meta("dim", str(self.dim))
+            elif array.shape[1] != self.dim:
+                print(
+                    f"Embedding dimension changed ({self.dim} -> {array.shape[1]}), resetting cache"
+                )
+                self._reset()
+                self.dim = int(array.shape[1])
+                self._set_meta("dim", str(self.dim))
+
+            hashes = [self.text_hash(text) for text in texts]
+            existing = self._lookup_rows(hashes)
+            new_items = {}
+            for text_hash, vector in zip(hashes, array):
+                if text_hash not in existing and text_hash not in new_items:
+                    new_items[text_hash] = vector
+            if not new_items:
+                return
+
+            self._ensure_capacity(self._rows + len(new_items))
+            start = self._rows
+            self._matrix[start : start + len(new_items)] = np.stack(list(new_items.values()))
+            self._matrix.flush()
+
+            self._db.executemany(
+                "INSERT INTO vectors (hash, row) VALUES (?, ?)",
+                [(text_hash, start + i) for i, text_hash in enumerate(new_items)],
+            )
+            self._rows = start + len(new_items)
+            self._set_meta("rows", str(self._rows))
+
+    def stats(self) -> Dict:
+        """저장된 벡터 수와 조회 적중률을 반환합니다."""
+        total = self.hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "dim": self.dim,
+            "rows": self._rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            self._db.close()
+
+    def _lookup_rows(self, hashes: List[str]) -> Dict[str, int]:
+        rows = {}
+        # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i : i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for text_hash, row in self._db.execute(
+                f"SELECT hash, row FROM vectors WHERE hash IN ({placeholders})", chunk
+            ):
+                rows[text_hash] = row
+        return rows
+
+    def _open_matrix(self) -> None:
+        row_bytes = self.dim * 4
+        size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        capacity = size // row_bytes
+        if capacity == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+
+    def _ensure_capacity(self, rows_needed: int) -> None:
+        capacity = self._matrix.shape[0] if self._matrix is not None else 0
+        if rows_needed <= capacity:
+            return
+
+        new_capacity = max(rows_needed, capacity * 2, self.initial_capacity)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self._open_matrix()
+
+    def _reset(self) -> None:
+        self._matrix = None
+        if self._vectors_path.exists():
+            os.remove(self._vectors_path)
+        self._db.execute("DELETE FROM vectors")
+        self._db.execute("DELETE FROM meta")
+        self._db.commit()
+        self.dim = None
+        self._rows = 0
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+        self._db.commit()
@@ -0,0 +1,542 @@
+"""
+외부 백엔드 대역(Fake) 모듈
+
+테스트, 오프라인 실행, 부하 테스트(BACKEND_MODE=fake)에서 실제 서비스 대신 사용할 수 있는
+메모리 기반 구현을 제공합니다.
+
+- FakeSupabaseClient: 테이블별 행을 메모리에 저장 (insert/upsert/update/select)
+- FakeOpenAI: chat.completions.create를 흉내내는 JSON 응답 생성기 (스트리밍, usage 포함)
+- InMemoryChromaService: 디스크에 저장하지 않는 ChromaDB 컬렉션 + 해시 임베딩
+
+모든 대역은 LatencyModel로 지연 분포를 주입할 수 있습니다.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional, Union
+
+import chromadb
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction
+from chromadb.config import Settings as ChromaSettings
+
+from config.settings import TABLE_PRIMARY_KEYS as PRIMARY_KEYS
+from services.chroma_service import ChromaService
+
+
+class LatencyModel:
+    """
+    요청 지연 시간 분포
+
+    spec 형식 (초 단위):
+        "0" 또는 "0.2"          고정 지연
+        "uniform:0.1:0.5"       최소~최대 균등 분포
+        "lognormal:0.6:0.4"     중앙값 0.6초, sigma 0.4의 로그정규 분포 (긴 꼬리)
+    """
+
+    def __init__(self, kind: str = "constant", a: float = 0.0, b: float = 0.0, seed: Optional[int] = None):
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"지원하지 않는 지연 분포입니다: {kind}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, int, "LatencyModel", None], seed: Optional[int] = None) -> "LatencyModel":
+        """spec 문자열(또는 숫자)로 LatencyModel을 만듭니다."""
+        if isinstance(spec, LatencyModel):
+            return spec
+        if spec is None or isinstance(spec, (int, float)):
+            return cls("constant", float(spec or 0.0), seed=seed)
+        parts = str(spec).strip().split(":")
+        if len(parts) == 1:
+            return cls("constant", float(parts[0] or 0.0), seed=seed)
+        if len(parts) != 3:
+            raise ValueError(f"지연 분포 형식이 올바르지 않습니다: {spec}")
+        return cls(parts[0], float(parts[1]), float(parts[2]), seed=seed)
+
+    def sample(self) -> float:
+        """지연 시간 하나를 뽑습니다."""
+        if self.kind == "constant":
+            return self.a
+        with self._lock:
+            if self.kind == "uniform":
+                return self._random.uniform(self.a, self.b)
+            return self._random.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+
+    def sleep(self) -> float:
+        """지연 시간을 뽑아 그만큼 대기하고, 대기한 시간을 반환합니다."""
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def __repr__(self):
+        if self.kind == "constant":
+            return f"LatencyModel({self.a:g})"
+        return f"LatencyModel({self.kind}:{self.a:g}:{self.b:g})"
+
+
+class FakeResponse:
+    """supabase-py의 APIResponse처럼 data 속성만 가진 응답 객체"""
+
+    def __init__(self, data: List[Dict]):
+        self.data = data
+
+
+class FakeQuery:
+    """table(...) 이후의 체이닝 호출(select/insert/upsert/update/eq/in_/gt/order/limit/execute)을 흉내냅니다."""
+
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._action = None
+        self._payload = None
+        self._filters = []
+        self._ignore_duplicates = False
+        self._order = None
+        self._limit = None
+
+    def select(self, columns: str = "*"):
+        self._action = "select"
+        self._payload = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, rows):
+        self._action = "insert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: Optional[str] = None, ignore_duplicates: bool = False):
+        # 기본 키 충돌만 지원 (on_conflict는 기본 키 컬럼으로 간주)
+        self._action = "upsert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: Dict):
+        self._action = "update"
+        self._payload = values
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append((column, lambda row_value: row_value == value))
+        return self
+
+    def in_(self, column: str, values):
+        allowed = set(values)
+        self._filters.append((column, lambda row_value: row_value in allowed))
+        return self
+
+    def gt(self, column: str, value):
+        self._filters.append((column, lambda row_value: row_value is not None and row_value > value))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _matches(self, row: Dict) -> bool:
+        return all(predicate(row.get(column)) for column, predicate in self._filters)
+
+    def execute(self) -> FakeResponse:
+        self._client._before_request()
+        with self._client._lock:
+            rows = self._client.tables.setdefault(self._table, [])
+
+            if self._action == "insert":
+                pk = PRIMARY_KEYS.get(self._table, "id")
+                inserted = []
+                for row in self._payload:
+                    stored = dict(row)
+                    stored.setdefault(pk, str(uuid.uuid4()))
+                    rows.append(stored)
+                    inserted.append(dict(stored))
+                return FakeResponse(inserted)
+
+            if self._action == "upsert":
+                pk = PRIMARY_KEYS.get(self._table, "id")
+                by_key = {row.get(pk): row for row in rows}
+                written = []
+                for row in self._payload:
+                    stored = dict(row)
+                    stored.setdefault(pk, str(uuid.uuid4()))
+                    existing = by_key.get(stored[pk])
+                    if existing is None:
+                        rows.append(stored)
+                        by_key[stored[pk]] = stored
+                    elif self._ignore_duplicates:
+                        continue
+                    else:
+                        existing.update(stored)
+                        stored = existing
+                    written.append(dict(stored))
+                return FakeResponse(written)
+
+            if self._action == "select":
+                selected = [row for row in rows if self._matches(row)]
+                if self._order is not None:
+                    column, desc = self._order
+                    selected.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+                if self._limit is not None:
+                    selected = selected[: self._limit]
+                if self._payload is None:
+                    return FakeResponse([dict(row) for row in selected])
+                return FakeResponse([{c: row.get(c) for c in self._payload} for row in selected])
+
+            if self._action == "update":
+                updated = []
+                for row in rows:
+                    if self._matches(row):
+                        row.update(self._payload)
+                        updated.append(dict(row))
+                return FakeResponse(updated)
+
+        raise ValueError(f"지원하지 않는 작업입니다: {self._action}")
+
+
+class FakeSupabaseClient:
+    """
+    메모리에 행을 저장하는 Supabase 클라이언트 대역
+
+    Args:
+        latency: 요청당 지연 시간(초) 또는 LatencyModel spec
+        failure_rate: 요청이 예외를 던질 확률 (0.0 ~ 1.0)
+        seed: 실패 재현을 위한 난수 시드
+    """
+
+    def __init__(self, latency: Union[float, str, LatencyModel] = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = LatencyModel.parse(latency, seed=seed)
+        self.failure_rate = failure_rate
+        self.tables: Dict[str, List[Dict]] = {}
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def _before_request(self) -> None:
+        with self._lock:
+            self.request_count += 1
+            should_fail = self._random.random() < self.failure_rate
+        self.latency.sleep()
+        if should_fail:
+            raise ConnectionError("FakeSupabaseClient: injected failure")
+
+
+# ---------------------------------------------------------
+# OpenAI
+# ---------------------------------------------------------
+_FAKE_REPLIES = (
+    "오 정말요? 그 얘기 더 듣고 싶어요 ㅎㅎ",
+    "음... 그렇게 생각할 수도 있겠네요. 이유가 궁금해요.",
+    "하하 재밌으시네요! 저도 그런 적 있어요.",
+    "그건 좀 의외인데요? 평소에도 그러세요?",
+    "아 진짜요? 저는 반대로 생각했는데 ㅋㅋ",
+)
+
+
+def _approx_tokens(text: str) -> int:
+    # 한국어 기준 대략 2글자당 1토큰 (부하 테스트용 근사치)
+    return max(1, len(text) // 2)
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        return self._owner._create(model, messages, stream, kwargs)
+
+
+class FakeOpenAI:
+    """
+    OpenAI 클라이언트 대역 (chat.completions.create만 지원)
+
+    시스템 프롬프트로 요청 종류(채팅/라운드 요약/최종 분석)를 구분해 각 화면이 기대하는
+    JSON을 돌려주고, prompt_cache_key가 반복되면 실제 API처럼 cached_tokens를 채웁니다.
+
+    Args:
+        latency: 첫 토큰까지의 지연 (LatencyModel spec)
+        token_interval: 스트리밍 청크 사이 지연 (LatencyModel spec)
+        failure_rate: 요청이 예외를 던질 확률
+        seed: 응답/점수/실패 재현을 위한 난수 시드
+    """
+
+    def __init__(
+        self,
+        latency: Union[float, str, LatencyModel] = 0.0,
+        token_interval: Union[float, str, LatencyModel] = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = LatencyModel.parse(latency, seed=seed)
+        self.token_interval = LatencyModel.parse(token_interval, seed=seed)
+        self.failure_rate = failure_rate
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._seen_cache_keys = set()
+        self._lock = threading.Lock()
+
+    def _content_for(self, messages: List[Dict]) -> str:
+        # 순환 import를 피하기 위해 함수 안에서 import
+        from config.prompts import get_analysis_prompt, get_round_digest_prompt
+
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        with self._lock:
+            rng = random.Random(self._random.random())
+        if system == get_round_digest_prompt():
+            return json.dumps(
+                {
+                    "question_frequency": "보통 - 가끔 질문함",
+                    "effort": "보통 - 짧은 문장 위주",
+                    "vocabulary": "혼합 - 감정/논리 어휘 모두 사용",
+                    "conflict_response": "",
+                    "chemistry": "무난하게 이어짐",
+                    "user_quotes": [m["content"][:40] for m in messages if m["role"] == "user"][-2:],
+                },
+                ensure_ascii=False,
+            )
+        if system == get_analysis_prompt():
+            types = ["EMOTIONAL", "LOGICAL", "TOUGH"]
+            return json.dumps(
+                {
+                    "my_persona": {
+                        "style": "차분한 경청자",
+                        "type": rng.choice(types),
+                        "keywords": ["경청", "공감", "호기심"],
+                        "strength": "상대의 말을 끝까지 듣습니다.",
+                        "weakness": "자기 이야기를 잘 하지 않습니다.",
+                    },
+                    "compatibility": {
+                        "best_match": rng.choice(types),
+                        "best_reason": "대화 흐름이 가장 자연스러웠습니다.",
+                        "similar_style": rng.choice(types),
+                        "similar_chemistry": "편안하지만 밋밋할 수 있습니다.",
+                        "opposite_style": rng.choice(types),
+                        "opposite_chemistry": "서로 보완이 됩니다.",
+                    },
+                    "insights": {
+                        "positive": "질문으로 대화를 이어갔습니다.",
+                        "improvement": "자신의 경험을 더 이야기해 보세요.",
+                        "dating_tip": "상대의 말에 감정을 담아 반응해 보세요.",
+                        "warning": "",
+                    },
+                    "summary": "부하 테스트용 가짜 분석 결과입니다.",
+                },
+                ensure_ascii=False,
+            )
+        return json.dumps(
+            {
+                "response": rng.choice(_FAKE_REPLIES),
+                "score": rng.randint(-5, 10),
+                "reason": "부하 테스트용 가짜 응답",
+            },
+            ensure_ascii=False,
+        )
+
+    def _usage(self, messages: List[Dict], content: str, cache_key: Optional[str]):
+        prompt_tokens = sum(_approx_tokens(m["content"]) + 4 for m in messages)
+        cached = 0
+        with self._lock:
+            if cache_key is not None:
+                if cache_key in self._seen_cache_keys and messages:
+                    # 실제 API처럼 1024토큰 이상 prefix를 128토큰 단위로 캐시
+                    prefix = _approx_tokens(messages[0]["content"])
+                    cached = (prefix // 128) * 128 if prefix >= 1024 else 0
+                self._seen_cache_keys.add(cache_key)
+        return SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=_approx_tokens(content),
+            total_tokens=prompt_tokens + _approx_tokens(content),
+            prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+        )
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.request_count += 1
+            return self._random.random() < self.failure_rate
+
+    def _build(self, model: str, messages: List[Dict], stream: bool, kwargs: Dict):
+        """응답 객체(stream=False) 또는 (청크 리스트, usage)를 만듭니다."""
+        content = self._content_for(messages)
+        usage = self._usage(messages, content, kwargs.get("prompt_cache_key"))
+        if not stream:
+            message = SimpleNamespace(role="assistant", content=content)
+            return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)], usage=usage)
+        include_usage = (kwargs.get("stream_options") or {}).get("include_usage", False)
+        chunk_chars = 4
+        chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=content[i : i + chunk_chars]))], usage=None)
+            for i in range(0, len(content), chunk_chars)
+        ]
+        if include_usage:
+            chunks.append(SimpleNamespace(choices=[], usage=usage))
+        return chunks
+
+    def _create(self, model: str, messages: List[Dict], stream: bool, kwargs: Dict):
+        should_fail = self._should_fail()
+        self.latency.sleep()
+        if should_fail:
+            raise ConnectionError("FakeOpenAI: injected failure")
+        built = self._build(model, messages, stream, kwargs)
+        return self._stream(built) if stream else built
+
+    def _stream(self, chunks: List[SimpleNamespace]) -> Iterator[SimpleNamespace]:
+        for i, chunk in enumerate(chunks):
+            if i and chunk.choices:
+                self.token_interval.sleep()
+            yield chunk
+
+
+class _FakeAsyncCompletions:
+    def __init__(self, owner: "FakeAsyncOpenAI"):
+        self._owner = owner
+
+    async def create(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        return await self._owner._acreate(model, messages, stream, kwargs)
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """AsyncOpenAI 대역 (LLM 게이트웨이용). 지연은 asyncio.sleep으로 주입되어 이벤트 루프를 막지 않습니다."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chat = SimpleNamespace(completions=_FakeAsyncCompletions(self))
+
+    async def _acreate(self, model: str, messages: List[Dict], stream: bool, kwargs: Dict):
+        should_fail = self._should_fail()
+        await asyncio.sleep(self.latency.sample())
+        if should_fail:
+            raise ConnectionError("FakeAsyncOpenAI: injected failure")
+        built = self._build(model, messages, stream, kwargs)
+        return self._astream(built) if stream else built
+
+    async def _astream(self, chunks: List[SimpleNamespace]):
+        for i, chunk in enumerate(chunks):
+            if i and chunk.choices:
+                await asyncio.sleep(self.token_interval.sample())
+            yield chunk
+
+
+# ---------------------------------------------------------
+# ChromaDB
+# ---------------------------------------------------------
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    문자 bigram 해시 기반 임베딩 (모델 로드 없이 결정적인 벡터 생성)
+    비슷한 글자를 공유하는 문장끼리 가까워지므로 검색 결과도 그럴듯하게 나옵니다.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: Union[float, str, LatencyModel] = 0.0):
+        self.dimensions = dimensions
+        self.latency = LatencyModel.parse(latency)
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for i in range(max(1, len(text) - 1)):
+            bucket = int.from_bytes(hashlib.blake2b(text[i : i + 2].encode("utf-8"), digest_size=4).digest(), "little")
+            vector[bucket % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def __call__(self, input: Documents) -> List[np.ndarray]:
+        self.latency.sleep()
+        return [self._embed(text) for text in input]
+
+    @staticmethod
+    def name() -> str:
+        return "fake_hashing"
+
+    def get_config(self) -> Dict:
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config: Dict) -> "HashingEmbeddingFunction":
+        return HashingEmbeddingFunction(config.get("dimensions", 256))
+
+
+_SAMPLE_SUBJECTS = ("여가", "음식", "여행", "일상", "연애")
+_SAMPLE_LINES = (
+    "주말에 뭐 했어?", "영화 보고 왔어 ㅎㅎ", "밥은 먹었어?", "아직 못 먹었어 배고파",
+    "요즘 날씨 너무 좋다", "산책 가고 싶다", "여행 가본 데 중에 어디가 좋았어?", "제주도 진짜 좋았어",
+    "오늘 회사에서 힘들었어", "고생했네 푹 쉬어", "커피 좋아해?", "라떼만 마셔 ㅋㅋ",
+)
+
+
+def make_sample_conversations(count: int = 200, seed: int = 0) -> List[Dict]:
+    """인메모리 ChromaDB에 넣을 가짜 대화 데이터를 만듭니다."""
+    rng = random.Random(seed)
+    conversations = []
+    for i in range(count):
+        lines = rng.sample(_SAMPLE_LINES, 4)
+        conversations.append(
+            {
+                "conversation_id": f"sample_{i}",
+                "platform": rng.choice(("KAKAO", "FACEBOOK")),
+                "subject": rng.choice(_SAMPLE_SUBJECTS),
+                "speaker_type": "2인",
+                "dialogue": "\n".join(f"{'AB'[j % 2]}: {line}" for j, line in enumerate(lines)),
+                "turns": lines,
+            }
+        )
+    return conversations
+
+
+class InMemoryChromaService(ChromaService):
+    """
+    디스크 대신 메모리(EphemeralClient)에 저장하는 ChromaService 대역
+    임베딩 모델 대신 HashingEmbeddingFunction을 사용하며, 임베딩에 지연을 주입할 수 있습니다.
+
+    Args:
+        latency: 임베딩 호출당 지연 (LatencyModel spec)
+        conversations: 처음에 넣을 대화 데이터 (None이면 make_sample_conversations())
+        dimensions: 임베딩 차원 수
+    """
+
+    def __init__(
+        self,
+        latency: Union[float, str, LatencyModel] = 0.0,
+        conversations: Optional[List[Dict]] = None,
+        dimensions: int = 256,
+    ):
+        self.persist_dir = ":memory:"
+        # EphemeralClient는 프로세스 안에서 저장소를 공유하므로 인스턴스마다 컬렉션 이름을 다르게 함
+        self.collection_name = f"fake-{uuid.uuid4().hex[:12]}"
+        self.embedding_model = HashingEmbeddingFunction.name()
+        self.embedding_cache_dir = None
+        self._embedding_store = None
+        self.last_ingest_stats = None
+        self.version = 0
+
+        self.client = chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False))
+        self.embedding_fn = HashingEmbeddingFunction(dimensions, latency)
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_fn,
+            metadata={"hnsw:space": "cosine"},
+        )
+
+        if conversations is None:
+            conversations = make_sample_conversations()
+        if conversations:
+            self.add_conversations(conversations, batch_size=500)
+
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        # 영구 임베딩 캐시(디스크)를 쓰지 않음
+        return [vector.tolist() for vector in self.embedding_fn(documents)]
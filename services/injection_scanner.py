@@ -0,0 +1,180 @@
+"""
+프롬프트 인젝션 스캐너 모듈
+
+설정 파일의 금지 패턴들을 정규식 대안(alternation) 하나로 컴파일하여,
+메시지를 C로 구현된 정규식 엔진으로 앞에서부터 한 번만 훑으며 모든 매칭 위치를 찾습니다.
+패턴이 모두 이스케이프된 고정 문자열이라 역추적이 폭증하지 않으므로 악의적인 입력에도 안전합니다.
+
+일반 대화처럼 패턴 첫 글자가 드문 입력에서는 패턴별 부분 문자열 검사보다 빠르지만,
+패턴 첫 글자가 빽빽한 긴 입력(무작위 영문, 패턴 접두사 반복 등)에서는 정규식 엔진이
+위치마다 분기를 시도하므로 memchr 기반 부분 문자열 검사보다 느릴 수 있습니다.
+(benchmarks/bench_injection_scanner 참고)
+
+실행 (과거 chat_logs 재검사): python -m services.injection_scanner [--limit 1000]
+"""
+
+import argparse
+import json
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class ScanMatch(NamedTuple):
+    """스캔 결과: 매칭된 규칙 ID, 패턴, 사용자에게 보여줄 경고 메시지"""
+
+    rule_id: str
+    pattern: str
+    message: str
+
+
+def compile_alternation(patterns: List[str]) -> "re.Pattern":
+    """
+    고정 문자열 패턴들을 정규식 대안 하나로 컴파일합니다.
+
+    공통 접두사를 트라이로 묶어(예: "ignore (?:all previous|previous)") 후보 위치마다
+    시도하는 분기 수를 줄입니다. 매칭되는 문자열 집합은 단순 "|" 결합과 같습니다.
+    """
+    trie: Dict[str, dict] = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # 패턴 끝 표시
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if "" in node:
+            # 더 긴 패턴을 먼저 시도하되, 여기서 끝나는 패턴도 매칭되도록 선택적으로 둠
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return re.compile(build(trie))
+
+
+class InjectionScanner:
+    """
+    규칙 세트(JSON)로부터 만든 프롬프트 인젝션 스캐너
+
+    규칙은 우선순위 순서대로 나열되며, 여러 패턴이 동시에 매칭되면
+    앞선 규칙의 앞선 패턴이 선택됩니다. 대소문자는 구분하지 않습니다.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        """
+        Args:
+            rules: [{"id": str, "message": str, "patterns": [str, ...]}, ...]
+                   message의 {pattern}은 매칭된 패턴으로 치환됩니다.
+        """
+        self.rules = rules
+        self._matches: List[ScanMatch] = []  # 패턴 ID -> 스캔 결과 (경고 메시지는 미리 만들어 둠)
+        first_id: Dict[str, int] = {}  # 소문자 패턴 -> 가장 앞선 패턴 ID (같은 패턴이 여러 규칙에 있으면 앞선 규칙)
+        for rule in rules:
+            for pattern in rule["patterns"]:
+                if pattern:
+                    first_id.setdefault(pattern.lower(), len(self._matches))
+                self._matches.append(ScanMatch(rule["id"], pattern, rule["message"].format(pattern=pattern)))
+
+        # 한 위치에서 매칭되는 패턴들은 서로의 접두사이고 정규식은 그중 가장 긴 것을 돌려주므로,
+        # 패턴 -> 자신과 자신의 접두사인 패턴들 중 가장 앞선 ID
+        self._priority: Dict[str, int] = {
+            pattern: min(pattern_id for prefix, pattern_id in first_id.items() if pattern.startswith(prefix))
+            for pattern in first_id
+        }
+        patterns = list(first_id)  # 우선순위 순서
+        self._search = compile_alternation(patterns).search if patterns else None
+        # 패턴 ID -> 그보다 우선순위가 높은 패턴들만 찾는 정규식 (없으면 None)
+        self._higher_search: Dict[int, Optional[Callable]] = {}
+        for i, pattern in enumerate(patterns):
+            self._higher_search[first_id[pattern]] = compile_alternation(patterns[:i]).search if i else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "InjectionScanner":
+        """JSON 규칙 파일에서 스캐너를 만듭니다."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["rules"])
+
+    def scan(self, text: str) -> Optional[ScanMatch]:
+        """
+        메시지를 앞에서부터 한 번 훑어 가장 우선순위가 높은 매칭을 반환합니다. 없으면 None.
+
+        매칭을 찾을 때마다 그 다음 위치부터 더 앞선 패턴들만 찾는 정규식으로 이어서 훑으므로,
+        각 위치는 한 번씩만 검사하고 찾을 패턴 수는 점점 줄어듭니다.
+        """
+        if not text or self._search is None:
+            return None
+        lowered = text.lower()
+        match = self._search(lowered)
+        if match is None:
+            return None
+
+        best = self._priority[match.group()]
+        while self._higher_search[best] is not None:
+            match = self._higher_search[best](lowered, match.start() + 1)
+            if match is None:
+                break
+            best = self._priority[match.group()]
+        return self._matches[best]
+
+    def scan_many(self, texts: Iterable[str]) -> List[Optional[ScanMatch]]:
+        """여러 메시지를 일괄 검사합니다. (과거 로그 재검사 등 오프라인 용도)"""
+        return [self.scan(text) for text in texts]
+
+
+def rescan_chat_logs(scanner: InjectionScanner, limit: Optional[int] = None, page_size: int = 500) -> Counter:
+    """
+    Supabase chat_logs의 사용자 메시지를 현재 규칙 세트로 다시 검사합니다.
+
+    Returns:
+        규칙 ID별 매칭 건수
+    """
+    from services.db_service import fetch_chat_logs_page
+
+    counts = Counter()
+    scanned_logs = 0
+    after_log_id = None
+
+    while limit is None or scanned_logs < limit:
+        page = fetch_chat_logs_page(after_log_id=after_log_id, limit=page_size)
+        if not page:
+            break
+
+        for log in page:
+            user_messages = [
+                msg.get("content", "")
+                for msg in (log.get("chat_history") or [])
+                if msg.get("role") == "user"
+            ]
+            for content, match in zip(user_messages, scanner.scan_many(user_messages)):
+                if match:
+                    counts[match.rule_id] += 1
+                    print(f"[{match.rule_id}] session={log.get('session_id')} pattern={match.pattern!r}: {content[:80]}")
+            scanned_logs += 1
+            if limit is not None and scanned_logs >= limit:
+                break
+
+        after_log_id = page[-1]["log_id"]
+
+    print(f"\n검사한 로그 수: {scanned_logs}")
+    return counts
+
+
+def main(argv=None):
+    from config.settings import INJECTION_RULES_PATH
+
+    parser = argparse.ArgumentParser(description="과거 chat_logs 프롬프트 인젝션 재검사")
+    parser.add_argument("--rules", default=INJECTION_RULES_PATH, help="규칙 JSON 파일 경로")
+    parser.add_argument("--limit", type=int, default=None, help="검사할 최대 로그 수")
+    args = parser.parse_args(argv)
+
+    counts = rescan_chat_logs(InjectionScanner.from_file(args.rules), limit=args.limit)
+    for rule_id, count in counts.most_common():
+        print(f"  {rule_id}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+asyncio LLM 게이트웨이
+
+세션마다 동기 client.chat.completions.create를 호출하면 응답이 끝날 때까지 스크립트 스레드가
+소켓을 붙잡고, 동시 접속자가 늘면 스레드 수와 커넥션 수가 함께 늘어납니다.
+게이트웨이는 전용 스레드의 이벤트 루프 하나에서 AsyncOpenAI 클라이언트를 소유하고,
+세션 스레드는 요청을 넣은 뒤 Future(스트리밍은 청크 큐)로 결과만 기다립니다.
+
+- 모델별 레인(ModelLane): 동시 요청 수 한도를 적용하고, 분당 요청/토큰 수(RPM/TPM)는
+  services.rate_limiter의 토큰 버킷으로 확인합니다.
+- 우선순위: 실시간 대화(PRIORITY_CHAT) 요청이 결과 분석(PRIORITY_ANALYSIS) 요청보다 먼저 나갑니다.
+- 공정 대기열: 같은 우선순위 안에서는 세션별 큐를 돌아가며(round-robin) 하나씩 꺼내므로
+  한 세션이 요청을 많이 넣어도 다른 세션의 대기 시간이 늘지 않습니다.
+- 부하 차단: 대기열이 LLM_GATEWAY_MAX_QUEUE를 넘거나 queue_timeout 동안 실행되지 못하면
+  RateLimited(대기 순번 포함)로 거절하고, 업스트림 429는 Retry-After만큼 모델 전체를 멈춘 뒤 다시 대기열에 넣습니다.
+- 커넥션: 모든 요청이 하나의 AsyncClient 풀(LLM_GATEWAY_MAX_CONNECTIONS)을 공유합니다.
+- 지표: 대기열 대기 시간(llm_gateway.<model>.queue_wait), 대기/실행 중 요청 수, 시간 초과/거절 수.
+
+이벤트 루프 스레드만 레인 상태를 바꾸므로 레인에는 락이 없습니다.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+
+from config.settings import (
+    LLM_GATEWAY_COMPLETION_TOKENS,
+    LLM_GATEWAY_MAX_QUEUE,
+    LLM_GATEWAY_QUEUE_TIMEOUT,
+)
+from services import metrics
+from services.context_manager import count_message_tokens
+from services.rate_limiter import PRIORITY_CHAT, PRIORITY_NAMES, RateLimited, RateLimiter, get_rate_limiter
+
+_STREAM_END = object()
+_POSITION_POLL_SECONDS = 0.5  # 대기 중인 호출 스레드가 대기 순번을 확인하는 간격
+_MAX_UPSTREAM_429_REQUEUES = 2  # 업스트림 429 이후 다시 대기열에 넣는 최대 횟수
+_DEFAULT_429_PENALTY = 2.0  # Retry-After 헤더가 없을 때 모델을 멈추는 시간(초)
+
+
+class GatewayQueueTimeout(RateLimited, TimeoutError):
+    """대기열에서 queue_timeout보다 오래 기다려 실행되지 못한 요청"""
+
+
+class _Request:
+    __slots__ = (
+        "session_key", "kwargs", "tokens", "priority", "enqueued_at", "position", "requeues",
+        "opened", "chunks", "task", "cancelled",
+    )
+
+    def __init__(self, session_key: str, kwargs: Dict, tokens: int, priority: int, stream: bool):
+        self.session_key = session_key
+        self.kwargs = kwargs
+        self.tokens = tokens
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.position = 0  # 대기 순번 (1부터, 실행이 시작되면 0)
+        self.requeues = 0
+        # 비스트리밍: 응답 객체 / 스트리밍: 스트림이 열리면 None (실패 시 예외)
+        self.opened: Future = Future()
+        self.chunks: Optional[queue.Queue] = queue.Queue() if stream else None
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled = False
+
+
+class ModelLane:
+    """모델 하나의 동시 요청 한도와 우선순위별·세션별 공정 대기열"""
+
+    def __init__(self, model: str, max_concurrency: int):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.queued = 0
+        self.wakeup: Optional[asyncio.TimerHandle] = None  # 예약된 다음 pump
+        # 우선순위 -> 세션 키 -> 요청 큐
+        self._classes: "Dict[int, OrderedDict[str, deque]]" = {}
+
+    @property
+    def sessions_waiting(self) -> int:
+        return len({key for queues in self._classes.values() for key in queues})
+
+    def queued_for(self, priority: int) -> int:
+        return sum(len(requests) for requests in self._classes.get(priority, {}).values())
+
+    def _queues(self, priority: int) -> "OrderedDict[str, deque]":
+        queues = self._classes.get(priority)
+        if queues is None:
+            queues = self._classes[priority] = OrderedDict()
+        return queues
+
+    def enqueue(self, request: _Request) -> None:
+        self._queues(request.priority).setdefault(request.session_key, deque()).append(request)
+        self.queued += 1
+
+    def requeue(self, request: _Request) -> None:
+        """업스트림이 거절한 요청을 그 세션 큐의 맨 앞에 다시 넣습니다."""
+        self._queues(request.priority).setdefault(request.session_key, deque()).appendleft(request)
+        self.queued += 1
+
+    def _head_class(self) -> "OrderedDict[str, deque]":
+        return self._classes[min(priority for priority, queues in self._classes.items() if queues)]
+
+    def peek(self) -> _Request:
+        return next(iter(self._head_class().values()))[0]
+
+    def pop(self) -> _Request:
+        """가장 높은 우선순위에서 맨 앞 세션의 요청 하나를 꺼내고, 그 세션을 맨 뒤로 보냅니다. (round-robin)"""
+        queues = self._head_class()
+        session_key, requests = next(iter(queues.items()))
+        request = requests.popleft()
+        if requests:
+            queues.move_to_end(session_key)
+        else:
+            del queues[session_key]
+        self.queued -= 1
+        request.position = 0
+        return request
+
+    def expire(self, now: float, timeout: float) -> List[_Request]:
+        """timeout보다 오래 기다렸거나 취소된 요청을 대기열에서 빼고, 시간이 초과된 요청을 반환합니다."""
+        expired = []
+        for queues in self._classes.values():
+            for session_key in list(queues):
+                requests = queues[session_key]
+                kept = deque(r for r in requests if not r.cancelled and now - r.enqueued_at <= timeout)
+                expired.extend(r for r in requests if not r.cancelled and now - r.enqueued_at > timeout)
+                self.queued -= len(requests) - len(kept)
+                if kept:
+                    queues[session_key] = kept
+                else:
+                    del queues[session_key]
+        return expired
+
+    def oldest_enqueued_at(self) -> float:
+        return min(r.enqueued_at for queues in self._classes.values() for requests in queues.values() for r in requests)
+
+    def update_positions(self) -> None:
+        """꺼내질 순서(우선순위 → 세션 round-robin)대로 대기 요청의 순번을 매깁니다."""
+        position = 0
+        for priority in sorted(self._classes):
+            queues = list(self._classes[priority].values())
+            depth = max((len(requests) for requests in queues), default=0)
+            for index in range(depth):
+                for requests in queues:
+                    if index < len(requests):
+                        position += 1
+                        requests[index].position = position
+
+
+class GatewayStream:
+    """게이트웨이 스트리밍 응답을 호출한 스레드에서 순회하는 이터레이터"""
+
+    def __init__(self, gateway: "LLMGateway", request: _Request):
+        self._gateway = gateway
+        self._request = request
+        self._finished = False
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._request.chunks.get()
+                if item is _STREAM_END:
+                    self._finished = True
+                    return
+                if isinstance(item, BaseException):
+                    self._finished = True
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """소비를 중단하면 업스트림 스트림도 취소합니다."""
+        if not self._finished:
+            self._finished = True
+            self._gateway._cancel(self._request)
+
+
+class LLMGateway:
+    """
+    이벤트 루프 스레드 하나에서 모든 OpenAI 요청을 처리하는 게이트웨이
+
+    Args:
+        client_factory: AsyncOpenAI(호환) 클라이언트를 만드는 함수 (이벤트 루프 스레드에서 한 번 호출)
+        limiter: 모델별 RPM/TPM 버킷 (None이면 get_rate_limiter()의 공용 인스턴스, 동시 요청 한도도 여기서 읽음)
+        queue_timeout: 대기열에서 기다릴 최대 시간(초)
+        completion_tokens: max_tokens가 없을 때 쓰는 응답 토큰 추정치
+        max_queue: 모델·우선순위별 최대 대기 요청 수 (넘으면 대기열에 넣지 않고 거절)
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], object],
+        limiter: Optional[RateLimiter] = None,
+        queue_timeout: float = LLM_GATEWAY_QUEUE_TIMEOUT,
+        completion_tokens: int = LLM_GATEWAY_COMPLETION_TOKENS,
+        max_queue: int = LLM_GATEWAY_MAX_QUEUE,
+    ):
+        self._client_factory = client_factory
+        self._limiter = limiter
+        self.queue_timeout = queue_timeout
+        self.completion_tokens = completion_tokens
+        self.max_queue = max_queue
+        self._lanes: Dict[str, ModelLane] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._start_lock = threading.Lock()
+
+    # -----------------------------------------------------
+    # 호출 스레드 쪽 API
+    # -----------------------------------------------------
+    def _ensure_started(self) -> None:
+        if self._loop is not None:
+            return
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready: Future = Future()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                try:
+                    self._client = self._client_factory()
+                except Exception as e:
+                    ready.set_exception(e)
+                    loop.close()
+                    return
+                ready.set_result(None)
+                loop.run_forever()
+
+            threading.Thread(target=run, name="llm-gateway", daemon=True).start()
+            ready.result()
+            self._loop = loop
+
+    def estimate_tokens(self, kwargs: Dict) -> int:
+        """요청 하나가 쓸 토큰 수 추정치 (입력 메시지 + max_tokens 또는 응답 추정치)"""
+        completion = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or self.completion_tokens
+        return count_message_tokens(kwargs.get("messages", [])) + completion
+
+    @property
+    def limiter(self) -> RateLimiter:
+        if self._limiter is None:
+            self._limiter = get_rate_limiter()
+        return self._limiter
+
+    def create(
+        self,
+        session_key: str,
+        priority: int = PRIORITY_CHAT,
+        on_queued: Optional[Callable[[int], None]] = None,
+        **kwargs,
+    ):
+        """
+        chat.completions.create와 같은 인자로 요청을 넣고 결과를 기다립니다.
+
+        Args:
+            session_key: 공정 대기열에서 요청을 구분할 호출자 키 (Streamlit 세션 ID 등)
+            priority: PRIORITY_CHAT(실시간 대화) 또는 PRIORITY_ANALYSIS(결과 분석)
+            on_queued: 대기 중일 때 대기 순번(1부터)이 바뀔 때마다 호출 스레드에서 호출할 함수
+
+        Returns:
+            stream=True이면 GatewayStream (스트림이 열린 뒤 반환), 아니면 응답 객체
+
+        Raises:
+            RateLimited: 대기열이 가득 찼거나 업스트림 429가 반복된 경우
+            GatewayQueueTimeout: 대기열에서 queue_timeout을 넘긴 경우 (RateLimited의 하위 클래스)
+            Exception: 업스트림 오류
+        """
+        self._ensure_started()
+        request = _Request(
+            session_key, kwargs, self.estimate_tokens(kwargs), priority, kwargs.get("stream", False)
+        )
+        self._loop.call_soon_threadsafe(self._enqueue, request)
+        result = self._wait_opened(request, on_queued)
+        if request.chunks is None:
+            return result
+        return GatewayStream(self, request)
+
+    @staticmethod
+    def _wait_opened(request: _Request, on_queued: Optional[Callable[[int], None]]):
+        if on_queued is None:
+            return request.opened.result()
+        reported = 0
+        while True:
+            try:
+                return request.opened.result(timeout=_POSITION_POLL_SECONDS)
+            except FutureTimeoutError:
+                if request.opened.done():
+                    raise  # 요청 자체가 GatewayQueueTimeout(TimeoutError)으로 끝난 경우
+                position = request.position
+                if position and position != reported:
+                    reported = position
+                    on_queued(position)
+
+    def _cancel(self, request: _Request) -> None:
+        request.cancelled = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cancel_task, request)
+
+    # -----------------------------------------------------
+    # 이벤트 루프 쪽
+    # -----------------------------------------------------
+    def _lane(self, model: str) -> ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = ModelLane(model, self.limiter.limits(model)["max_concurrency"])
+        return lane
+
+    def _enqueue(self, request: _Request) -> None:
+        lane = self._lane(request.kwargs.get("model", ""))
+        metrics.increment(f"llm_gateway.{lane.model}.requests")
+        waiting = lane.queued_for(request.priority)
+        if waiting >= self.max_queue:
+            # 대기열이 가득 차면 기다리게 하지 않고 대기 순번과 함께 바로 거절
+            metrics.increment(f"llm_gateway.{lane.model}.{PRIORITY_NAMES.get(request.priority, request.priority)}.shed")
+            request.opened.set_exception(
+                RateLimited(f"{lane.model} 대기열이 가득 찼습니다.", position=lane.queued + 1)
+            )
+            return
+        lane.enqueue(request)
+        self._pump(lane)
+
+    @staticmethod
+    def _cancel_task(request: _Request) -> None:
+        if request.task is not None and not request.task.done():
+            request.task.cancel()
+
+    def _wake(self, lane: ModelLane) -> None:
+        lane.wakeup = None
+        self._pump(lane)
+
+    def _schedule_wake(self, lane: ModelLane, delay: float) -> None:
+        """delay초 뒤에 pump를 예약합니다. 이미 더 이른 예약이 있으면 그대로 둡니다."""
+        when = self._loop.time() + delay
+        if lane.wakeup is not None:
+            if lane.wakeup.when() <= when:
+                return
+            lane.wakeup.cancel()
+        lane.wakeup = self._loop.call_at(when, self._wake, lane)
+
+    def _pump(self, lane: ModelLane) -> None:
+        """한도 안에서 대기열의 요청을 세션 순서대로 실행합니다."""
+        now = time.monotonic()
+        for request in lane.expire(now, self.queue_timeout):
+            metrics.increment(f"llm_gateway.{lane.model}.queue_timeouts")
+            request.opened.set_exception(
+                GatewayQueueTimeout(
+                    f"{lane.model} 대기열에서 {self.queue_timeout:.0f}초를 넘겨 요청을 취소했습니다.",
+                    position=request.position or None,
+                )
+            )
+
+        delay = 0.0
+        while lane.in_flight < lane.max_concurrency and lane.queued:
+            head = lane.peek()
+            delay = self.limiter.try_acquire(lane.model, head.tokens, head.priority)
+            if delay > 0:
+                break
+            request = lane.pop()
+            lane.in_flight += 1
+            request.task = self._loop.create_task(self._execute(lane, request))
+
+        if lane.queued:
+            # RPM/TPM 버킷이 다시 찰 때, 또는 가장 오래 기다린 요청의 queue_timeout이 끝날 때 다시 확인
+            wake_in = self.queue_timeout - (now - lane.oldest_enqueued_at()) + 0.001
+            self._schedule_wake(lane, max(0.0, min(wake_in, delay) if delay > 0 else wake_in))
+        lane.update_positions()
+        metrics.set_gauge(f"llm_gateway.{lane.model}.queued", lane.queued)
+        metrics.set_gauge(f"llm_gateway.{lane.model}.in_flight", lane.in_flight)
+
+    def _settle_usage(self, lane: ModelLane, request: _Request, usage) -> None:
+        # 추정치로 미리 차감한 토큰을 실제 사용량으로 보정
+        if usage is not None and usage.prompt_tokens is not None:
+            actual = usage.prompt_tokens + (usage.completion_tokens or 0)
+            self.limiter.adjust(lane.model, actual - request.tokens)
+
+    @staticmethod
+    async def _close_stream(response) -> None:
+        close = getattr(response, "close", None) or getattr(response, "aclose", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def _execute(self, lane: ModelLane, request: _Request) -> None:
+        metrics.observe(f"llm_gateway.{lane.model}.queue_wait", time.monotonic() - request.enqueued_at)
+        response = None
+        try:
+            response = await self._client.chat.completions.create(**request.kwargs)
+            if request.chunks is None:
+                self._settle_usage(lane, request, getattr(response, "usage", None))
+                request.opened.set_result(response)
+                return
+            request.opened.set_result(None)
+            async for chunk in response:
+                if chunk.usage is not None:
+                    self._settle_usage(lane, request, chunk.usage)
+                request.chunks.put(chunk)
+            request.chunks.put(_STREAM_END)
+        except asyncio.CancelledError:
+            metrics.increment(f"llm_gateway.{lane.model}.cancelled")
+            if response is not None and request.chunks is not None:
+                await self._close_stream(response)
+            if not request.opened.done():
+                request.opened.cancel()
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429 and not request.opened.done():
+                self._handle_upstream_429(lane, request, e)
+                return
+            metrics.increment(f"llm_gateway.{lane.model}.errors")
+            if not request.opened.done():
+                request.opened.set_exception(e)
+            else:
+                request.chunks.put(e)
+        finally:
+            lane.in_flight -= 1
+            self._pump(lane)
+
+    def _handle_upstream_429(self, lane: ModelLane, request: _Request, error: Exception) -> None:
+        """
+        업스트림 429: Retry-After 동안 모델 전체를 멈추고(다른 프로세스 포함), 요청은 대기열 맨 앞에 다시 넣습니다.
+        429는 요청이 처리되지 않았다는 뜻이므로 다시 보내도 중복 응답이 생기지 않습니다.
+        """
+        response = getattr(error, "response", None)
+        try:
+            penalty = float(response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            penalty = _DEFAULT_429_PENALTY
+        self.limiter.penalize(lane.model, penalty)
+        if request.requeues >= _MAX_UPSTREAM_429_REQUEUES or request.cancelled:
+            metrics.increment(f"llm_gateway.{lane.model}.errors")
+            request.opened.set_exception(
+                RateLimited(f"{lane.model} 요청 한도를 초과했습니다. (429)", retry_after=penalty)
+            )
+            return
+        request.requeues += 1
+        request.task = None
+        lane.requeue(request)
+
+    def get_stats(self) -> Dict:
+        """모델별 실행 중/대기 요청 수(우선순위별), 대기 세션 수, 대기 시간 분포와 속도 제한 버킷 상태를 반환합니다."""
+        histograms = metrics.get_metrics()["histograms"]
+        return {
+            "started": self._loop is not None,
+            "queue_timeout": self.queue_timeout,
+            "max_queue": self.max_queue,
+            "models": {
+                model: {
+                    "max_concurrency": lane.max_concurrency,
+                    "in_flight": lane.in_flight,
+                    "queued": lane.queued,
+                    "queued_by_priority": {name: lane.queued_for(priority) for priority, name in PRIORITY_NAMES.items()},
+                    "sessions_waiting": lane.sessions_waiting,
+                    "queue_wait": histograms.get(f"llm_gateway.{model}.queue_wait"),
+                }
+                for model, lane in list(self._lanes.items())
+            },
+            "rate_limit": self.limiter.get_stats(),
+        }
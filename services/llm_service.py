@@ -1,33 +1,229 @@
-from openai import OpenAI
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
 import streamlit as st
-from config.settings import OPENAI_API_KEY, CHAT_MODEL, ANALYSIS_MODEL
+from config.settings import (
+    OPENAI_API_KEY,
+    BACKEND_MODE,
+    FAKE_OPENAI_LATENCY,
+    FAKE_OPENAI_TOKEN_INTERVAL,
+    FAKE_RAG_LATENCY,
+    CHAT_MODEL,
+    ANALYSIS_MODEL,
+    INJECTION_RULES_PATH,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_TURNS,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_SIZE,
+    OPENAI_CHAT_TIMEOUT,
+    OPENAI_ANALYSIS_TIMEOUT,
+    RAG_SEARCH_TIMEOUT,
+    LLM_GATEWAY_ENABLED,
+    LLM_GATEWAY_MAX_CONNECTIONS,
+    LLM_GATEWAY_QUEUE_TIMEOUT,
+)
+from services.cache import MISSING, TTLCache
+from services.context_manager import context_window, prompt_cache_key, prompt_cache_meter
+from services.injection_scanner import InjectionScanner
+from services.llm_gateway import LLMGateway
+from services.rate_limiter import PRIORITY_ANALYSIS, PRIORITY_CHAT, RateLimited
+from services.response_models import (
+    ANALYSIS_RESULT_SCHEMA,
+    ROUND_DIGEST_SCHEMA,
+    TURN_RESULT_SCHEMA,
+    ResponseParseError,
+    TurnResult,
+    parse_analysis_result,
+    parse_round_digest,
+    parse_turn_result,
+    response_format,
+)
+from services.startup import timed
+from services.tracing import record, span
+from services.transport import (
+    CircuitOpenError,
+    call_with_policy,
+    get_async_http_client,
+    get_breaker,
+    get_http_client,
+)
+
+# 클라이언트와 RAG 서비스는 처음 사용할 때 생성 (앱 시작 시간 단축)
+_client = None
+_client_initialized = False
+_client_lock = threading.Lock()
+
+_rag_service = None
+_rag_service_initialized = False
+_rag_service_lock = threading.Lock()
+
+
+def _resolve_api_key():
+    api_key = OPENAI_API_KEY
+    if not api_key:
+        # st.secrets에서 시도 (Streamlit Cloud 배포용)
+        if "OPENAI_API_KEY" in st.secrets:
+            api_key = st.secrets["OPENAI_API_KEY"]
+    return api_key
+
+
+def get_client():
+    """
+    OpenAI 클라이언트를 반환합니다. 처음 호출될 때 생성되며, API Key가 없으면 None.
+    """
+    global _client, _client_initialized
+    if _client_initialized:
+        return _client
+
+    with _client_lock:
+        if _client_initialized:
+            return _client
+
+        if BACKEND_MODE == "fake":
+            # 부하 테스트용 메모리 대역 (API 호출 없음)
+            from services.fakes import FakeOpenAI
+
+            _client = FakeOpenAI(latency=FAKE_OPENAI_LATENCY, token_interval=FAKE_OPENAI_TOKEN_INTERVAL)
+            _client_initialized = True
+            return _client
+
+        api_key = _resolve_api_key()
+        if api_key:
+            with timed("import openai"):
+                from openai import OpenAI
+            with timed("init OpenAI client"):
+                # 공용 keep-alive 커넥션 풀 사용. 응답 생성은 멱등이 아니므로 SDK 자동 재시도는 끔
+                _client = OpenAI(
+                    api_key=api_key,
+                    http_client=get_http_client("openai", OPENAI_CHAT_TIMEOUT),
+                    max_retries=0,
+                )
+
+        _client_initialized = True
+        return _client
+
+
+def _create_async_client():
+    """LLM 게이트웨이가 이벤트 루프 스레드에서 한 번 호출하는 AsyncOpenAI 클라이언트 생성 함수"""
+    if BACKEND_MODE == "fake":
+        from services.fakes import FakeAsyncOpenAI
+
+        return FakeAsyncOpenAI(latency=FAKE_OPENAI_LATENCY, token_interval=FAKE_OPENAI_TOKEN_INTERVAL)
+
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=_resolve_api_key(),
+        http_client=get_async_http_client("openai", OPENAI_CHAT_TIMEOUT, LLM_GATEWAY_MAX_CONNECTIONS),
+        max_retries=0,
+    )
+
+
+# 모든 세션의 OpenAI 요청을 하나의 이벤트 루프에서 처리 (모델별 동시 실행/RPM/TPM 한도, 우선순위와 세션 간 공정 대기열)
+_gateway = LLMGateway(_create_async_client)
+
+
+def _session_key():
+    """공정 대기열에서 호출자를 구분할 키 (Streamlit 세션 ID, 없으면 스레드 이름)"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else threading.current_thread().name
 
-# 클라이언트 초기화
-if not OPENAI_API_KEY:
-    # st.secrets에서 시도 (Streamlit Cloud 배포용)
-    if "OPENAI_API_KEY" in st.secrets:
-        client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+
+def _create_completion(client, priority=PRIORITY_CHAT, on_queued=None, **kwargs):
+    """
+    chat.completions.create를 호출합니다.
+    게이트웨이가 켜져 있으면 이벤트 루프의 우선순위/공정 대기열을 거치고, 꺼져 있으면
+    호출 스레드에서 RPM/TPM 예산을 기다린 뒤 동기 클라이언트로 바로 호출합니다.
+
+    priority: PRIORITY_CHAT(실시간 대화) 또는 PRIORITY_ANALYSIS(라운드 요약, 결과 분석)
+    on_queued: 대기 순번(int)을 받는 함수 - 대기열에서 기다리는 동안 순번이 바뀔 때마다 호출
+    Raises: RateLimited - 대기열이 가득 찼거나 한도 안에서 보낼 수 없는 경우
+    """
+    if LLM_GATEWAY_ENABLED:
+        return _gateway.create(_session_key(), priority=priority, on_queued=on_queued, **kwargs)
+    _gateway.limiter.acquire(
+        kwargs["model"], _gateway.estimate_tokens(kwargs), priority, timeout=LLM_GATEWAY_QUEUE_TIMEOUT
+    )
+    return client.chat.completions.create(**kwargs)
+
+
+def _rate_limited_result(error):
+    """속도 제한으로 보내지 못한 턴의 안내 결과 (rate_limited=True이면 화면이 턴을 소모하지 않음)"""
+    notice = "⏳ 지금 대화 요청이 몰려 답장을 보내지 못했어요."
+    if error.position:
+        notice += f" (대기 순번 {error.position}번)"
+    if error.retry_after:
+        notice += f" 약 {max(1, round(error.retry_after))}초 뒤에 다시 보내 주세요."
     else:
-        client = None
-else:
-    client = OpenAI(api_key=OPENAI_API_KEY)
+        notice += " 잠시 뒤에 다시 보내 주세요."
+    return TurnResult(notice, rate_limited=True)
 
-import json
 
+def get_llm_gateway_stats():
+    """LLM 게이트웨이의 모델별 대기열/실행 중 요청 수, 대기 시간 분포와 속도 제한 버킷 상태를 반환합니다."""
+    return {"enabled": LLM_GATEWAY_ENABLED, **_gateway.get_stats()}
 
-# RAG Service 초기화 (한 번만 로드 - 캐싱)
-@st.cache_resource
-def get_initialized_rag_service():
-    try:
-        from services.rag_service import RAGService
 
-        return RAGService()
-    except Exception as e:
-        print(f"RAG Service Load Failed: {e}")
-        return None
+def get_rag_service():
+    """
+    RAG Service를 반환합니다. (한 번만 로드 - 프로세스 단위 캐싱)
+    ChromaDB와 임베딩 모델 로드가 무거우므로 처음 필요할 때 또는 워밍업 스레드에서 생성됩니다.
+    """
+    global _rag_service, _rag_service_initialized
+    if _rag_service_initialized:
+        return _rag_service
 
+    with _rag_service_lock:
+        if _rag_service_initialized:
+            return _rag_service
 
-rag_service = get_initialized_rag_service()
+        try:
+            with timed("import services.rag_service (chromadb)"):
+                from services.rag_service import RAGService
+            with timed("init RAGService (embedding model)"):
+                if BACKEND_MODE == "fake":
+                    from services.fakes import InMemoryChromaService
+
+                    _rag_service = RAGService(chroma_service=InMemoryChromaService(latency=FAKE_RAG_LATENCY))
+                else:
+                    _rag_service = RAGService()
+        except Exception as e:
+            print(f"RAG Service Load Failed: {e}")
+            _rag_service = None
+
+        _rag_service_initialized = True
+        return _rag_service
+
+
+# 프롬프트 인젝션 스캐너 (규칙 파일을 import 시 한 번만 컴파일)
+_injection_scanner = InjectionScanner.from_file(INJECTION_RULES_PATH)
+
+# JSON 구조 인젝션 판단 시 의심 키
+_SUSPICIOUS_JSON_KEYS = ('request', 'system', 'instruction', 'response', 'score', 'reason')
+
+# 연속된 특수문자 (예: <<<, >>>)
+_REPEATED_SPECIAL_CHARS = re.compile(r'([<>|{}[\]])\1{2,}')
+
+
+def detect_injection(text):
+    """
+    사용자 입력에서 프롬프트 인젝션 패턴을 찾습니다.
+    
+    Returns:
+        ScanMatch | None: (rule_id, pattern, message), 없으면 None
+    """
+    return _injection_scanner.scan(text)
 
 
 def sanitize_user_input(text):
@@ -43,84 +239,22 @@ def sanitize_user_input(text):
     if not text:
         return True, text, ""
     
-    # 1. 특수 토큰 패턴 감지
-    dangerous_tokens = [
-        "<|begin_of_text|>",
-        "<|end_of_text|>",
-        "<|start_header_id|>",
-        "<|end_header_id|>",
-        "<|eot_id|>",
-        "[INST]",
-        "[/INST]",
-        "<<SYS>>",
-        "<</SYS>>",
-        "<s>",
-        "</s>",
-    ]
-    
-    # 2. 시스템 명령어 패턴 감지
-    system_keywords = [
-        "ignore previous",
-        "ignore all previous",
-        "disregard previous",
-        "forget previous",
-        "new instructions",
-        "system prompt",
-        "you are now",
-        "pretend you are",
-        "act as",
-        "roleplay as",
-        "너는 이제",
-        "시스템 프롬프트",
-        "이전 지시",
-        "무시하고",
-    ]
-    
-    # 3. JSON 인젝션 패턴 감지
-    json_attack_keywords = [
-        "\"request\":",
-        "\"system\":",
-        "\"instruction\":",
-        "\"instructions\":",
-        "\"response\":",
-        "\"score\":",
-        "\"reason\":",
-        '"request":',
-        '"system":',
-        '"instruction":',
-        '"response":',
-    ]
-    
-    text_lower = text.lower()
-    
-    # 특수 토큰 감지
-    for token in dangerous_tokens:
-        if token.lower() in text_lower:
-            return False, "", f"⚠️ 특수 토큰이 감지되었습니다: {token}"
-    
-    # 시스템 명령어 감지
-    for keyword in system_keywords:
-        if keyword in text_lower:
-            return False, "", f"⚠️ 허용되지 않는 명령어가 감지되었습니다: {keyword}"
-    
-    # JSON 인젝션 패턴 감지
-    for keyword in json_attack_keywords:
-        if keyword.lower() in text_lower:
-            return False, "", f"⚠️ JSON 인젝션 시도가 감지되었습니다"
+    # 1~3. 특수 토큰 / 시스템 명령어 / JSON 인젝션 패턴을 한 번의 스캔으로 감지
+    match = detect_injection(text)
+    if match:
+        return False, "", match.message
     
     # JSON 구조 의심 패턴 (중괄호 과다 사용)
-    import re
     brace_count = text.count('{') + text.count('}')
     if brace_count >= 4:  # { } 가 각각 2개 이상
         # JSON 파싱 시도
         try:
-            import json
             parsed = json.loads(text)
             # 파싱 성공 + 의심스러운 키가 있으면 차단
-            suspicious_keys = ['request', 'system', 'instruction', 'response', 'score', 'reason']
-            if any(key in str(parsed).lower() for key in suspicious_keys):
+            parsed_text = str(parsed).lower()
+            if any(key in parsed_text for key in _SUSPICIOUS_JSON_KEYS):
                 return False, "", "⚠️ JSON 구조 인젝션이 감지되었습니다"
-        except:
+        except (ValueError, RecursionError):
             # JSON 파싱 실패는 괜찮음 (일반 중괄호 사용)
             pass
     
@@ -129,20 +263,441 @@ def sanitize_user_input(text):
         return False, "", "⚠️ 메시지가 너무 깁니다. (최대 1000자)"
     
     # 5. 연속된 특수문자 제거 (예: <<<, >>>)
-    cleaned = re.sub(r'([<>|{}[\]])\1{2,}', r'\1', text)
+    cleaned = _REPEATED_SPECIAL_CHARS.sub(r'\1', text)
     
     return True, cleaned, ""
 
 
-def get_ai_response(messages):
+class ResponseFieldStream:
     """
-    OpenAI API를 통해 챗봇 응답을 받아옵니다.
-    messages: game_view에서 관리하는 대화 내역 리스트 (System Prompt 포함)
-    Returns: dict {"response": str, "score": int}
+    JSON 모드 스트리밍 응답에서 "response" 문자열 값을 점진적으로 디코딩합니다.
+
+    토큰이 도착할 때마다 feed()로 넘기면 response 필드에 새로 확정된
+    텍스트만 반환하고, 객체가 모두 닫힌 뒤 result()로 전체 JSON을 TurnResult로 파싱합니다.
+    스트림이 중간에 끊겨도 result()는 받은 부분까지 복구를 시도합니다.
     """
-    if not client:
-        return {"response": "🚨 API Key가 설정되지 않았습니다.", "score": 0}
 
+    _KEY_PATTERN = re.compile(r'"response"\s*:\s*"')
+    _SIMPLE_ESCAPES = {
+        '"': '"',
+        "\\": "\\",
+        "/": "/",
+        "b": "\b",
+        "f": "\f",
+        "n": "\n",
+        "r": "\r",
+        "t": "\t",
+    }
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = None  # response 값에서 다음으로 디코딩할 위치
+        self._closed = False
+
+    def feed(self, chunk):
+        """스트림 조각을 추가하고, response 필드에 새로 추가된 텍스트를 반환합니다."""
+        self._buffer += chunk
+        if self._closed:
+            return ""
+
+        if self._pos is None:
+            match = self._KEY_PATTERN.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        buf = self._buffer
+        i = self._pos
+        n = len(buf)
+        decoded = []
+
+        while i < n:
+            ch = buf[i]
+            if ch == '"':
+                self._closed = True
+                i += 1
+                break
+            if ch != "\\":
+                decoded.append(ch)
+                i += 1
+                continue
+
+            # 이스케이프 시퀀스가 청크 경계에서 잘린 경우 다음 청크를 기다림
+            if i + 1 >= n:
+                break
+            esc = buf[i + 1]
+            if esc != "u":
+                decoded.append(self._SIMPLE_ESCAPES.get(esc, esc))
+                i += 2
+                continue
+
+            if i + 6 > n:
+                break
+            code = int(buf[i + 2 : i + 6], 16)
+            if 0xD800 <= code <= 0xDBFF:
+                # 서로게이트 쌍 (이모지 등)은 두 시퀀스를 함께 디코딩
+                if i + 12 > n:
+                    break
+                decoded.append(json.loads('"' + buf[i : i + 12] + '"'))
+                i += 12
+            else:
+                decoded.append(chr(code))
+                i += 6
+
+        self._pos = i
+        return "".join(decoded)
+
+    @property
+    def started(self):
+        """response 필드의 값이 도착하기 시작했는지"""
+        return self._pos is not None
+
+    def result(self):
+        """스트림이 끝난 뒤 전체 JSON 객체를 TurnResult로 파싱하여 반환합니다. (실패 시 ResponseParseError)"""
+        return parse_turn_result(self._buffer)
+
+
+class RAGPrefetch:
+    """제출 직후 백그라운드에서 시작한 RAG 검색 작업 (session_state에 보관)"""
+
+    def __init__(self, query, future):
+        self.query = query
+        self.future = future
+
+
+class RAGPrefetcher:
+    """
+    사용자 메시지가 제출되자마자 스레드 풀에서 RAG 검색을 시작하고,
+    LLM 호출 직전에 결과를 기다립니다. 검색 시간 중 다른 작업(화면 재실행 등)과
+    겹친 시간을 집계하여 prefetch 효과를 측정합니다.
+
+    검색은 RAG_SEARCH_TIMEOUT 안에 끝나지 않으면 RAG 없이 진행하며,
+    실패가 반복되면 "rag" 서킷 브레이커가 열려 한동안 검색 자체를 건너뜁니다.
+    """
+
+    def __init__(self, max_workers=4, timeout=RAG_SEARCH_TIMEOUT):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-prefetch")
+        self.timeout = timeout
+        self._breaker = get_breaker("rag")
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._used = 0
+        self._search_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._inline_seconds = 0.0
+        self._inline_count = 0
+        self._skipped = 0
+        self._timeouts = 0
+
+    @staticmethod
+    def _search(query):
+        started = time.perf_counter()
+        rag_service = get_rag_service()
+        context = rag_service.search_context(query) if rag_service else None
+        return context, time.perf_counter() - started
+
+    def submit(self, query):
+        """검색을 시작하고 RAGPrefetch를 반환합니다. 빈 쿼리이거나 서킷이 열려 있으면 None."""
+        if not query:
+            return None
+        if not self._breaker.allow():
+            with self._lock:
+                self._skipped += 1
+            return None
+        with self._lock:
+            self._submitted += 1
+        return RAGPrefetch(query, self._executor.submit(self._search, query))
+
+    def resolve(self, prefetch, inline=False):
+        """prefetch 결과를 최대 timeout초 기다려 컨텍스트를 반환합니다. 실패하거나 늦으면 None."""
+        wait_started = time.perf_counter()
+        try:
+            context, search_seconds = prefetch.future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            print(f"RAG search timed out ({self.timeout}s), RAG 없이 응답합니다.")
+            self._breaker.record_failure()
+            with self._lock:
+                self._timeouts += 1
+            return None
+        except Exception as e:
+            print(f"RAG prefetch failed: {e}")
+            self._breaker.record_failure()
+            return None
+        waited = time.perf_counter() - wait_started
+        self._breaker.record_success()
+
+        with self._lock:
+            if inline:
+                self._inline_count += 1
+                self._inline_seconds += search_seconds
+                return context
+            self._used += 1
+            self._search_seconds += search_seconds
+            self._wait_seconds += waited
+        return context
+
+    def discard(self, prefetch):
+        """
+        사용하지 않게 된 prefetch(응답 캐시 적중, 차단된 입력, 다른 메시지에 대한 검색 등)를 정리합니다.
+        submit에서 받은 서킷 브레이커 호출 허가(half_open 시험 호출 자리)를 검색 결과로 반납합니다.
+        """
+        if prefetch is None:
+            return
+        if prefetch.future.cancel():
+            # 아직 시작하지 않은 검색은 보내지 않았으므로 허가만 반납
+            self._breaker.release()
+            return
+        prefetch.future.add_done_callback(self._settle)
+
+    def _settle(self, future):
+        """버려진 prefetch의 검색 결과를 서킷 브레이커에만 반영합니다."""
+        if future.exception() is None:
+            self._breaker.record_success()
+        else:
+            self._breaker.record_failure()
+
+    def search_inline(self, query):
+        """prefetch가 없을 때 바로 검색합니다. (같은 deadline 적용, 비교용 시간 기록)"""
+        prefetch = self.submit(query)
+        if prefetch is None:
+            return None
+        return self.resolve(prefetch, inline=True)
+
+    def get_stats(self):
+        """prefetch 사용 횟수, 검색/대기 시간, 겹친 비율(overlap_ratio), 생략/시간 초과 횟수를 반환합니다."""
+        with self._lock:
+            overlap = max(0.0, self._search_seconds - self._wait_seconds)
+            return {
+                "submitted": self._submitted,
+                "used": self._used,
+                "search_seconds": self._search_seconds,
+                "wait_seconds": self._wait_seconds,
+                "overlap_seconds": overlap,
+                "overlap_ratio": overlap / self._search_seconds if self._search_seconds else 0.0,
+                "inline_count": self._inline_count,
+                "inline_seconds": self._inline_seconds,
+                "skipped_circuit_open": self._skipped,
+                "timeouts": self._timeouts,
+            }
+
+
+_rag_prefetcher = RAGPrefetcher()
+
+
+def prefetch_rag_context(user_message):
+    """
+    사용자 메시지 제출 직후 호출하여 RAG 검색을 백그라운드에서 시작합니다.
+    반환값을 session_state에 보관했다가 get_ai_response(rag_prefetch=...)로 넘기면
+    LLM 호출 시 검색을 다시 하지 않고 준비된 결과를 기다립니다.
+
+    Returns:
+        RAGPrefetch | None: 차단 대상 입력이면 None (검색할 필요 없음)
+    """
+    is_safe, cleaned_msg, _ = sanitize_user_input(user_message)
+    if not is_safe:
+        return None
+    return _rag_prefetcher.submit(cleaned_msg)
+
+
+def get_rag_prefetch_stats():
+    """RAG prefetch의 검색 시간 중 다른 작업과 겹친 시간 통계를 반환합니다."""
+    return _rag_prefetcher.get_stats()
+
+
+class SemanticResponseCache:
+    """
+    초반 턴 응답 캐시 (opt-in)
+
+    (페르소나, 성별, 정규화된 대화 prefix)별 버킷에 마지막 사용자 발언의 임베딩과
+    TurnResult 응답을 저장하고, 유사도가 임계값 이상인 발언이 오면
+    API 호출 없이 저장된 응답을 반환합니다. 닉네임은 자리 표시로 바꿔 저장하므로
+    다른 사용자 세션에서도 재사용됩니다.
+    """
+
+    NICKNAME_SLOT = "{user_nickname}"
+    MAX_ENTRIES_PER_BUCKET = 32
+
+    def __init__(self, enabled, max_turns, similarity, ttl, maxsize):
+        """
+        Args:
+            enabled: 캐시 사용 여부 (False면 조회/저장 모두 건너뜀)
+            max_turns: 캐시를 사용할 최대 사용자 턴 수 (첫 N턴만)
+            similarity: 캐시 적중으로 볼 최소 코사인 유사도
+            ttl: 버킷 유효 시간(초)
+            maxsize: 최대 버킷 수 (LRU)
+        """
+        self.enabled = enabled
+        self.max_turns = max_turns
+        self.similarity = similarity
+        self._buckets = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+        self._stores = 0
+
+    @staticmethod
+    def _normalize(text, nickname):
+        if nickname:
+            text = text.replace(nickname, SemanticResponseCache.NICKNAME_SLOT)
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def _key(self, scope, messages):
+        """(버킷 키, 정규화된 마지막 발언)을 반환합니다. 캐시 대상이 아니면 None."""
+        persona_type, user_gender, nickname = scope
+        dialogue = [msg for msg in messages if msg["role"] != "system"]
+        if not dialogue or dialogue[-1]["role"] != "user":
+            return None
+        if sum(1 for msg in dialogue if msg["role"] == "user") > self.max_turns:
+            return None
+
+        prefix = "\n".join(
+            f"{msg['role']}:{self._normalize(msg['content'], nickname)}" for msg in dialogue[:-1]
+        )
+        prefix_hash = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        return (persona_type, user_gender, prefix_hash), self._normalize(dialogue[-1]["content"], nickname)
+
+    @staticmethod
+    def _embed(query):
+        rag_service = get_rag_service()
+        if not rag_service:
+            return None
+        embedding = rag_service.embed_query(query)
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, scope, messages):
+        """
+        캐시된 응답을 찾습니다.
+
+        Args:
+            scope: (persona_type, user_gender, nickname), None이면 캐시 사용 안 함
+            messages: 전체 대화 기록
+
+        Returns:
+            TurnResult | None: 닉네임을 채운 응답, 없으면 None
+        """
+        if not self.enabled or scope is None:
+            return None
+        key = self._key(scope, messages)
+        if key is None:
+            return None
+        bucket_key, query = key
+
+        with self._lock:
+            self._lookups += 1
+        bucket = self._buckets.get(bucket_key)
+        if bucket is MISSING:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entries = [entry for entry in bucket if entry[3] > now]
+        payload = next((entry[2] for entry in entries if entry[0] == query), None)
+        if payload is None and entries:
+            embedding = self._embed(query)
+            if embedding is not None:
+                best_score, best_payload = -1.0, None
+                for _, entry_embedding, entry_payload, _ in entries:
+                    if entry_embedding is None:
+                        continue
+                    score = float(np.dot(embedding, entry_embedding))
+                    if score > best_score:
+                        best_score, best_payload = score, entry_payload
+                if best_score >= self.similarity:
+                    payload = best_payload
+        if payload is None:
+            return None
+
+        with self._lock:
+            self._hits += 1
+        nickname = scope[2]
+        if nickname:
+            return replace(payload, response=payload.response.replace(self.NICKNAME_SLOT, nickname))
+        return payload
+
+    def store(self, scope, messages, result):
+        """API 응답을 캐시에 저장합니다. (검증을 통과한 정상 응답만 저장, 복구한 응답은 제외)"""
+        if not self.enabled or scope is None or not isinstance(result, TurnResult):
+            return
+        if result.repaired or result.rate_limited or result.response.startswith("🚨"):
+            return
+        key = self._key(scope, messages)
+        if key is None:
+            return
+        bucket_key, query = key
+
+        nickname = scope[2]
+        payload = replace(result, response=result.response.replace(nickname, self.NICKNAME_SLOT)) if nickname else result
+        embedding = self._embed(query)
+        expires_at = time.monotonic() + self._buckets.ttl if self._buckets.ttl is not None else float("inf")
+
+        bucket = self._buckets.get(bucket_key, None) or []
+        with self._lock:
+            bucket = [entry for entry in bucket if entry[0] != query][-(self.MAX_ENTRIES_PER_BUCKET - 1) :]
+            bucket.append((query, embedding, payload, expires_at))
+            self._stores += 1
+        self._buckets.set(bucket_key, bucket)
+
+    def clear(self):
+        self._buckets.clear()
+
+    def get_stats(self):
+        """조회/적중/저장 횟수와 적중률을 반환합니다."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "lookups": self._lookups,
+                "hits": self._hits,
+                "misses": self._lookups - self._hits,
+                "stores": self._stores,
+                "hit_rate": self._hits / self._lookups if self._lookups else 0.0,
+                "buckets": len(self._buckets),
+            }
+
+
+_response_cache = SemanticResponseCache(
+    enabled=RESPONSE_CACHE_ENABLED,
+    max_turns=RESPONSE_CACHE_MAX_TURNS,
+    similarity=RESPONSE_CACHE_SIMILARITY,
+    ttl=RESPONSE_CACHE_TTL,
+    maxsize=RESPONSE_CACHE_SIZE,
+)
+
+
+def set_response_cache_enabled(enabled):
+    """응답 캐시를 켜거나 끕니다. (kill switch, 끌 때 저장된 응답도 삭제)"""
+    _response_cache.enabled = enabled
+    if not enabled:
+        _response_cache.clear()
+
+
+def get_response_cache_stats():
+    """초반 턴 응답 캐시의 적중률 통계를 반환합니다."""
+    return _response_cache.get_stats()
+
+
+def format_rag_context(context):
+    """검색된 과거 대화를 요청 끝에 붙일 시스템 메시지 내용으로 만듭니다."""
+    return (
+        f"[참고 가능한 과거 대화 데이터]\n{context}\n\n"
+        "위 데이터를 참고하되, 현재 대화 흐름에 맞게 자연스럽게 반응해."
+    )
+
+
+def _prepare_messages(messages, affection_score=None, rag_prefetch=None, cache_scope=None):
+    """
+    입력 검증, 컨텍스트 윈도우 적용, RAG 컨텍스트 주입을 거쳐 API에 보낼 메시지를 만듭니다.
+    rag_prefetch가 마지막 사용자 메시지에 대한 것이면 검색 대신 그 결과를 기다립니다.
+
+    Returns:
+        tuple: (final_messages: list, blocked_result: TurnResult | None, cleaned_messages: list)
+               위험한 입력이거나 응답 캐시에 적중하면 blocked_result에 LLM 호출 없이 반환할 응답이 담김
+               cleaned_messages는 마지막 사용자 메시지를 정제한 대화 기록 (응답 캐시 키와 같은 기준)
+    """
     # 프롬프트 인젝션 방어: 마지막 사용자 메시지 검증
     last_user_msg = ""
     last_user_index = -1
@@ -153,24 +708,30 @@ def get_ai_response(messages):
             break
     
     if last_user_msg:
-        is_safe, cleaned_msg, warning = sanitize_user_input(last_user_msg)
+        with span("llm.sanitize"):
+            is_safe, cleaned_msg, warning = sanitize_user_input(last_user_msg)
         if not is_safe:
             # 위험한 입력 감지 시 안전한 응답 반환 (LLM 호출 안함)
-            return {
-                "response": "죄송하지만 기술적인 공격이네요. 안통한다 애송이!",
-                "score": -100,
-                "reason": "기술적인 공격"
-            }
+            _rag_prefetcher.discard(rag_prefetch)
+            return None, TurnResult("죄송하지만 기술적인 공격이네요. 안통한다 애송이!", score=-100, reason="기술적인 공격"), messages
         
         # 입력이 정제되었다면 메시지 교체
         if cleaned_msg != last_user_msg:
             messages = list(messages)  # 복사
             messages[last_user_index] = {"role": "user", "content": cleaned_msg}
 
-    # [RAG Integration]
-    # 원본 messages를 변경하지 않기 위해 복사
-    final_messages = list(messages)
+    # 초반 턴 응답 캐시 (opt-in): 적중하면 RAG 검색과 API 호출 모두 생략
+    with span("llm.response_cache_lookup"):
+        cached_result = _response_cache.lookup(cache_scope, messages)
+    if cached_result:
+        _rag_prefetcher.discard(rag_prefetch)
+        return None, cached_result, messages
+
+    # 시스템 프롬프트 + 이전 대화 요약 + 최근 N턴으로 토큰 예산 안에 맞춤 (새 리스트 반환)
+    with span("llm.context_window"):
+        final_messages, _ = context_window.build(messages, affection_score)
 
+    # [RAG Integration]
     # 마지막 유저 메시지 추출
     last_user_msg = ""
     for msg in reversed(final_messages):
@@ -179,74 +740,266 @@ def get_ai_response(messages):
             break
 
     # 검색 및 컨텍스트 주입
-    if rag_service and last_user_msg:
-        context = rag_service.search_context(last_user_msg)
+    # 시스템 프롬프트는 그대로 두고 맨 뒤에 별도 메시지로 붙여, 프롬프트 prefix가 매 턴 같게 유지되도록 함
+    if last_user_msg:
+        # prefetch가 있으면 남은 대기 시간만, 없으면 검색 전체 시간이 기록됨
+        with span("llm.rag_wait"):
+            if rag_prefetch is not None and rag_prefetch.query == last_user_msg:
+                context = _rag_prefetcher.resolve(rag_prefetch)
+            else:
+                _rag_prefetcher.discard(rag_prefetch)
+                context = _rag_prefetcher.search_inline(last_user_msg)
         if context:
-            # 시스템 메시지를 찾아서 컨텍스트 추가
-            # 보통 messages[0]이 시스템 프롬프트임
-            for i, msg in enumerate(final_messages):
-                if msg["role"] == "system":
-                    new_content = (
-                        msg["content"]
-                        + f"\n\n[참고 가능한 과거 대화 데이터]\n{context}\n\n위 데이터를 참고하되, 현재 대화 흐름에 맞게 자연스럽게 반응해."
-                    )
-                    # 해당 메시지만 교체 (딕셔너리 새로 생성)
-                    final_messages[i] = {"role": "system", "content": new_content}
-                    break
+            final_messages.append({"role": "system", "content": format_rag_context(context)})
+    else:
+        _rag_prefetcher.discard(rag_prefetch)
+
+    return final_messages, None, messages
+
+
+def get_ai_response(messages, stream=False, affection_score=None, rag_prefetch=None, cache_scope=None, on_queued=None):
+    """
+    OpenAI API를 통해 챗봇 응답을 받아옵니다.
+    messages: game_view에서 관리하는 대화 내역 리스트 (System Prompt 포함)
+    stream: True이면 토큰이 도착하는 대로 이벤트를 yield하는 제너레이터를 반환
+    affection_score: 현재 누적 호감도 (오래된 턴을 요약할 때 요약 줄에 포함)
+    rag_prefetch: prefetch_rag_context()로 미리 시작한 RAG 검색 (없으면 바로 검색)
+    cache_scope: (persona_type, user_gender, nickname) - 지정하면 초반 턴 응답 캐시 사용
+    on_queued: 요청이 많아 대기열에서 기다릴 때 대기 순번(int)을 받는 함수 (호출 스레드에서 호출)
+    Returns: TurnResult (검증된 response, score, reason)
+             속도 제한으로 보내지 못하면 rate_limited=True인 안내 응답
+             stream=True일 때는 (event, payload) 튜플 제너레이터
+             - ("delta", str): response 필드에 새로 도착한 텍스트
+             - ("result", TurnResult): JSON 객체가 닫힌 뒤의 최종 결과 (마지막에 한 번)
+    """
+    if stream:
+        return _stream_ai_response(messages, affection_score, rag_prefetch, cache_scope, on_queued)
+
+    client = get_client()
+    if not client:
+        _rag_prefetcher.discard(rag_prefetch)
+        return TurnResult("🚨 API Key가 설정되지 않았습니다.")
+
+    final_messages, blocked_result, cleaned_messages = _prepare_messages(
+        messages, affection_score, rag_prefetch, cache_scope
+    )
+    if blocked_result:
+        return blocked_result
 
     try:
-        response = client.chat.completions.create(
-            model=CHAT_MODEL,
-            messages=final_messages,
-            response_format={"type": "json_object"},  # JSON 모드 강제
-        )
+        started = time.perf_counter()
+        with span("llm.completion"):
+            response = call_with_policy(
+                "openai",
+                "chat",
+                lambda: _create_completion(
+                    client,
+                    on_queued=on_queued,
+                    model=CHAT_MODEL,
+                    messages=final_messages,
+                    response_format=response_format("turn_result", TURN_RESULT_SCHEMA),
+                    prompt_cache_key=prompt_cache_key(final_messages),
+                    timeout=OPENAI_CHAT_TIMEOUT,
+                ),
+            )
+        prompt_cache_meter.record(response.usage, time.perf_counter() - started)
         content = response.choices[0].message.content
-        return json.loads(content)
+        with span("llm.json_parse"):
+            result = parse_turn_result(content)
+        _response_cache.store(cache_scope, cleaned_messages, result)
+        return result
+    except RateLimited as e:
+        return _rate_limited_result(e)
+    except Exception as e:
+        return TurnResult(f"🚨 오류 발생: {str(e)}")
+
+
+def _stream_ai_response(messages, affection_score=None, rag_prefetch=None, cache_scope=None, on_queued=None):
+    """get_ai_response(stream=True)의 제너레이터 구현"""
+    client = get_client()
+    if not client:
+        _rag_prefetcher.discard(rag_prefetch)
+        result = TurnResult("🚨 API Key가 설정되지 않았습니다.")
+        yield "delta", result.response
+        yield "result", result
+        return
+
+    final_messages, blocked_result, cleaned_messages = _prepare_messages(
+        messages, affection_score, rag_prefetch, cache_scope
+    )
+    if blocked_result:
+        yield "delta", blocked_result.response
+        yield "result", blocked_result
+        return
+
+    parser = ResponseFieldStream()
+    try:
+        started = time.perf_counter()
+        first_token_latency = None
+        response = call_with_policy(
+            "openai",
+            "chat_stream",
+            lambda: _create_completion(
+                client,
+                on_queued=on_queued,
+                model=CHAT_MODEL,
+                messages=final_messages,
+                response_format=response_format("turn_result", TURN_RESULT_SCHEMA),
+                prompt_cache_key=prompt_cache_key(final_messages),
+                stream=True,
+                stream_options={"include_usage": True},  # 마지막 청크에 usage 포함
+                timeout=OPENAI_CHAT_TIMEOUT,  # 청크 사이 최대 대기 시간
+            ),
+        )
+        for chunk in response:
+            if chunk.usage is not None:
+                # 캐시 효과는 첫 토큰까지의 지연(입력 처리 시간)에 나타남
+                prompt_cache_meter.record(chunk.usage, first_token_latency)
+            if not chunk.choices:
+                continue
+            if first_token_latency is None:
+                first_token_latency = time.perf_counter() - started
+                record("llm.first_token", first_token_latency)
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+            text = parser.feed(content)
+            if text:
+                yield "delta", text
+        # 스트림 전체 시간 (제너레이터를 소비하는 화면 렌더링 시간 포함)
+        record("llm.completion_stream", time.perf_counter() - started)
+        with span("llm.json_parse"):
+            result = parser.result()
+        _response_cache.store(cache_scope, cleaned_messages, result)
+    except RateLimited as e:
+        result = _rate_limited_result(e)
     except Exception as e:
-        return {"response": f"🚨 오류 발생: {str(e)}", "score": 0}
+        if not isinstance(e, (CircuitOpenError, ResponseParseError)):
+            # 스트림 도중 끊긴 경우는 call_with_policy가 알 수 없으므로 여기서 실패로 기록
+            get_breaker("openai").record_failure()
+        result = _recover_stream(parser, e)
 
+    yield "result", result
 
-def analyze_conversation(history):
+
+def _recover_stream(parser, error):
+    """
+    스트림이 중간에 끊긴 경우: 이미 화면에 보여준 response가 있으면 받은 부분까지 복구해 사용하고
+    (API 재호출 없음), 복구할 수 없으면 오류 응답을 반환합니다.
+    """
+    if parser.started and not isinstance(error, ResponseParseError):
+        try:
+            return parser.result()
+        except ResponseParseError:
+            pass
+    return TurnResult(f"🚨 오류 발생: {str(error)}")
+
+
+def format_round_transcript(entry):
+    """라운드 하나의 대화를 [USER]/[AI] 표기의 텍스트로 만듭니다."""
+    lines = [
+        f"### 라운드 {entry.get('round', '?')}: {entry.get('persona', 'UNKNOWN')} 타입 "
+        f"(최종 호감도: {entry.get('final_score', 'N/A')})"
+    ]
+    for msg in entry.get("messages", []):
+        if msg["role"] == "user":
+            lines.append(f"[USER]: {msg['content']}")
+        elif msg["role"] == "assistant":
+            lines.append(f"[AI]: {msg['content']}")
+    return "\n".join(lines) + "\n"
+
+
+def digest_round(entry):
+    """
+    라운드 하나가 끝났을 때 사용자 대화 습관을 짧은 요약 카드(dict)로 추출합니다.
+    최종 분석은 세 라운드의 원문 대신 이 요약 카드를 합쳐서 사용합니다.
+
+    entry: {"round": 1, "persona": "EMOTIONAL", "messages": [...], "final_score": 70}
+    Returns: dict (question_frequency, effort, vocabulary, conflict_response, chemistry, user_quotes)
+             실패 시 {"error": str}
+    """
+    from config.prompts import get_round_digest_prompt
+
+    client = get_client()
+    if not client:
+        return {"error": "API Key가 설정되지 않았습니다."}
+
+    try:
+        response = call_with_policy(
+            "openai",
+            "round_digest",
+            lambda: _create_completion(
+                client,
+                priority=PRIORITY_ANALYSIS,
+                model=ANALYSIS_MODEL,
+                messages=[
+                    {"role": "system", "content": get_round_digest_prompt()},
+                    {"role": "user", "content": format_round_transcript(entry)},
+                ],
+                response_format=response_format("round_digest", ROUND_DIGEST_SCHEMA),
+                timeout=OPENAI_ANALYSIS_TIMEOUT,
+            ),
+        )
+        prompt_cache_meter.record(response.usage)
+        return parse_round_digest(response.choices[0].message.content)
+    except Exception as e:
+        return {"error": f"라운드 요약 실패: {str(e)}"}
+
+
+def _format_round_digest(entry, digest):
+    header = (
+        f"### 라운드 {entry.get('round', '?')}: {entry.get('persona', 'UNKNOWN')} 타입 "
+        f"(최종 호감도: {entry.get('final_score', 'N/A')}, 사용자 발화 "
+        f"{sum(1 for msg in entry.get('messages', []) if msg['role'] == 'user')}회)"
+    )
+    return header + "\n[USER 대화 습관 요약]\n" + json.dumps(digest, ensure_ascii=False) + "\n"
+
+
+def analyze_conversation(history, digests=None):
     """
     대화 기록을 분석하여 사용자의 연애 성향을 파악합니다.
     history: 각 라운드별 대화 기록 리스트 [{"round": 1, "persona": "EMOTIONAL", "messages": [...], "final_score": 70}, ...]
-    Returns: dict (my_persona, ideal_preference, summary)
+    digests: history와 같은 순서의 라운드 요약 카드 리스트 (digest_round 결과, 없는 라운드는 None)
+             요약 카드가 있는 라운드는 원문 대신 요약 카드를 보내 입력 토큰을 줄입니다.
+    Returns: AnalysisResult (스키마 검증된 분석 결과), 실패 시 {"error": str}
     """
     from config.prompts import get_analysis_prompt
 
+    client = get_client()
     if not client:
         return {"error": "API Key가 설정되지 않았습니다."}
 
-    # 대화 내용을 텍스트로 정리
-    conversation_text = ""
-    for entry in history:
-        round_num = entry.get("round", "?")
-        persona = entry.get("persona", "UNKNOWN")
-        score = entry.get("final_score", "N/A")
-        messages = entry.get("messages", [])
-
-        conversation_text += (
-            f"\n\n### 라운드 {round_num}: {persona} 타입 (최종 호감도: {score})\n"
-        )
-        for msg in messages:
-            if msg["role"] == "user":
-                conversation_text += f"[USER]: {msg['content']}\n"
-            elif msg["role"] == "assistant":
-                conversation_text += f"[AI]: {msg['content']}\n"
+    # 대화 내용을 텍스트로 정리 (라운드별 요약 카드, 없으면 원문)
+    digests = digests or [None] * len(history)
+    sections = []
+    for entry, digest in zip(history, digests):
+        if isinstance(digest, dict) and "error" not in digest:
+            sections.append(_format_round_digest(entry, digest))
+        else:
+            sections.append(format_round_transcript(entry))
+    conversation_text = "".join("\n\n" + section for section in sections)
 
     try:
-        response = client.chat.completions.create(
-            model=ANALYSIS_MODEL,
-            messages=[
-                {"role": "system", "content": get_analysis_prompt()},
-                {
-                    "role": "user",
-                    "content": f"다음 대화 기록을 분석해줘:\n{conversation_text}",
-                },
-            ],
-            response_format={"type": "json_object"},
+        response = call_with_policy(
+            "openai",
+            "analysis",
+            lambda: _create_completion(
+                client,
+                priority=PRIORITY_ANALYSIS,
+                model=ANALYSIS_MODEL,
+                messages=[
+                    {"role": "system", "content": get_analysis_prompt()},
+                    {
+                        "role": "user",
+                        "content": f"다음 대화 기록을 분석해줘:\n{conversation_text}",
+                    },
+                ],
+                response_format=response_format("analysis_result", ANALYSIS_RESULT_SCHEMA),
+                timeout=OPENAI_ANALYSIS_TIMEOUT,
+            ),
         )
+        prompt_cache_meter.record(response.usage)
         content = response.choices[0].message.content
-        return json.loads(content)
+        return parse_analysis_result(content)
     except Exception as e:
         return {"error": f"분석 실패: {str(e)}"}
@@ -0,0 +1,207 @@
+"""
+지표 수집 모듈
+
+요청 지연 시간 같은 값을 이름별 히스토그램에 모아 p50/p95/p99를 계산하고,
+요청 수·실패 수 같은 카운터와 현재 값(게이지)을 함께 보관합니다.
+최근 window개 샘플만 유지하므로 오래 실행해도 메모리가 일정합니다.
+
+format_prometheus()는 모든 지표를 Prometheus 텍스트 형식으로 만들고,
+start_metrics_server()는 이를 /metrics 경로로 노출하는 HTTP 서버를 띄웁니다.
+"""
+
+import re
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+def _pick(sorted_samples, q):
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, max(0, int(round(q / 100 * (len(sorted_samples) - 1)))))
+    return sorted_samples[index]
+
+
+class Histogram:
+    """최근 샘플 기반 백분위수 히스토그램 (스레드 안전)"""
+
+    def __init__(self, window: int = 2048):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """최근 샘플의 q 백분위수 (0~100). 샘플이 없으면 None."""
+        with self._lock:
+            samples = sorted(self._samples)
+        return _pick(samples, q)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, maximum = self.count, self.total, self.max
+        return {
+            "count": count,
+            "avg": total / count if count else None,
+            "p50": _pick(samples, 50),
+            "p95": _pick(samples, 95),
+            "p99": _pick(samples, 99),
+            "max": maximum if count else None,
+        }
+
+
+_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+
+
+def observe(name: str, value: float) -> None:
+    """name 히스토그램에 값을 기록합니다. (지연 시간은 초 단위)"""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(name, Histogram())
+    histogram.observe(value)
+
+
+def increment(name: str, value: float = 1) -> None:
+    """name 카운터를 증가시킵니다."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """name 게이지를 현재 값으로 설정합니다."""
+    with _lock:
+        _gauges[name] = value
+
+
+def max_gauge(name: str, value: float) -> None:
+    """name 게이지를 지금까지의 최댓값으로 유지합니다. (peak 기록용)"""
+    with _lock:
+        if value > _gauges.get(name, float("-inf")):
+            _gauges[name] = value
+
+
+def adjust_gauge(name: str, delta: float) -> float:
+    """name 게이지를 delta만큼 바꾸고 바뀐 값을 반환합니다."""
+    with _lock:
+        _gauges[name] = _gauges.get(name, 0) + delta
+        return _gauges[name]
+
+
+def reset() -> None:
+    """모든 히스토그램, 카운터, 게이지를 비웁니다. (부하 테스트 단계 사이 초기화용)"""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+def get_metrics() -> Dict:
+    """모든 히스토그램 요약, 카운터, 게이지를 반환합니다."""
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+    return {
+        "histograms": {name: histogram.snapshot() for name, histogram in sorted(histograms.items())},
+        "counters": dict(sorted(counters.items())),
+        "gauges": dict(sorted(gauges.items())),
+    }
+
+
+# ---------------------------------------------------------
+# Prometheus 텍스트 형식
+# ---------------------------------------------------------
+_PROMETHEUS_PREFIX = "app_"
+_QUANTILES = (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+
+
+def _prometheus_name(name: str) -> str:
+    return _PROMETHEUS_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def format_prometheus() -> str:
+    """
+    모든 지표를 Prometheus 텍스트 형식(0.0.4)으로 반환합니다.
+    히스토그램은 최근 샘플 기준 summary(quantile 0.5/0.95/0.99, _sum, _count)로 내보냅니다.
+    """
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+
+    lines: List[str] = []
+    for name, histogram in sorted(histograms.items()):
+        metric = _prometheus_name(name)
+        snapshot = histogram.snapshot()
+        lines.append(f"# TYPE {metric} summary")
+        for quantile, key in _QUANTILES:
+            if snapshot[key] is not None:
+                lines.append(f'{metric}{{quantile="{quantile}"}} {snapshot[key]:.6g}')
+        lines.append(f"{metric}_sum {histogram.total:.6g}")
+        lines.append(f"{metric}_count {snapshot['count']}")
+    for name, value in sorted(counters.items()):
+        metric = _prometheus_name(name)
+        lines.append(f"# TYPE {metric}_total counter")
+        lines.append(f"{metric}_total {value:g}")
+    for name, value in sorted(gauges.items()):
+        metric = _prometheus_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = format_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 스크레이프 요청마다 로그가 찍히지 않도록 무시
+        pass
+
+
+_server = None
+_server_attempted = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """
+    /metrics 경로로 Prometheus 텍스트를 제공하는 HTTP 서버를 백그라운드 스레드에서 시작합니다.
+    프로세스당 한 번만 시작되며, 포트를 열 수 없으면 로그만 남기고 None을 반환합니다.
+    """
+    global _server, _server_attempted
+    with _server_lock:
+        if _server_attempted:
+            return _server
+        _server_attempted = True
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"[metrics] {port} 포트에서 metrics 서버를 시작하지 못했습니다: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"[metrics] http://{host}:{port}/metrics")
+        return _server
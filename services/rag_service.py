@@ -1,25 +1,101 @@
+import re
+import unicodedata
+
+from services.cache import MISSING, TTLCache
 from services.chroma_service import ChromaService
-from typing import Optional
+from services.tracing import span
+from typing import Dict, Optional
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키로 쓰기 위해 쿼리를 정규화합니다. (NFC, 소문자, 공백 정리)"""
+    query = unicodedata.normalize("NFC", query)
+    return re.sub(r"\s+", " ", query).strip().lower()
 
 
 class RAGService:
-    def __init__(self):
-        try:
-            self.chroma_service = ChromaService()
-        except Exception as e:
-            print(f"ChromaService init failed: {e}")
-            self.chroma_service = None
+    def __init__(self, cache_size: int = 1024, cache_ttl: Optional[float] = 600, chroma_service: Optional[ChromaService] = None):
+        """
+        Args:
+            cache_size: 임베딩/컨텍스트 캐시의 최대 항목 수
+            cache_ttl: 컨텍스트 캐시 유효 시간(초), None이면 만료 없음
+            chroma_service: 사용할 ChromaService (None이면 기본 경로의 ChromaDB를 엶)
+        """
+        if chroma_service is not None:
+            self.chroma_service = chroma_service
+        else:
+            try:
+                self.chroma_service = ChromaService()
+            except Exception as e:
+                print(f"ChromaService init failed: {e}")
+                self.chroma_service = None
+
+        # 쿼리 임베딩은 모델이 같으면 변하지 않으므로 TTL 없이 LRU로만 관리
+        self._embedding_cache = TTLCache(maxsize=cache_size)
+        self._context_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._cache_version = self._collection_version()
+
+    def _collection_version(self) -> int:
+        return self.chroma_service.version if self.chroma_service else 0
 
-    def search_context(self, query: str, n_results: int = 3) -> Optional[str]:
+    def _invalidate_if_changed(self) -> None:
+        """add_conversations / clear_collection으로 컬렉션이 바뀌었으면 캐시를 비웁니다."""
+        version = self._collection_version()
+        if version != self._cache_version:
+            self._embedding_cache.clear()
+            self._context_cache.clear()
+            self._cache_version = version
+
+    def _get_query_embedding(self, query: str, normalized_query: str):
+        # 정규화한 쿼리는 캐시 키로만 쓰고, 임베딩은 원문으로 계산
+        embedding = self._embedding_cache.get(normalized_query)
+        if embedding is MISSING:
+            with span("rag.embed"):
+                embedding = self.chroma_service.embed_query(query)
+            self._embedding_cache.set(normalized_query, embedding)
+        return embedding
+
+    def embed_query(self, query: str):
+        """쿼리의 임베딩을 반환합니다. (정규화한 쿼리 기준 임베딩 캐시 사용, 서비스가 없으면 None)"""
+        if not self.chroma_service:
+            return None
+        self._invalidate_if_changed()
+        return self._get_query_embedding(query, normalize_query(query))
+
+    def search_context(
+        self,
+        query: str,
+        n_results: int = 3,
+        platform_filter: Optional[str] = None,
+        subject_filter: Optional[str] = None,
+    ) -> Optional[str]:
         """
         Queries ChromaDB for similar conversations and formats them as a context string.
+        Results are memoized per normalized query and filters.
         """
         if not self.chroma_service:
             return None
 
+        self._invalidate_if_changed()
+
+        normalized = normalize_query(query)
+        cache_key = (normalized, n_results, platform_filter, subject_filter)
+        cached = self._context_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+
         try:
-            results = self.chroma_service.get_similar_conversations(query, n_results)
+            query_embedding = self._get_query_embedding(query, normalized)
+            with span("rag.query"):
+                results = self.chroma_service.get_similar_conversations(
+                    query,
+                    n_results,
+                    platform_filter=platform_filter,
+                    subject_filter=subject_filter,
+                    query_embedding=query_embedding,
+                )
             if not results:
+                self._context_cache.set(cache_key, None)
                 return None
 
             context_parts = []
@@ -28,7 +104,16 @@ class RAGService:
                 dialogue = item["dialogue"]
                 context_parts.append(f"예시 {i} (주제: {subject}):\n{dialogue}")
 
-            return "\n\n".join(context_parts)
+            context = "\n\n".join(context_parts)
+            self._context_cache.set(cache_key, context)
+            return context
         except Exception as e:
             print(f"Search context failed: {e}")
             return None
+
+    def get_cache_stats(self) -> Dict:
+        """임베딩 캐시와 컨텍스트 캐시의 적중/실패 통계를 반환합니다."""
+        return {
+            "embedding": self._embedding_cache.stats(),
+            "context": self._context_cache.stats(),
+        }
@@ -0,0 +1,272 @@
+"""
+모델별 토큰 버킷 속도 제한 모듈
+
+접속이 몰리면 모든 세션이 CHAT_MODEL/ANALYSIS_MODEL을 동시에 호출하고, 업스트림의 429가
+그대로 "🚨 오류 발생"으로 사용자에게 보입니다. 이 모듈은 모델 이름별로 분당 요청 수(RPM)와
+분당 토큰 수(TPM) 버킷을 두고, 보내기 전에 예산을 확인합니다.
+
+- 토큰 버킷: 한도(분당 값)만큼 채워져 있고 초당 한도/60씩 다시 찹니다.
+  요청 하나가 요청 버킷 1개와 예상 토큰 수만큼의 토큰 버킷을 함께 차감합니다.
+- 우선순위: 결과 분석(PRIORITY_ANALYSIS)은 버킷의 RATE_LIMIT_LOW_PRIORITY_RESERVE 비율을
+  남겨 두어야 통과하므로, 한도에 가까워지면 실시간 대화(PRIORITY_CHAT)가 먼저 나갑니다.
+- 429 대응: penalize()로 Retry-After 동안 해당 모델 호출을 모두 멈춥니다.
+- 공유 범위: memory 저장소는 한 프로세스의 스레드끼리, file 저장소는 fcntl 파일 락으로
+  같은 호스트의 여러 프로세스끼리 버킷을 공유합니다.
+
+예산이 없어 보내지 못한 요청은 RateLimited(대기 순번, 재시도까지 남은 시간)로 알립니다.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # 선택 의존성: Windows에는 없으므로 file 저장소 대신 memory 저장소 사용
+    fcntl = None
+
+from config.settings import (
+    LLM_MODEL_LIMITS,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_LOW_PRIORITY_RESERVE,
+    RATE_LIMIT_STATE_FILE,
+)
+from services import metrics
+
+# 우선순위 (작을수록 먼저)
+PRIORITY_CHAT = 0
+PRIORITY_ANALYSIS = 1
+PRIORITY_NAMES = {PRIORITY_CHAT: "chat", PRIORITY_ANALYSIS: "analysis"}
+
+# 설정에 없는 모델의 기본 한도
+DEFAULT_LIMITS = {"max_concurrency": 4, "requests_per_minute": 500, "tokens_per_minute": 100000}
+
+
+class RateLimited(RuntimeError):
+    """
+    속도 제한이나 대기열 한도 때문에 요청을 보내지 못한 경우 (업스트림 장애가 아님)
+
+    Attributes:
+        position: 거절될 때의 대기 순번 (알 수 없으면 None)
+        retry_after: 다시 시도하기까지 권장 대기 시간(초, 알 수 없으면 None)
+    """
+
+    def __init__(self, message: str, position: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.position = position
+        self.retry_after = retry_after
+
+
+def _refill(bucket, capacity: float, now: float) -> float:
+    """bucket([잔량, 갱신 시각])을 now까지 채우고 잔량을 반환합니다."""
+    level, updated = bucket
+    level = min(capacity, level + max(0.0, now - updated) * capacity / 60.0)
+    bucket[0], bucket[1] = level, now
+    return level
+
+
+def _bucket_delay(level: float, capacity: float, amount: float, reserve: float) -> float:
+    """amount를 차감하고도 reserve 이상 남기려면 기다려야 하는 시간(초). 지금 가능하면 0."""
+    if capacity <= 0:
+        return 0.0
+    # 한도보다 큰 요청 하나는 버킷이 가득 찼을 때 허용 (영원히 막히지 않도록)
+    needed = min(amount + reserve, capacity)
+    if level >= needed:
+        return 0.0
+    return (needed - level) * 60.0 / capacity
+
+
+class _MemoryStore:
+    """프로세스 안의 스레드끼리 버킷 상태를 공유하는 저장소"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict] = {}
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._state
+
+
+class _FileStore:
+    """
+    같은 호스트의 여러 프로세스가 JSON 파일 하나로 버킷 상태를 공유하는 저장소
+    읽기-수정-쓰기를 fcntl 배타 락(<path>.lock) 안에서 수행하므로 프로세스 간에도 원자적입니다.
+    시각은 프로세스끼리 비교할 수 있도록 time.time()을 사용합니다.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_path = path + ".lock"
+        self._thread_lock = threading.Lock()  # flock은 같은 프로세스의 스레드끼리는 막지 않음
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, state: Dict) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def transaction(self):
+        with self._thread_lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                yield state
+                self._write(state)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """
+    모델 이름별 RPM/TPM 토큰 버킷
+
+    Args:
+        limits: 모델 이름별 {"requests_per_minute", "tokens_per_minute"} (0이면 제한 없음)
+        backend: "memory" 또는 "file"
+        state_file: file 저장소의 상태 파일 경로
+        low_priority_reserve: 낮은 우선순위 요청이 남겨 두어야 하는 버킷 비율 (0~1)
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict]] = None,
+        backend: str = RATE_LIMIT_BACKEND,
+        state_file: str = RATE_LIMIT_STATE_FILE,
+        low_priority_reserve: float = RATE_LIMIT_LOW_PRIORITY_RESERVE,
+    ):
+        self._limits = dict(LLM_MODEL_LIMITS if limits is None else limits)
+        self.low_priority_reserve = low_priority_reserve
+        if backend == "file" and fcntl is None:
+            print("[rate-limit] fcntl을 사용할 수 없어 memory 저장소를 사용합니다.")
+            backend = "memory"
+        self._store = _FileStore(state_file) if backend == "file" else _MemoryStore()
+
+    @property
+    def backend(self) -> str:
+        return self._store.name
+
+    def limits(self, model: str) -> Dict:
+        return {**DEFAULT_LIMITS, **self._limits.get(model, {})}
+
+    def _model_state(self, state: Dict, model: str, now: float) -> Dict:
+        entry = state.get(model)
+        if entry is None:
+            limits = self.limits(model)
+            entry = state[model] = {
+                "requests": [float(limits["requests_per_minute"]), now],
+                "tokens": [float(limits["tokens_per_minute"]), now],
+                "blocked_until": 0.0,
+            }
+        return entry
+
+    def try_acquire(self, model: str, tokens: int, priority: int = PRIORITY_CHAT) -> float:
+        """
+        요청 1개와 tokens만큼의 예산을 차감합니다.
+
+        Returns:
+            0이면 차감 완료 (지금 보내도 됨), 아니면 다시 시도하기까지 기다릴 시간(초, 차감하지 않음)
+        """
+        limits = self.limits(model)
+        rpm, tpm = limits["requests_per_minute"], limits["tokens_per_minute"]
+        reserve = self.low_priority_reserve if priority > PRIORITY_CHAT else 0.0
+        now = time.time()
+        with self._store.transaction() as state:
+            entry = self._model_state(state, model, now)
+            delay = max(0.0, entry["blocked_until"] - now)
+            request_level = _refill(entry["requests"], rpm, now)
+            token_level = _refill(entry["tokens"], tpm, now)
+            if not delay:
+                delay = max(
+                    _bucket_delay(request_level, rpm, 1, reserve * rpm),
+                    _bucket_delay(token_level, tpm, tokens, reserve * tpm),
+                )
+            if delay:
+                metrics.increment(f"rate_limit.{model}.{PRIORITY_NAMES.get(priority, priority)}.throttled")
+                return delay
+            entry["requests"][0] -= 1
+            entry["tokens"][0] -= tokens
+        return 0.0
+
+    def acquire(self, model: str, tokens: int, priority: int = PRIORITY_CHAT, timeout: float = 60.0) -> None:
+        """
+        예산이 생길 때까지 호출한 스레드에서 기다린 뒤 차감합니다. (게이트웨이를 쓰지 않는 동기 호출용)
+
+        Raises:
+            RateLimited: timeout 안에 예산이 생기지 않을 경우
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            delay = self.try_acquire(model, tokens, priority)
+            if not delay:
+                return
+            remaining = deadline - time.monotonic()
+            if delay > remaining:
+                raise RateLimited(f"{model} 요청 한도에 도달했습니다.", retry_after=delay)
+            time.sleep(delay)
+
+    def adjust(self, model: str, tokens: int) -> None:
+        """추정치로 미리 차감한 토큰을 실제 사용량에 맞게 보정합니다. (tokens > 0이면 추가 차감)"""
+        if not tokens:
+            return
+        now = time.time()
+        with self._store.transaction() as state:
+            entry = self._model_state(state, model, now)
+            _refill(entry["tokens"], self.limits(model)["tokens_per_minute"], now)
+            entry["tokens"][0] -= tokens
+
+    def penalize(self, model: str, seconds: float) -> None:
+        """업스트림이 429를 돌려주면 seconds 동안 이 모델의 모든 요청을 보내지 않습니다."""
+        now = time.time()
+        with self._store.transaction() as state:
+            entry = self._model_state(state, model, now)
+            entry["blocked_until"] = max(entry["blocked_until"], now + seconds)
+        metrics.increment(f"rate_limit.{model}.upstream_429")
+
+    def get_stats(self) -> Dict:
+        """모델별 한도와 현재 버킷 잔량(추정치 보정으로 음수일 수 있음), 429 차단 남은 시간을 반환합니다."""
+        now = time.time()
+        stats = {}
+        with self._store.transaction() as state:
+            for model in sorted(set(self._limits) | set(state)):
+                limits = self.limits(model)
+                entry = self._model_state(state, model, now)
+                rpm, tpm = limits["requests_per_minute"], limits["tokens_per_minute"]
+                stats[model] = {
+                    "requests_per_minute": rpm,
+                    "tokens_per_minute": tpm,
+                    # 한도가 0(제한 없음)이면 잔량은 None
+                    "requests_available": _refill(entry["requests"], rpm, now) if rpm else None,
+                    "tokens_available": _refill(entry["tokens"], tpm, now) if tpm else None,
+                    "blocked_seconds": max(0.0, entry["blocked_until"] - now),
+                }
+        return {"backend": self.backend, "low_priority_reserve": self.low_priority_reserve, "models": stats}
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """설정(RATE_LIMIT_BACKEND 등)으로 만든 프로세스 공용 RateLimiter를 반환합니다."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
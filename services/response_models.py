@@ -0,0 +1,439 @@
+"""
+LLM 응답 타입과 검증 파서
+
+채팅 턴과 최종 분석 응답을 __slots__ 데이터클래스(TurnResult, AnalysisResult)로 한 번만
+파싱·검증하여, 화면과 DB 저장 코드가 점수 변환이나 중첩 dict 탐색을 반복하지 않도록 합니다.
+
+- 스키마 강제: response_format()이 JSON 스키마(strict) 요청 형식을 만들어 모델이 정해진
+  필드와 타입으로만 응답하게 합니다. (STRUCTURED_OUTPUT_ENABLED=0이면 기존 JSON 모드)
+- 단일 검증 파싱: json.loads 한 번 + 필드 검증/정규화(점수 범위, 페르소나 타입, 컬럼 길이)
+- 잘린 JSON 복구: 응답이 중간에 끊기거나(길이 제한, 스트림 중단) 코드 펜스로 감싸져 와도
+  API를 다시 호출하지 않고 완결된 부분까지 닫아서 파싱합니다. (repaired=True)
+- 지표: 종류별 정상/복구/실패 횟수(llm.parse.<kind>.*)로 잘못된 응답 비율을 확인할 수 있습니다.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from config.settings import STRUCTURED_OUTPUT_ENABLED
+from services import metrics
+
+PERSONA_TYPES = ("EMOTIONAL", "LOGICAL", "TOUGH")
+SCORE_MIN, SCORE_MAX = -50, 20  # base.txt의 호감도 변화 범위
+
+# analysis_results 컬럼 길이 (tables.sql)
+_STYLE_MAX_LENGTH = 100
+
+_INTEGER_PATTERN = re.compile(r"[-+]?\d+")
+# 끝에서 잘린 \u 이스케이프, 짝(low surrogate)이 잘려 나간 high surrogate
+_PARTIAL_UNICODE_ESCAPE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+_LONE_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}$")
+
+
+class ResponseParseError(ValueError):
+    """응답을 JSON 객체로 복구할 수 없거나 필수 필드가 없는 경우"""
+
+
+# ---------------------------------------------------------
+# 응답 타입
+# ---------------------------------------------------------
+def _text(value, max_length: Optional[int] = None) -> Optional[str]:
+    """문자열 필드 정규화 (리스트는 쉼표로 연결, 빈 값과 "none"/"-"는 None)"""
+    if value is None:
+        return None
+    if type(value) is str:  # 대부분의 응답: str() 변환 생략
+        text = value.strip()
+    elif isinstance(value, list):
+        text = ", ".join(str(item) for item in value if item).strip()
+    else:
+        text = str(value).strip()
+    if not text or text == "-" or text.lower() == "none":
+        return None
+    return text[:max_length] if max_length else text
+
+
+def _persona_type(value) -> Optional[str]:
+    text = _text(value)
+    if text is None:
+        return None
+    text = text.upper()
+    return text if text in PERSONA_TYPES else None
+
+
+def _score(value) -> int:
+    """점수를 정수로 변환하고 범위로 자릅니다. ("+5", "5점", 5.0 허용, 해석할 수 없으면 0)"""
+    if type(value) is int:  # 스키마를 지킨 응답은 여기서 끝남
+        return SCORE_MIN if value < SCORE_MIN else SCORE_MAX if value > SCORE_MAX else value
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, int):
+        score = value
+    elif isinstance(value, float):
+        score = round(value)
+    elif isinstance(value, str):
+        match = _INTEGER_PATTERN.search(value)
+        if not match:
+            return 0
+        score = int(match.group())
+    else:
+        return 0
+    return max(SCORE_MIN, min(SCORE_MAX, score))
+
+
+def _section(payload: Dict, key: str) -> Dict:
+    value = payload.get(key)
+    return value if isinstance(value, dict) else {}
+
+
+@dataclass(slots=True)
+class TurnResult:
+    """
+    채팅 한 턴의 응답 (매 턴 만들어지므로 frozen의 __setattr__ 우회 비용 없이 slots만 사용.
+    응답 캐시가 같은 객체를 여러 세션에 돌려주므로 만든 뒤에는 수정하지 말고 replace()를 사용)
+
+    Attributes:
+        response: 상대방의 대답 (화면에 표시)
+        score: 호감도 변화량
+        reason: 점수가 변한 이유 (없으면 None)
+        rate_limited: 속도 제한으로 보내지 못한 턴 (화면이 턴을 소모하지 않음)
+        repaired: 잘린 응답을 복구한 결과
+    """
+
+    response: str
+    score: int = 0
+    reason: Optional[str] = None
+    rate_limited: bool = False
+    repaired: bool = False
+
+    @classmethod
+    def from_payload(cls, payload: Dict, repaired: bool = False) -> "TurnResult":
+        response = payload.get("response")
+        if not isinstance(response, str) or not response.strip():
+            raise ResponseParseError("response 필드가 없습니다.")
+        return cls(response, _score(payload.get("score")), _text(payload.get("reason")), repaired=repaired)
+
+    def to_dict(self) -> Dict:
+        return {"response": self.response, "score": self.score, "reason": self.reason}
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisResult:
+    """최종 대화 분석 결과 (analysis_results 컬럼과 같은 평평한 구조)"""
+
+    style: Optional[str] = None
+    user_type: Optional[str] = None
+    keywords: Tuple[str, ...] = ()
+    strength: Optional[str] = None
+    weakness: Optional[str] = None
+    best_match: Optional[str] = None
+    best_reason: Optional[str] = None
+    similar_style: Optional[str] = None
+    similar_chemistry: Optional[str] = None
+    opposite_style: Optional[str] = None
+    opposite_chemistry: Optional[str] = None
+    positive: Optional[str] = None
+    improvement: Optional[str] = None
+    dating_tip: Optional[str] = None
+    warning: Optional[str] = None
+    summary: Optional[str] = None
+    repaired: bool = False
+
+    @classmethod
+    def from_payload(cls, payload: Dict, repaired: bool = False) -> "AnalysisResult":
+        """analysis.txt 형식의 중첩 dict를 검증하여 만듭니다. 알려진 항목이 하나도 없으면 ResponseParseError."""
+        if not any(key in payload for key in ("my_persona", "compatibility", "insights", "summary")):
+            raise ResponseParseError("분석 결과 항목이 없습니다.")
+        persona = _section(payload, "my_persona")
+        compatibility = _section(payload, "compatibility")
+        insights = _section(payload, "insights")
+        keywords = persona.get("keywords")
+        if isinstance(keywords, str):
+            keywords = keywords.split(",")
+        return cls(
+            style=_text(persona.get("style"), _STYLE_MAX_LENGTH),
+            user_type=_persona_type(persona.get("type")),
+            keywords=tuple(k for k in (_text(k) for k in keywords or ()) if k),
+            strength=_text(persona.get("strength")),
+            weakness=_text(persona.get("weakness")),
+            best_match=_persona_type(compatibility.get("best_match")),
+            best_reason=_text(compatibility.get("best_reason")),
+            similar_style=_persona_type(compatibility.get("similar_style")),
+            similar_chemistry=_text(compatibility.get("similar_chemistry")),
+            opposite_style=_persona_type(compatibility.get("opposite_style")),
+            opposite_chemistry=_text(compatibility.get("opposite_chemistry")),
+            positive=_text(insights.get("positive")),
+            improvement=_text(insights.get("improvement")),
+            dating_tip=_text(insights.get("dating_tip")),
+            warning=_text(insights.get("warning")),
+            summary=_text(payload.get("summary")),
+            repaired=repaired,
+        )
+
+    def persona_dict(self) -> Dict:
+        """game_sessions.my_persona에 저장하는 형식"""
+        return {
+            "style": self.style,
+            "type": self.user_type,
+            "keywords": list(self.keywords),
+            "strength": self.strength,
+            "weakness": self.weakness,
+        }
+
+    def compatibility_dict(self) -> Dict:
+        """game_sessions.ideal_preference에 저장하는 형식"""
+        return {
+            "best_match": self.best_match,
+            "best_reason": self.best_reason,
+            "similar_style": self.similar_style,
+            "similar_chemistry": self.similar_chemistry,
+            "opposite_style": self.opposite_style,
+            "opposite_chemistry": self.opposite_chemistry,
+        }
+
+    def to_row(self) -> Dict:
+        """analysis_results 컬럼 dict (analysis_id, session_id 제외)"""
+        return {
+            "style": self.style,
+            "user_type": self.user_type,
+            "keywords": list(self.keywords),
+            "strength": self.strength,
+            "weakness": self.weakness,
+            "best_match": self.best_match,
+            "best_reason": self.best_reason,
+            "similar_style": self.similar_style,
+            "similar_chemistry": self.similar_chemistry,
+            "opposite_style": self.opposite_style,
+            "opposite_chemistry": self.opposite_chemistry,
+            "positive": self.positive,
+            "improvement": self.improvement,
+            "dating_tip": self.dating_tip,
+            "warning": self.warning,
+            "summary": self.summary,
+        }
+
+
+# ---------------------------------------------------------
+# JSON 스키마 (strict 모드: 모든 필드 required, additionalProperties false)
+# ---------------------------------------------------------
+def _object(properties: Dict) -> Dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+_PERSONA_TYPE = {"type": "string", "enum": list(PERSONA_TYPES)}
+
+# 스트리밍 파서가 response를 먼저 읽을 수 있도록 response를 첫 필드로 둠 (strict 모드는 필드 순서 유지)
+TURN_RESULT_SCHEMA = _object({"response": _STRING, "score": {"type": "integer"}, "reason": _STRING})
+
+ROUND_DIGEST_SCHEMA = _object(
+    {
+        "question_frequency": _STRING,
+        "effort": _STRING,
+        "vocabulary": _STRING,
+        "conflict_response": _STRING,
+        "chemistry": _STRING,
+        "user_quotes": _STRING_LIST,
+    }
+)
+
+ANALYSIS_RESULT_SCHEMA = _object(
+    {
+        "my_persona": _object(
+            {
+                "style": _STRING,
+                "type": _PERSONA_TYPE,
+                "keywords": _STRING_LIST,
+                "strength": _STRING,
+                "weakness": _STRING,
+            }
+        ),
+        "compatibility": _object(
+            {
+                "best_match": _PERSONA_TYPE,
+                "best_reason": _STRING,
+                "similar_style": _PERSONA_TYPE,
+                "similar_chemistry": _STRING,
+                "opposite_style": _PERSONA_TYPE,
+                "opposite_chemistry": _STRING,
+            }
+        ),
+        "insights": _object(
+            {
+                "positive": _STRING,
+                "improvement": _STRING,
+                "dating_tip": _STRING,
+                "warning": _STRING,
+            }
+        ),
+        "summary": _STRING,
+    }
+)
+
+
+def response_format(name: str, schema: Dict) -> Dict:
+    """chat.completions.create의 response_format 인자 (스키마 강제, 꺼져 있으면 JSON 모드)"""
+    if not STRUCTURED_OUTPUT_ENABLED:
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+# ---------------------------------------------------------
+# 파싱 / 잘린 JSON 복구
+# ---------------------------------------------------------
+def repair_truncated_json(text: str) -> Optional[str]:
+    """
+    첫 '{'부터 시작하는 JSON 객체를 복구합니다.
+
+    - 객체 뒤에 붙은 잡음(코드 펜스, 설명 문장)은 잘라냅니다.
+    - 중간에 끊긴 경우 열린 문자열 값을 닫고 열린 괄호를 닫습니다. 그래도 안 되면
+      마지막으로 완결된 값까지만 남기고 닫습니다. (끊긴 키, 끊긴 숫자는 버림)
+
+    Returns:
+        json.loads 가능한 문자열, 복구할 수 없으면 None
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    closers = []  # 열린 컨테이너의 닫는 문자
+    expect_key = []  # 컨테이너마다 다음 문자열이 키인지 (배열은 항상 False)
+    checkpoint = None  # (완결된 값 직후 위치, 그때의 닫는 문자열)
+    in_string = is_key = escape = False
+    i, n = start, len(text)
+    while i < n:
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if not is_key:
+                    checkpoint = (i + 1, "".join(reversed(closers)))
+        elif ch == '"':
+            in_string = True
+            is_key = expect_key[-1] if expect_key else False
+        elif ch == "{" or ch == "[":
+            closers.append("}" if ch == "{" else "]")
+            expect_key.append(ch == "{")
+        elif ch == "}" or ch == "]":
+            if not closers or closers[-1] != ch:
+                return None
+            closers.pop()
+            expect_key.pop()
+            if not closers:
+                return text[start : i + 1]
+            checkpoint = (i + 1, "".join(reversed(closers)))
+        elif ch == ":":
+            if expect_key:
+                expect_key[-1] = False
+        elif ch == ",":
+            if closers and closers[-1] == "}":
+                expect_key[-1] = True
+        elif ch not in " \t\r\n":
+            # 숫자, true/false/null: 뒤에 구분자가 와야 완결된 값
+            j = i
+            while j < n and text[j] not in ",}] \t\r\n":
+                j += 1
+            if j < n:
+                checkpoint = (j, "".join(reversed(closers)))
+            i = j
+            continue
+        i += 1
+
+    candidates = []
+    if in_string and not is_key:
+        body = text[start:n - 1] if escape else text[start:n]
+        body = _LONE_HIGH_SURROGATE.sub("", _PARTIAL_UNICODE_ESCAPE.sub("", body))
+        candidates.append(body + '"' + "".join(reversed(closers)))
+    if checkpoint is not None:
+        candidates.append(text[start : checkpoint[0]] + checkpoint[1])
+    for candidate in candidates:
+        try:
+            json.loads(candidate)
+        except ValueError:
+            continue
+        return candidate
+    return None
+
+
+def parse_json_object(text: Optional[str], kind: str) -> Tuple[Dict, bool]:
+    """
+    응답 텍스트를 JSON 객체로 파싱합니다. 정상 JSON은 json.loads 한 번으로 끝나고,
+    실패하면 repair_truncated_json으로 복구합니다.
+
+    Args:
+        kind: 지표 이름 (turn, digest, analysis)
+
+    Returns:
+        (dict, 복구 여부)
+
+    Raises:
+        ResponseParseError: 복구할 수 없는 경우
+    """
+    try:
+        payload = json.loads(text)
+        repaired = False
+    except (TypeError, ValueError):
+        repaired_text = repair_truncated_json(text or "")
+        if repaired_text is None:
+            metrics.increment(f"llm.parse.{kind}.failed")
+            raise ResponseParseError(f"JSON 응답을 복구할 수 없습니다: {(text or '')[:80]!r}")
+        payload = json.loads(repaired_text)
+        repaired = True
+    if not isinstance(payload, dict):
+        metrics.increment(f"llm.parse.{kind}.failed")
+        raise ResponseParseError("JSON 객체가 아닌 응답입니다.")
+    return payload, repaired
+
+
+def _validated(kind: str, text: Optional[str], model):
+    payload, repaired = parse_json_object(text, kind)
+    try:
+        result = model.from_payload(payload, repaired)
+    except ResponseParseError:
+        metrics.increment(f"llm.parse.{kind}.failed")
+        raise
+    metrics.increment(f"llm.parse.{kind}.repaired" if repaired else f"llm.parse.{kind}.ok")
+    return result
+
+
+def parse_turn_result(text: Optional[str]) -> TurnResult:
+    """채팅 응답 텍스트를 TurnResult로 파싱합니다. (실패 시 ResponseParseError)"""
+    return _validated("turn", text, TurnResult)
+
+
+def parse_analysis_result(text: Optional[str]) -> AnalysisResult:
+    """최종 분석 응답 텍스트를 AnalysisResult로 파싱합니다. (실패 시 ResponseParseError)"""
+    return _validated("analysis", text, AnalysisResult)
+
+
+def parse_round_digest(text: Optional[str]) -> Dict:
+    """라운드 요약 카드 응답을 dict로 파싱합니다. (필드는 프롬프트 입력으로만 쓰므로 그대로 보존)"""
+    payload, repaired = parse_json_object(text, "digest")
+    metrics.increment("llm.parse.digest.repaired" if repaired else "llm.parse.digest.ok")
+    return payload
+
+
+def get_parse_stats() -> Dict[str, Dict]:
+    """응답 종류별 정상/복구/실패 횟수와 잘못된 응답(복구+실패) 비율을 반환합니다."""
+    counters = metrics.get_metrics()["counters"]
+    stats = {}
+    for kind in ("turn", "digest", "analysis"):
+        ok, repaired, failed = (int(counters.get(f"llm.parse.{kind}.{name}", 0)) for name in ("ok", "repaired", "failed"))
+        total = ok + repaired + failed
+        stats[kind] = {
+            "ok": ok,
+            "repaired": repaired,
+            "failed": failed,
+            "malformed_rate": (repaired + failed) / total if total else 0.0,
+        }
+    return stats
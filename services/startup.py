@@ -0,0 +1,81 @@
+"""
+앱 시작 시간 측정 및 백그라운드 워밍업 모듈
+
+무거운 의존성(OpenAI, Supabase, ChromaDB, SentenceTransformer)은 처음 필요할 때
+로드되며, 첫 화면이 그려지는 동안 워밍업 스레드가 미리 로드해 둡니다.
+각 import와 초기화에 걸린 시간은 timed()로 기록되어 시작 시간 리포트로 제공됩니다.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# 항목별 첫 측정값만 보관 (Streamlit 재실행마다 다시 기록되지 않도록)
+_timings: Dict[str, float] = {}
+_timings_lock = threading.Lock()
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+_process_started = time.perf_counter()
+
+
+@contextmanager
+def timed(name: str):
+    """블록 실행 시간을 시작 시간 리포트에 기록합니다. (이름별 첫 실행만 기록)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _timings_lock:
+            _timings.setdefault(name, elapsed)
+
+
+def get_startup_report() -> List[Tuple[str, float]]:
+    """기록된 (항목 이름, 소요 시간(초)) 리스트를 기록 순서대로 반환합니다."""
+    with _timings_lock:
+        return list(_timings.items())
+
+
+def format_startup_report() -> str:
+    """시작 시간 리포트를 사람이 읽기 좋은 문자열로 만듭니다."""
+    lines = ["[startup] 초기화 단계별 소요 시간"]
+    for name, elapsed in get_startup_report():
+        lines.append(f"  {elapsed * 1000:9.1f} ms  {name}")
+    lines.append(
+        f"  프로세스 시작 후 경과: {(time.perf_counter() - _process_started) * 1000:.1f} ms"
+    )
+    return "\n".join(lines)
+
+
+def _warmup() -> None:
+    # 순환 import를 피하기 위해 함수 안에서 import
+    from services.db_service import get_supabase
+    from services.llm_service import get_client, get_rag_service
+
+    with timed("warmup total"):
+        for label, initializer in (
+            ("warmup: OpenAI client", get_client),
+            ("warmup: Supabase client", get_supabase),
+            ("warmup: RAG service", get_rag_service),
+        ):
+            try:
+                initializer()
+            except Exception as e:
+                print(f"[startup] {label} 실패: {e}")
+
+    print(format_startup_report())
+
+
+def start_warmup() -> None:
+    """
+    백그라운드 워밍업 스레드를 시작합니다. (프로세스당 한 번만 실행)
+    첫 화면 렌더링을 막지 않고 무거운 서비스를 미리 로드합니다.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=_warmup, name="service-warmup", daemon=True)
+        _warmup_thread.start()
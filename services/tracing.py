@@ -0,0 +1,96 @@
+"""
+턴 처리 구간(span) 추적 모듈
+
+한 턴의 시간이 어디에 쓰이는지(입력 검증, RAG 임베딩, HNSW 검색, OpenAI 응답,
+JSON 파싱, DB 저장 등) 보기 위해 구간별 소요 시간을 services.metrics의
+"span.<이름>" 히스토그램에 기록합니다. p50/p95/p99는 디버그 대시보드와
+Prometheus 텍스트(METRICS_PORT)로 확인할 수 있습니다.
+
+TRACING_ENABLED=0이면:
+    - span()은 아무것도 하지 않는 공용 컨텍스트 매니저를 반환하고
+    - @traced는 함수를 감싸지 않고 그대로 반환하며
+    - record()는 바로 반환하므로 추가 비용이 사실상 없습니다.
+
+사용 예:
+    with span("llm.sanitize"):
+        ...
+
+    @traced("db.save_affinity_log")
+    def save_affinity_log(...):
+        ...
+"""
+
+import functools
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, TypeVar
+
+from config.settings import TRACING_ENABLED
+from services import metrics
+
+F = TypeVar("F", bound=Callable)
+
+SPAN_PREFIX = "span."
+
+_NOOP_SPAN = nullcontext()
+
+
+class _Span:
+    """구간 실행 시간을 히스토그램에 기록하는 컨텍스트 매니저 (예외가 나도 기록)"""
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        metrics.observe(self.name, time.perf_counter() - self.started)
+        if exc_type is not None:
+            metrics.increment(self.name + ".errors")
+        return False
+
+
+def span(name: str):
+    """name 구간의 실행 시간을 기록하는 컨텍스트 매니저를 반환합니다."""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return _Span(SPAN_PREFIX + name)
+
+
+def record(name: str, seconds: float) -> None:
+    """블록으로 감싸기 어려운 구간(스트리밍 첫 토큰 등)의 소요 시간을 직접 기록합니다."""
+    if TRACING_ENABLED:
+        metrics.observe(SPAN_PREFIX + name, seconds)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """함수 전체를 name 구간으로 기록하는 데코레이터 (비활성화 시 원래 함수 그대로)"""
+
+    def decorator(fn: F) -> F:
+        if not TRACING_ENABLED:
+            return fn
+        metric_name = SPAN_PREFIX + name
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(metric_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_span_stats() -> Dict[str, Dict]:
+    """구간 이름별 {count, avg, p50, p95, p99, max} (초 단위)를 반환합니다."""
+    histograms = metrics.get_metrics()["histograms"]
+    return {
+        name[len(SPAN_PREFIX):]: summary
+        for name, summary in histograms.items()
+        if name.startswith(SPAN_PREFIX)
+    }
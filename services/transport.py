@@ -0,0 +1,325 @@
+"""
+공용 HTTP 전송 계층
+
+OpenAI와 Supabase 클라이언트가 사용할 httpx 커넥션 풀(keep-alive)과 타임아웃,
+멱등 작업에만 적용하는 재시도 정책, 업스트림별 서킷 브레이커를 제공합니다.
+
+- 풀: 업스트림마다 하나의 httpx.Client를 프로세스 전체에서 공유합니다.
+- 타임아웃: 연결/읽기 deadline이 있어 느린 업스트림이 Streamlit 스크립트 스레드를 무한히 막지 않습니다.
+- 재시도: 조회, eq 조건 update, 클라이언트 생성 UUID로 upsert하는 insert처럼
+  여러 번 실행해도 결과가 같은 작업만 지터를 더한 지수 백오프로 재시도합니다.
+  채팅 생성처럼 멱등이 아닌 호출은 재시도하지 않습니다.
+  속도 제한(RateLimited)으로 보내지 못한 호출은 실패로 세지 않습니다.
+- 서킷 브레이커: 연속 실패가 쌓이면 일정 시간 호출을 건너뛰고(RAG 생략, 로그 저장 생략 등)
+  이후 한 번 시험 호출하여 회복 여부를 확인합니다.
+- 지표: 요청 지연(p50/p95/p99), 진행 중 요청 수, 풀 커넥션 수를 services.metrics에 기록합니다.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from config.settings import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    IDEMPOTENT_MAX_RETRIES,
+)
+from services import metrics
+from services.rate_limiter import RateLimited
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷 브레이커가 열려 있어 호출을 건너뛴 경우"""
+
+
+class CircuitBreaker:
+    """
+    연속 실패 횟수 기반 서킷 브레이커
+
+    closed: 정상 호출 / open: reset_timeout 동안 호출 차단 /
+    half_open: 시험 호출 하나만 허용, 성공하면 closed, 실패하면 다시 open
+               (시험 호출 결과가 reset_timeout 안에 반영되지 않으면 실패로 보고 다시 open)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        now = time.monotonic()
+        if self._state == self.HALF_OPEN and self._trial_in_flight and now - self._trial_started_at >= self.reset_timeout:
+            # 허용받은 쪽이 결과를 알리지 않은 시험 호출: 자리가 영원히 잡혀 있지 않도록 다시 open
+            self._state = self.OPEN
+            self._opened_at = now
+            self._trial_in_flight = False
+            metrics.increment(f"circuit.{self.name}.trial_expired")
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """지금 호출해도 되는지 반환합니다. (half_open에서는 시험 호출 하나만 허용)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started_at = time.monotonic()
+                return True
+        metrics.increment(f"circuit.{self.name}.rejected")
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"[circuit] {self.name} 회복 (closed)")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    print(f"[circuit] {self.name} 차단 (open, 연속 실패 {self._failures}회)")
+                    metrics.increment(f"circuit.{self.name}.opened")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release(self) -> None:
+        """호출을 허용받았지만 업스트림에 보내지 않은 경우(속도 제한 등) 시험 호출 자리를 반납합니다."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"state": self._current_state(), "consecutive_failures": self._failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """업스트림 이름별 서킷 브레이커를 반환합니다. (openai, supabase, rag)"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def call_with_policy(
+    upstream: str,
+    operation: str,
+    fn: Callable[[], T],
+    idempotent: bool = False,
+    max_retries: int = IDEMPOTENT_MAX_RETRIES,
+    base_backoff: float = 0.2,
+) -> T:
+    """
+    서킷 브레이커와 재시도 정책을 적용하여 fn을 호출합니다.
+
+    Args:
+        upstream: 업스트림 이름 (서킷 브레이커 및 지표 이름에 사용)
+        operation: 작업 이름 (지표 이름에 사용, 예: "chat_logs.select")
+        fn: 실제 호출
+        idempotent: True일 때만 실패 시 재시도
+        max_retries: 멱등 작업의 최대 재시도 횟수
+        base_backoff: 첫 재시도 대기 시간(초), 이후 2배씩 증가
+
+    Raises:
+        CircuitOpenError: 서킷이 열려 있어 호출하지 않은 경우
+        Exception: 재시도를 모두 소진한 뒤의 마지막 예외
+    """
+    breaker = get_breaker(upstream)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{upstream} 서킷이 열려 있어 호출을 건너뜁니다.")
+
+    attempts = max_retries + 1 if idempotent else 1
+    for attempt in range(attempts):
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except RateLimited:
+            # 보내기 전에 속도 제한으로 거절된 요청은 업스트림 장애가 아니므로 서킷에 반영하지 않음
+            metrics.increment(f"{upstream}.{operation}.rate_limited")
+            breaker.release()
+            raise
+        except Exception:
+            metrics.increment(f"{upstream}.{operation}.errors")
+            if attempt == attempts - 1:
+                breaker.record_failure()
+                raise
+            metrics.increment(f"{upstream}.{operation}.retries")
+            backoff = base_backoff * (2 ** attempt)
+            time.sleep(backoff + random.uniform(0, backoff))
+            continue
+        metrics.observe(f"{upstream}.{operation}.latency", time.perf_counter() - started)
+        breaker.record_success()
+        return result
+
+
+# ---------------------------------------------------------
+# 커넥션 풀
+# ---------------------------------------------------------
+_http_clients: Dict[str, httpx.Client] = {}
+_async_http_clients: Dict[str, httpx.AsyncClient] = {}
+_http_clients_lock = threading.Lock()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+class _MeteredTransport(httpx.HTTPTransport):
+    """요청 수, 진행 중 요청 수, 응답 헤더 도착까지의 지연을 기록하는 전송 계층"""
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(**kwargs)
+        self.upstream = upstream
+
+    def handle_request(self, request):
+        prefix = f"http.{self.upstream}"
+        metrics.increment(f"{prefix}.requests")
+        metrics.max_gauge(f"{prefix}.peak_in_flight", metrics.adjust_gauge(f"{prefix}.in_flight", 1))
+        started = time.perf_counter()
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            metrics.increment(f"{prefix}.transport_errors")
+            raise
+        finally:
+            metrics.adjust_gauge(f"{prefix}.in_flight", -1)
+        # 응답 헤더 도착까지의 시간 (스트리밍 본문 제외)
+        metrics.observe(f"{prefix}.latency", time.perf_counter() - started)
+        if response.status_code >= 500 or response.status_code == 429:
+            metrics.increment(f"{prefix}.status_{response.status_code}")
+        return response
+
+
+class _MeteredAsyncTransport(httpx.AsyncHTTPTransport):
+    """_MeteredTransport의 asyncio 버전 (LLM 게이트웨이용)"""
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(**kwargs)
+        self.upstream = upstream
+
+    async def handle_async_request(self, request):
+        prefix = f"http.{self.upstream}"
+        metrics.increment(f"{prefix}.requests")
+        metrics.max_gauge(f"{prefix}.peak_in_flight", metrics.adjust_gauge(f"{prefix}.in_flight", 1))
+        started = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            metrics.increment(f"{prefix}.transport_errors")
+            raise
+        finally:
+            metrics.adjust_gauge(f"{prefix}.in_flight", -1)
+        metrics.observe(f"{prefix}.latency", time.perf_counter() - started)
+        if response.status_code >= 500 or response.status_code == 429:
+            metrics.increment(f"{prefix}.status_{response.status_code}")
+        return response
+
+
+def get_http_client(upstream: str, read_timeout: float) -> httpx.Client:
+    """
+    업스트림별로 공유하는 keep-alive 커넥션 풀 클라이언트를 반환합니다.
+
+    Args:
+        upstream: 업스트림 이름 ("openai", "supabase")
+        read_timeout: 기본 읽기 타임아웃(초), 호출마다 더 짧게 지정할 수 있음
+    """
+    with _http_clients_lock:
+        client = _http_clients.get(upstream)
+        if client is None:
+            transport = _MeteredTransport(upstream, limits=_pool_limits())
+            client = httpx.Client(
+                transport=transport,
+                timeout=httpx.Timeout(read_timeout, connect=HTTP_CONNECT_TIMEOUT),
+                follow_redirects=True,
+            )
+            _http_clients[upstream] = client
+        return client
+
+
+def get_async_http_client(upstream: str, read_timeout: float, max_connections: Optional[int] = None) -> httpx.AsyncClient:
+    """
+    asyncio용 keep-alive 커넥션 풀 클라이언트를 반환합니다.
+    AsyncClient는 처음 사용한 이벤트 루프에 묶이므로 한 루프(LLM 게이트웨이)에서만 사용해야 합니다.
+
+    Args:
+        upstream: 업스트림 이름 (지표 이름은 "<upstream>-async")
+        read_timeout: 기본 읽기 타임아웃(초)
+        max_connections: 최대 커넥션 수 (None이면 HTTP_MAX_CONNECTIONS)
+    """
+    name = f"{upstream}-async"
+    with _http_clients_lock:
+        client = _async_http_clients.get(name)
+        if client is None:
+            limits = _pool_limits()
+            if max_connections is not None:
+                limits = httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=min(max_connections, HTTP_MAX_KEEPALIVE),
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                )
+            client = httpx.AsyncClient(
+                transport=_MeteredAsyncTransport(name, limits=limits),
+                timeout=httpx.Timeout(read_timeout, connect=HTTP_CONNECT_TIMEOUT),
+                follow_redirects=True,
+            )
+            _async_http_clients[name] = client
+        return client
+
+
+def _pool_connections(client) -> Optional[int]:
+    # httpx는 풀 상태를 공개 API로 제공하지 않으므로 httpcore 풀에서 조회 (없으면 None)
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    return len(connections) if connections is not None else None
+
+
+def get_transport_stats() -> Dict:
+    """업스트림별 풀 커넥션 수, 서킷 상태와 전체 지표를 반환합니다."""
+    with _http_clients_lock:
+        clients = {**_http_clients, **_async_http_clients}
+        pools = {name: {"connections": _pool_connections(client)} for name, client in clients.items()}
+    with _breakers_lock:
+        breakers = {name: breaker.snapshot() for name, breaker in _breakers.items()}
+    return {"pools": pools, "circuits": breakers, "metrics": metrics.get_metrics()}
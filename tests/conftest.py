@@ -0,0 +1,13 @@
+"""
+테스트 공통 설정: 외부 서비스(Supabase, OpenAI) 없이 BACKEND_MODE=fake 대역으로 실행합니다.
+
+실행: python -m pytest -q
+"""
+
+import os
+import sys
+
+# config.settings가 import 시점에 환경 변수를 읽으므로 서비스 모듈보다 먼저 설정
+os.environ["BACKEND_MODE"] = "fake"
+os.environ.setdefault("FAKE_SUPABASE_LATENCY", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
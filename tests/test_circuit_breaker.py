@@ -0,0 +1,80 @@
+"""
+서킷 브레이커 half_open 시험 호출 자리 반납 테스트
+
+실행: python -m pytest -q tests/test_circuit_breaker.py
+"""
+
+import time
+
+import pytest
+
+from services import llm_service
+from services.response_models import TurnResult
+from services.transport import CircuitBreaker
+
+RESET_TIMEOUT = 0.05
+
+
+class _StubRAGService:
+    def search_context(self, query):
+        return f"context for {query}"
+
+
+@pytest.fixture
+def prefetcher(monkeypatch):
+    """열렸다가 reset_timeout이 지나 half_open이 된 브레이커를 쓰는 prefetcher"""
+    monkeypatch.setattr(llm_service, "get_rag_service", lambda: _StubRAGService())
+    prefetcher = llm_service.RAGPrefetcher(max_workers=1, timeout=1)
+    prefetcher._breaker = CircuitBreaker("rag-test", failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    prefetcher._breaker.record_failure()
+    time.sleep(RESET_TIMEOUT * 1.5)
+    assert prefetcher._breaker.state == CircuitBreaker.HALF_OPEN
+    monkeypatch.setattr(llm_service, "_rag_prefetcher", prefetcher)
+    return prefetcher
+
+
+def _wait_closed(breaker, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while breaker.state != CircuitBreaker.CLOSED and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return breaker.state
+
+
+def test_unreported_trial_falls_back_to_open():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    breaker.record_failure()
+    time.sleep(RESET_TIMEOUT * 1.5)
+
+    assert breaker.allow()  # 시험 호출 (결과를 알리지 않음)
+    assert not breaker.allow()
+
+    time.sleep(RESET_TIMEOUT * 1.5)
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(RESET_TIMEOUT * 1.5)
+    assert breaker.allow()  # 다시 시험 호출 가능
+
+
+def test_discarded_prefetch_settles_trial(prefetcher):
+    prefetch = prefetcher.submit("안녕")
+    assert prefetch is not None
+    prefetcher.discard(prefetch)
+    assert _wait_closed(prefetcher._breaker) == CircuitBreaker.CLOSED
+
+
+def test_response_cache_hit_discards_prefetch(prefetcher, monkeypatch):
+    cached = TurnResult("캐시된 응답", score=1)
+    monkeypatch.setattr(llm_service._response_cache, "lookup", lambda scope, messages: cached)
+
+    prefetch = prefetcher.submit("안녕")
+    final_messages, blocked, _ = llm_service._prepare_messages(
+        [{"role": "user", "content": "안녕"}], rag_prefetch=prefetch
+    )
+    assert final_messages is None and blocked is cached
+    assert _wait_closed(prefetcher._breaker) == CircuitBreaker.CLOSED
+
+
+def test_mismatched_prefetch_does_not_block_later_searches(prefetcher):
+    prefetch = prefetcher.submit("이전 메시지")
+    llm_service._prepare_messages([{"role": "user", "content": "새 메시지"}], rag_prefetch=prefetch)
+    assert _wait_closed(prefetcher._breaker) == CircuitBreaker.CLOSED
+    assert prefetcher.search_inline("다음 메시지") == "context for 다음 메시지"
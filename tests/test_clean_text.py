@@ -0,0 +1,30 @@
+"""
+clean_text / clean_texts 골든 출력 동등성 테스트 (기존 re.sub 구현과 비교)
+
+실행: python -m pytest -q tests/test_clean_text.py
+"""
+
+import random
+
+import pytest
+
+from preprocess.clean_text_check import GOLDEN_CASES, check_equivalence, legacy_clean_text, random_line
+from preprocess.data_preprocessor import clean_text, clean_texts
+
+
+@pytest.mark.parametrize("line", GOLDEN_CASES)
+def test_golden_cases_match_legacy(line):
+    assert clean_text(line) == legacy_clean_text(line)
+
+
+def test_random_lines_match_legacy():
+    rng = random.Random(42)
+    lines = [random_line(rng) for _ in range(5000)]
+    assert check_equivalence(GOLDEN_CASES + lines) == 0
+
+
+def test_clean_texts_matches_per_line():
+    rng = random.Random(7)
+    lines = GOLDEN_CASES + [random_line(rng) for _ in range(1000)]
+    assert clean_texts(lines) == [clean_text(line) for line in lines]
+    assert clean_texts([]) == []
@@ -0,0 +1,34 @@
+"""
+register_user / create_game_session 저장 확인 테스트 (BACKEND_MODE=fake)
+
+실행: python -m pytest -q tests/test_db_service.py
+"""
+
+from services import db_service
+from services.fakes import FakeResponse
+
+
+def test_register_user_returns_id_of_stored_row():
+    user_id = db_service.register_user("테스터", "M")
+    assert user_id is not None
+    rows = db_service.get_supabase().tables["users"]
+    assert any(row["user_id"] == user_id for row in rows)
+
+
+def test_ignored_write_returns_none(monkeypatch):
+    # 쓰기가 무시되어 행이 없으면 id를 돌려주지 않음
+    monkeypatch.setattr(db_service, "_insert_idempotent", lambda table, row: FakeResponse([]))
+    assert db_service.register_user("테스터", "F") is None
+    assert db_service.create_game_session("user-1") is None
+
+
+def test_existing_row_is_confirmed_by_primary_key(monkeypatch):
+    # 재시도에서 이미 들어간 행이 무시되어 빈 응답이 와도, 행이 있으면 id를 반환
+    def insert_then_ignore(table, row):
+        db_service.get_supabase().tables.setdefault(table, []).append(dict(row))
+        return FakeResponse([])
+
+    monkeypatch.setattr(db_service, "_insert_idempotent", insert_then_ignore)
+    session_id = db_service.create_game_session("user-1")
+    assert session_id is not None
+    assert any(row["session_id"] == session_id for row in db_service.get_supabase().tables["game_sessions"])
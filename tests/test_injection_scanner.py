@@ -0,0 +1,39 @@
+"""
+InjectionScanner 우선순위 판정 테스트 (기존 규칙별 부분 문자열 검사와 비교)
+
+실행: python -m pytest -q tests/test_injection_scanner.py
+"""
+
+import random
+
+from services.injection_scanner import InjectionScanner
+
+RULES = [
+    {"id": "first", "message": "first:{pattern}", "patterns": ["ab", "abc", "b", "ca"]},
+    {"id": "second", "message": "second:{pattern}", "patterns": ["a", "abcd", "bc", "AB", "x"]},
+]
+
+
+def _legacy_scan(text):
+    text_lower = text.lower()
+    for rule in RULES:
+        for pattern in rule["patterns"]:
+            if pattern.lower() in text_lower:
+                return rule["message"].format(pattern=pattern)
+    return None
+
+
+def test_matches_legacy_priority_for_short_and_long_text():
+    scanner = InjectionScanner(RULES)
+    rng = random.Random(7)
+    for _ in range(5000):
+        length = rng.choice([rng.randint(0, 30), rng.randint(300, 2000)])
+        text = "".join(rng.choice("abcdxAB ") for _ in range(length))
+        match = scanner.scan(text)
+        assert (match.message if match else None) == _legacy_scan(text), text
+
+
+def test_later_higher_priority_match_wins():
+    scanner = InjectionScanner(RULES)
+    assert scanner.scan("x" * 1000 + "ca").pattern == "ca"
+    assert scanner.scan("d" * 1000) is None
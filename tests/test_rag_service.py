@@ -0,0 +1,46 @@
+"""
+RAGService 쿼리 정규화(캐시 키 전용) 테스트
+
+실행: python -m pytest -q tests/test_rag_service.py
+"""
+
+from services.rag_service import RAGService
+
+
+class _RecordingChroma:
+    """임베딩/검색에 넘어온 쿼리를 기록하는 ChromaService 대역"""
+
+    version = 0
+
+    def __init__(self):
+        self.embedded = []
+        self.queried = []
+
+    def embed_query(self, query):
+        self.embedded.append(query)
+        return [float(len(query))]
+
+    def get_similar_conversations(self, query, n_results, platform_filter=None, subject_filter=None, query_embedding=None):
+        self.queried.append(query)
+        return [{"metadata": {"subject": "일상"}, "dialogue": f"A: {query}"}]
+
+
+def test_original_query_is_embedded_and_searched():
+    chroma = _RecordingChroma()
+    rag = RAGService(chroma_service=chroma)
+
+    context = rag.search_context("  Hello   World ")
+    assert chroma.embedded == ["  Hello   World "]
+    assert chroma.queried == ["  Hello   World "]
+    assert "A:   Hello   World " in context
+
+
+def test_normalized_query_is_cache_key():
+    chroma = _RecordingChroma()
+    rag = RAGService(chroma_service=chroma)
+
+    first = rag.search_context("Hello World")
+    assert rag.search_context("hello   world") == first
+    assert rag.embed_query("HELLO WORLD") == [11.0]
+    assert chroma.embedded == ["Hello World"]
+    assert chroma.queried == ["Hello World"]
@@ -0,0 +1,33 @@
+"""
+응답 캐시 저장/조회 키 일치 테스트 (정제된 사용자 메시지 기준)
+
+실행: python -m pytest -q tests/test_response_cache.py
+"""
+
+import pytest
+
+from services import llm_service
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """응답 캐시 조회/저장에 넘어온 대화 기록을 기록합니다."""
+    calls = {"lookup": [], "store": []}
+    monkeypatch.setattr(llm_service, "get_rag_service", lambda: None)
+    monkeypatch.setattr(llm_service._response_cache, "lookup", lambda scope, messages: calls["lookup"].append(messages))
+    monkeypatch.setattr(
+        llm_service._response_cache, "store", lambda scope, messages, result: calls["store"].append(messages)
+    )
+    return calls
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_store_uses_sanitized_messages(recorded, stream):
+    messages = [{"role": "system", "content": "persona"}, {"role": "user", "content": "안녕 <<<<< 반가워"}]
+    result = llm_service.get_ai_response(messages, stream=stream, cache_scope=("A", "M", "테스터"))
+    if stream:
+        list(result)
+
+    assert recorded["store"] == recorded["lookup"]
+    assert recorded["store"][0][-1]["content"] == "안녕 < 반가워"
+    assert messages[-1]["content"] == "안녕 <<<<< 반가워"
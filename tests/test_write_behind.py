@@ -0,0 +1,90 @@
+"""
+WriteBehindQueue 배치 분할과 큐 순서 테스트
+
+실행: python -m pytest -q tests/test_write_behind.py
+"""
+
+import pytest
+
+from services import transport
+from services.db_service import WriteBehindQueue
+
+
+class _StubQuery:
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._call = None
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self._call = ("insert", self._table, [row["id"] for row in rows])
+        self._rows = rows
+        return self
+
+    def update(self, values):
+        self._call = ("update", self._table, values)
+        self._rows = []
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def execute(self):
+        self._client.requests.append(self._call)
+        if any(row.get("bad") for row in self._rows):
+            raise ValueError("null value violates not-null constraint")
+        self._client.written.append(self._call)
+
+
+class _StubClient:
+    """bad=True인 행이 들어 있는 upsert는 항상 실패하는 클라이언트"""
+
+    def __init__(self):
+        self.requests = []
+        self.written = []
+
+    def table(self, name):
+        return _StubQuery(self, name)
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(transport, "_breakers", {})
+
+
+def _queue(client):
+    return WriteBehindQueue(lambda: client, max_retries=1, base_backoff=0.001)
+
+
+def test_bad_row_only_drops_itself():
+    client = _StubClient()
+    wbq = _queue(client)
+    rows = [{"id": i, "bad": i == 5} for i in range(8)]
+    wbq._process([("insert", "affinity_logs", row) for row in rows])
+
+    written = sorted(i for _, _, ids in client.written for i in ids)
+    assert written == [0, 1, 2, 3, 4, 6, 7]
+    stats = wbq.get_stats()
+    assert stats["dropped_rows"] == 1
+    assert stats["flushed_rows"] == 7
+    assert transport.get_breaker("supabase").state == transport.CircuitBreaker.CLOSED
+
+
+def test_operations_keep_queue_order():
+    client = _StubClient()
+    wbq = _queue(client)
+    wbq._process(
+        [
+            ("insert", "chat_logs", {"id": 1}),
+            ("update", "game_sessions", {"final_choice": "TOUGH"}, ("session_id", "s1")),
+            ("insert", "chat_logs", {"id": 2}),
+            ("insert", "chat_logs", {"id": 3}),
+            ("insert", "affinity_logs", {"id": 4}),
+        ]
+    )
+    assert client.written == [
+        ("insert", "chat_logs", [1]),
+        ("update", "game_sessions", {"final_choice": "TOUGH"}),
+        ("insert", "chat_logs", [2, 3]),
+        ("insert", "affinity_logs", [4]),
+    ]
@@ -0,0 +1,147 @@
+# views/analytics_view.py
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from services.affinity_analytics import (
+    get_affinity_analytics_stats,
+    get_affinity_report,
+    refresh_affinity_logs,
+)
+
+# 기간 선택지 (None이면 전체)
+WINDOWS = {"최근 24시간": 1, "최근 7일": 7, "최근 30일": 30, "전체": None}
+PERSONA_COLORS = {"EMOTIONAL": "#f48fb1", "LOGICAL": "#64b5f6", "TOUGH": "#ffb74d"}
+
+
+def _values(array):
+    """nan을 None으로 바꿔 Plotly가 빈 칸으로 그리도록 합니다."""
+    return [None if np.isnan(value) else float(value) for value in array]
+
+
+def _score_curve_chart(report):
+    fig = go.Figure()
+    turns = report["turns"]
+    curve = report["score_curve"]
+    for p, persona in enumerate(report["personas"]):
+        mean, std = curve["mean"][p], curve["std"][p]
+        color = PERSONA_COLORS.get(persona)
+        # 평균 ± 표준편차 띠
+        fig.add_trace(
+            go.Scatter(
+                x=turns + turns[::-1],
+                y=_values(mean + std) + _values((mean - std)[::-1]),
+                fill="toself",
+                fillcolor=color,
+                opacity=0.15,
+                line={"width": 0},
+                hoverinfo="skip",
+                showlegend=False,
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=turns,
+                y=_values(mean),
+                name=persona,
+                mode="lines+markers",
+                line={"color": color},
+                customdata=curve["count"][p],
+                hovertemplate="턴 %{x}: 평균 %{y:.1f}점 (n=%{customdata})<extra></extra>",
+            )
+        )
+    fig.update_layout(xaxis_title="턴", yaxis_title="호감도", yaxis_range=[0, 100], height=380)
+    return fig
+
+
+def _drop_off_chart(report):
+    fig = go.Figure()
+    for p, persona in enumerate(report["personas"]):
+        conversations = report["conversations"][p]
+        if not conversations:
+            continue
+        fig.add_trace(
+            go.Bar(
+                x=report["turns"],
+                y=report["drop_off"][p] / conversations,
+                name=persona,
+                marker_color=PERSONA_COLORS.get(persona),
+            )
+        )
+    fig.update_layout(barmode="group", xaxis_title="마지막 턴", yaxis_title="대화 비율", yaxis_tickformat=".0%", height=320)
+    return fig
+
+
+def _game_over_chart(report):
+    rates = report["game_over_rate"]
+    fig = go.Figure(
+        go.Bar(
+            x=list(report["personas"]),
+            y=_values(rates),
+            marker_color=[PERSONA_COLORS.get(persona) for persona in report["personas"]],
+            text=[f"{rate:.1%}" if not np.isnan(rate) else "-" for rate in rates],
+        )
+    )
+    fig.update_layout(yaxis_title="게임 오버 비율", yaxis_tickformat=".0%", height=320)
+    return fig
+
+
+def _trigger_chart(report, group):
+    effects = report["trigger_effects"]
+    fig = go.Figure(
+        go.Bar(
+            x=_values(effects["effect_size"][group]),
+            y=list(report["trigger_features"]),
+            orientation="h",
+            customdata=np.stack([effects["count"][group], effects["mean_with"][group], effects["mean_without"][group]], axis=1),
+            hovertemplate=(
+                "%{y}: d=%{x:.2f}<br>해당 턴 %{customdata[0]}개, 평균 변화 %{customdata[1]:+.1f}"
+                " (없을 때 %{customdata[2]:+.1f})<extra></extra>"
+            ),
+        )
+    )
+    fig.update_layout(xaxis_title="효과 크기 (Cohen's d)", height=360)
+    return fig
+
+
+def show_analytics():
+    """호감도 궤적 분석 대시보드. DEBUG_DASHBOARD=1 + ?analytics=1 로 접근"""
+    st.title("📈 호감도 궤적 분석")
+
+    col_window, col_refresh = st.columns([3, 1])
+    window = col_window.radio("기간", list(WINDOWS), index=1, horizontal=True)
+    if col_refresh.button("🔄 다시 불러오기"):
+        refresh_affinity_logs()
+
+    with st.spinner("affinity_logs를 불러오는 중입니다..."):
+        report = get_affinity_report(WINDOWS[window])
+
+    if not report["rows"]:
+        st.info("선택한 기간에 기록된 호감도 로그가 없습니다.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("로그 행", f"{report['rows']:,}")
+    col2.metric("세션", f"{report['sessions']:,}")
+    col3.metric("대화 (세션 x 상대)", f"{int(report['conversations'].sum()):,}")
+
+    st.subheader("턴별 호감도 곡선")
+    st.plotly_chart(_score_curve_chart(report))
+
+    st.subheader("이탈 턴 분포")
+    st.caption("대화마다 마지막으로 기록된 턴 (마지막 턴 전에 끝났으면 게임 오버 또는 이탈)")
+    st.plotly_chart(_drop_off_chart(report))
+
+    st.subheader("게임 오버 비율")
+    st.plotly_chart(_game_over_chart(report))
+
+    st.subheader("트리거 메시지 효과 크기")
+    groups = ["전체"] + list(report["personas"])
+    group = st.selectbox("상대 타입", groups)
+    st.plotly_chart(_trigger_chart(report, groups.index(group)))
+
+    stats = get_affinity_analytics_stats()
+    st.caption(
+        f"계산 {report['seconds'] * 1000:.1f}ms · 불러오기 {stats['loads']}회 ({stats['load_seconds']:.1f}s) · "
+        f"기간별 결과 캐시 적중률 {stats['report_cache']['hit_rate'] * 100:.0f}%"
+    )
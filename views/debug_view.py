@@ -0,0 +1,158 @@
+# views/debug_view.py
+import streamlit as st
+from services.llm_service import (
+    get_llm_gateway_stats,
+    get_response_cache_stats,
+    get_rag_prefetch_stats,
+    get_rag_service,
+    set_response_cache_enabled,
+)
+from services.analysis_jobs import get_analysis_job_stats
+from services.context_manager import get_context_stats, get_prompt_cache_stats
+from services.startup import format_startup_report
+from services.metrics import format_prometheus
+from services.response_models import get_parse_stats
+from services.tracing import get_span_stats
+from services.transport import get_transport_stats
+
+
+def show_debug():
+    """운영 지표 대시보드 (캐시 적중률, 토큰 절약량 등). DEBUG_DASHBOARD=1 + ?debug=1 로 접근"""
+    st.title("🛠️ 디버그 대시보드")
+    if st.button("🔄 새로고침"):
+        st.rerun()
+
+    # 1. 초반 턴 응답 캐시
+    st.subheader("💬 초반 턴 응답 캐시")
+    cache_stats = get_response_cache_stats()
+    enabled = st.toggle("응답 캐시 사용 (kill switch)", value=cache_stats["enabled"])
+    if enabled != cache_stats["enabled"]:
+        set_response_cache_enabled(enabled)
+        st.rerun()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("적중률", f"{cache_stats['hit_rate'] * 100:.1f}%")
+    col2.metric("적중 / 조회", f"{cache_stats['hits']} / {cache_stats['lookups']}")
+    col3.metric("저장", cache_stats["stores"])
+    col4.metric("버킷 수", cache_stats["buckets"])
+
+    # 2. 프롬프트 토큰
+    st.subheader("🧮 프롬프트 토큰")
+    context_stats = get_context_stats()
+    prompt_cache_stats = get_prompt_cache_stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("컨텍스트 윈도우 절약 토큰", context_stats["tokens_saved"])
+    col2.metric("프롬프트 캐시 비율", f"{prompt_cache_stats['cached_ratio'] * 100:.1f}%")
+    col3.metric("캐시된 입력 토큰", prompt_cache_stats["cached_tokens"])
+    st.json({"context_window": context_stats, "prompt_cache": prompt_cache_stats}, expanded=False)
+
+    # 3. RAG
+    st.subheader("🔍 RAG 검색")
+    prefetch_stats = get_rag_prefetch_stats()
+    st.metric("검색 시간 중 겹친 비율", f"{prefetch_stats['overlap_ratio'] * 100:.1f}%")
+    rag_service = get_rag_service()
+    st.json(
+        {
+            "prefetch": prefetch_stats,
+            "cache": rag_service.get_cache_stats() if rag_service else None,
+        },
+        expanded=False,
+    )
+
+    # 4. 분석 작업 큐
+    st.subheader("📊 분석 작업 큐")
+    job_stats = get_analysis_job_stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("대기 / 실행 중", f"{job_stats['status']['queued']} / {job_stats['status']['running']}")
+    col2.metric("완료 / 실패", f"{job_stats['succeeded']} / {job_stats['failed']}")
+    col3.metric("재시도", job_stats["retries"])
+
+    # 5. LLM 게이트웨이 (모델별 대기열)
+    st.subheader("🚦 LLM 게이트웨이")
+    gateway_stats = get_llm_gateway_stats()
+    if not gateway_stats["enabled"]:
+        st.caption("LLM_GATEWAY_ENABLED=0: 세션 스레드에서 동기 호출 중")
+    for model, lane in gateway_stats["models"].items():
+        wait = lane["queue_wait"] or {}
+        by_priority = lane["queued_by_priority"]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(f"{model} 실행 중", f"{lane['in_flight']} / {lane['max_concurrency']}")
+        col2.metric(
+            "대기 (세션 수)",
+            f"{lane['queued']} ({lane['sessions_waiting']})",
+            f"대화 {by_priority['chat']} / 분석 {by_priority['analysis']}",
+            delta_color="off",
+        )
+        col3.metric("대기 p95", f"{wait['p95'] * 1000:.0f} ms" if wait.get("p95") is not None else "-")
+        col4.metric("대기열 한도", f"{gateway_stats['max_queue']} / 우선순위")
+
+    # 모델별 RPM/TPM 토큰 버킷 (file 저장소면 같은 호스트의 모든 프로세스가 공유하는 값)
+    rate_limit = gateway_stats["rate_limit"]
+    st.caption(
+        f"속도 제한 저장소: {rate_limit['backend']}, 분석 요청 예비분: {rate_limit['low_priority_reserve']:.0%}"
+    )
+    for model, bucket in rate_limit["models"].items():
+        col1, col2, col3 = st.columns(3)
+        for col, label, available, limit in (
+            (col1, f"{model} 남은 요청", bucket["requests_available"], bucket["requests_per_minute"]),
+            (col2, "남은 토큰", bucket["tokens_available"], bucket["tokens_per_minute"]),
+        ):
+            col.metric(label, f"{available:,.0f} / {limit:,}" if available is not None else "제한 없음")
+        col3.metric("429 차단", f"{bucket['blocked_seconds']:.1f}s" if bucket["blocked_seconds"] else "-")
+
+    # 6. LLM 응답 파싱 (구조화 출력 검증)
+    st.subheader("🧩 LLM 응답 파싱")
+    parse_stats = get_parse_stats()
+    cols = st.columns(len(parse_stats))
+    for col, (kind, kind_stats) in zip(cols, parse_stats.items()):
+        col.metric(
+            f"{kind} 잘못된 응답 비율",
+            f"{kind_stats['malformed_rate'] * 100:.1f}%",
+            f"복구 {kind_stats['repaired']} / 실패 {kind_stats['failed']}",
+            delta_color="off",
+        )
+
+    # 7. 외부 호출 (커넥션 풀, 서킷 브레이커, 지연 시간)
+    st.subheader("🌐 외부 호출")
+    transport_stats = get_transport_stats()
+    circuits = transport_stats["circuits"]
+    if circuits:
+        cols = st.columns(len(circuits))
+        for col, (name, circuit) in zip(cols, circuits.items()):
+            col.metric(f"{name} 서킷", circuit["state"], f"연속 실패 {circuit['consecutive_failures']}", delta_color="off")
+    latency_rows = [
+        {"name": name, **summary}
+        for name, summary in transport_stats["metrics"]["histograms"].items()
+    ]
+    if latency_rows:
+        st.dataframe(latency_rows, hide_index=True)
+    st.json(transport_stats, expanded=False)
+
+    # 8. 턴 처리 구간별 지연 시간
+    st.subheader("⏳ 구간별 지연 시간")
+    span_stats = get_span_stats()
+    if span_stats:
+        st.dataframe(
+            [
+                {
+                    "구간": name,
+                    "횟수": summary["count"],
+                    **{
+                        f"{key} (ms)": round(summary[key] * 1000, 1) if summary[key] is not None else None
+                        for key in ("avg", "p50", "p95", "p99", "max")
+                    },
+                }
+                for name, summary in span_stats.items()
+            ],
+            hide_index=True,
+        )
+    else:
+        st.caption("아직 기록된 구간이 없습니다. (TRACING_ENABLED=0이면 기록하지 않음)")
+    prometheus_text = format_prometheus()
+    with st.expander("Prometheus 텍스트"):
+        st.code(prometheus_text, language="text")
+    st.download_button("metrics.txt 다운로드", prometheus_text, file_name="metrics.txt", mime="text/plain")
+
+    # 9. 시작 시간
+    st.subheader("⏱️ 시작 시간")
+    st.code(format_startup_report())
@@ -1,7 +1,9 @@
 import streamlit as st
 import time
-from services.llm_service import get_ai_response
-from services.db_service import save_chat_log, save_affinity_log
+from services.llm_service import get_ai_response, prefetch_rag_context
+from services.db_service import queue_chat_log, queue_affinity_log
+from services.analysis_jobs import submit_analysis, submit_round_digest
+from services.tracing import record, span
 from config.prompts import get_system_prompt, get_persona_name, get_first_greeting
 
 # 한 사람당 최대 대화 횟수
@@ -131,6 +133,11 @@ def show_game():
             with st.chat_message(msg["role"]):
                 st.write(msg["content"])
 
+    # 요청이 몰려 처리하지 못한 직전 턴 안내
+    rate_limit_notice = st.session_state.pop("rate_limit_notice", None)
+    if rate_limit_notice:
+        st.warning(rate_limit_notice)
+
     # 대기 중인 메시지 처리 (AI 응답 생성)
     if st.session_state.get("pending_message"):
         full_response = ""  # 변수를 미리 선언 (with 블록 밖에서 접근 가능하도록)
@@ -140,23 +147,47 @@ def show_game():
             message_placeholder = st.empty()
             message_placeholder.markdown("입력 중... ▌")
             
-            result = get_ai_response(st.session_state["messages"])
+            # 스트리밍 응답: response 필드가 도착하는 즉시 렌더링
+            result = None
+            turn_started = time.perf_counter()
+            for event, payload in get_ai_response(
+                st.session_state["messages"],
+                stream=True,
+                affection_score=st.session_state["affection_scores"][current_round],
+                rag_prefetch=st.session_state.pop("rag_prefetch", None),
+                cache_scope=(current_type, user_gender, user_nickname),
+                on_queued=lambda position: message_placeholder.markdown(
+                    f"요청이 많아 순서를 기다리는 중... (대기 순번 {position}번) ▌"
+                ),
+            ):
+                if event == "delta":
+                    if not full_response:
+                        record("game.first_paint", time.perf_counter() - turn_started)
+                    full_response += payload
+                    message_placeholder.markdown(full_response + "▌")
+                else:
+                    result = payload
+
+            if result.rate_limited:
+                # 보내지 못한 턴은 대화 횟수에 넣지 않음: 사용자 메시지를 되돌리고 다시 입력받음
+                unsent = st.session_state["messages"].pop()["content"]
+                st.session_state["pending_message"] = None
+                st.session_state["rate_limit_notice"] = f"{result.response}\n\n보내려던 메시지: {unsent}"
+                st.rerun()
                 
-            ai_text = result.get("response", "...")
+            ai_text = result.response or full_response or "..."
+            message_placeholder.markdown(ai_text)
+            full_response = ai_text
             
-            # === [여기 수정] 점수 변환 안전장치 추가 ===
-            try:
-                score_delta = int(result.get("score", 0))
-            except (ValueError, TypeError):
-                score_delta = 0
-            # =========================================
+            # 점수는 파서에서 정수로 변환하고 허용 범위로 제한됨
+            score_delta = result.score
             
             # 호감도 업데이트 (현재 라운드)
             prev_score = st.session_state["affection_scores"][current_round]
             new_score = max(0, min(100, prev_score + score_delta))
             st.session_state["affection_scores"][current_round] = new_score
             
-            # === 호감도 변경 로그 DB 저장 ===
+            # === 호감도 변경 로그 DB 저장 (write-behind 큐, 응답 대기 없음) ===
             session_id = st.session_state.get("session_id")
             if session_id:
                 # 현재 턴 번호 계산
@@ -167,9 +198,9 @@ def show_game():
                 trigger_message = user_messages[-1]["content"] if user_messages else None
                 
                 # LLM이 reason을 반환했다면 사용, 없으면 None
-                reason = result.get("reason", None)
+                reason = result.reason
                 
-                save_affinity_log(
+                queue_affinity_log(
                     session_id=session_id,
                     partner_type=current_type,
                     turn_index=turn_index,
@@ -185,14 +216,7 @@ def show_game():
                 st.toast(f"{persona_name}의 호감도가 올랐습니다! (+{score_delta}) 😍")
             elif score_delta < 0:
                 st.toast(f"{persona_name}의 호감도가 떨어졌습니다.. ({score_delta}) 😢")
-
-            # 타자기 효과
-            full_response = ""
-            for chunk in ai_text.split():
-                full_response += chunk + " "
-                time.sleep(0.05)
-                message_placeholder.markdown(full_response + "▌")
-            message_placeholder.markdown(full_response)
+            record("game.turn_total", time.perf_counter() - turn_started)
         
         # AI 메시지 저장
         st.session_state["messages"].append({"role": "assistant", "content": full_response})
@@ -208,9 +232,10 @@ def show_game():
             session_id = st.session_state.get("session_id")
             if session_id:
                 turn_count = len([m for m in st.session_state["messages"] if m["role"] == "user"])
-                save_chat_log(session_id, current_type, st.session_state["messages"], turn_count)
+                queue_chat_log(session_id, current_type, st.session_state["messages"], turn_count)
         
-            time.sleep(3)
+            with span("game.notice_sleep"):
+                time.sleep(3)
             st.session_state["fail_reason"] = f"{persona_name} 호감도 부족"
             st.session_state["step"] = "result" # 결과 화면(실패)으로 이동
             st.rerun()
@@ -219,12 +244,13 @@ def show_game():
         current_turns = len([m for m in st.session_state["messages"] if m["role"] == "user"])
         if current_turns >= MAX_TURNS:
             st.info(f"⏰ {persona_name}님과의 소개팅 시간이 종료되었습니다!")
-            time.sleep(2)
+            with span("game.notice_sleep"):
+                time.sleep(2)
             
             # 채팅 로그 DB 저장
             session_id = st.session_state.get("session_id")
             if session_id:
-                save_chat_log(session_id, current_type, st.session_state["messages"], current_turns)
+                queue_chat_log(session_id, current_type, st.session_state["messages"], current_turns)
             
             # 히스토리 저장
             if "history" not in st.session_state:
@@ -235,6 +261,8 @@ def show_game():
                 "messages": st.session_state["messages"],
                 "final_score": st.session_state["affection_scores"][current_round]
             })
+            # 끝난 라운드의 요약 카드를 백그라운드에서 미리 생성 (최종 분석 입력 축소)
+            submit_round_digest(st.session_state["history"][-1])
             
             # 다음 라운드로 이동
             if current_round < 3:
@@ -253,6 +281,10 @@ def show_game():
                 time.sleep(1)
                 st.rerun()
             else:
+                # 사용자가 최종 선택을 하는 동안 백그라운드에서 분석 시작
+                st.session_state["analysis_job_id"] = submit_analysis(
+                    st.session_state.get("session_id"), st.session_state["history"]
+                )
                 st.success("모든 소개팅이 종료되었습니다! 결과를 분석합니다.")
                 time.sleep(1)
                 st.session_state["step"] = "result"
@@ -268,7 +300,7 @@ def show_game():
         session_id = st.session_state.get("session_id")
         if session_id:
             turn_count = len([m for m in st.session_state["messages"] if m["role"] == "user"])
-            save_chat_log(session_id, current_type, st.session_state["messages"], turn_count)
+            queue_chat_log(session_id, current_type, st.session_state["messages"], turn_count)
         
         # 현재 대화 로그 저장 (history - 로컬)
         if "history" not in st.session_state:
@@ -280,6 +312,8 @@ def show_game():
             "messages": st.session_state["messages"],
             "final_score": st.session_state["affection_scores"][current_round]
         })
+        # 끝난 라운드의 요약 카드를 백그라운드에서 미리 생성 (최종 분석 입력 축소)
+        submit_round_digest(st.session_state["history"][-1])
         
         # 다음 라운드 진행 판단
         if current_round < 3:
@@ -303,7 +337,10 @@ def show_game():
             time.sleep(1)
             st.rerun()
         else:
-            # 모든 라운드 종료 -> 결과 화면
+            # 모든 라운드 종료 -> 결과 화면 (사용자가 최종 선택을 하는 동안 백그라운드에서 분석 시작)
+            st.session_state["analysis_job_id"] = submit_analysis(
+                st.session_state.get("session_id"), st.session_state["history"]
+            )
             st.success("모든 소개팅이 종료되었습니다! 결과를 분석합니다.")
             time.sleep(1)
             st.session_state["step"] = "result"
@@ -316,5 +353,7 @@ def show_game():
         # pending_message가 없을 때만 새 입력 허용 (AI 응답 대기 중이 아닐 때)
         st.session_state["messages"].append({"role": "user", "content": prompt})
         st.session_state["pending_message"] = prompt
+        # RAG 검색을 먼저 시작해 두고 재실행 (화면을 다시 그리는 동안 검색이 진행됨)
+        st.session_state["rag_prefetch"] = prefetch_rag_context(prompt)
         st.rerun()  # 즉시 재실행하여 AI 응답 처리 시작
 
@@ -1,8 +1,9 @@
 # views/result_view.py
 import streamlit as st
 import time
-from services.llm_service import analyze_conversation
-from services.db_service import update_game_session, save_analysis_result
+from config.settings import ANALYSIS_WAIT_TIMEOUT
+from services.analysis_jobs import submit_analysis, wait_for_analysis
+from services.db_service import queue_game_session_update, queue_analysis_result
 from config.prompts import get_persona_name
 
 
@@ -72,12 +73,27 @@ def show_result():
     # ============================================
     final_choice = st.session_state.get("final_choice", "UNKNOWN")
 
-    # 분석 실행 (캐싱)
+    # 분석 결과 가져오기 (라운드 종료 시 시작된 백그라운드 작업, 없으면 지금 시작)
     if "analysis_result" not in st.session_state:
         if history:
+            job_id = st.session_state.get("analysis_job_id")
+            job = wait_for_analysis(job_id, timeout=0) if job_id else None
+            if job is None:
+                # 게임 오버 등으로 작업이 시작되지 않았거나 프로세스가 재시작된 경우
+                job_id = submit_analysis(st.session_state.get("session_id"), history)
+                st.session_state["analysis_job_id"] = job_id
+
             with st.spinner("대화 내용을 분석 중입니다... 🔍"):
-                result = analyze_conversation(history)
-                st.session_state["analysis_result"] = result
+                job = wait_for_analysis(job_id, timeout=ANALYSIS_WAIT_TIMEOUT)
+
+            if not job.done:
+                st.error("⏰ 분석이 지연되고 있습니다. 잠시 후 다시 시도해주세요.")
+                if st.button("다시 확인하기"):
+                    st.rerun()
+                return
+            st.session_state["analysis_result"] = job.result
+            # 작업이 analysis_results에 저장했으면 결과 화면에서는 다시 저장하지 않음
+            st.session_state["analysis_persisted"] = job.persisted
         else:
             st.session_state["analysis_result"] = {
                 "error": "분석할 대화 기록이 없습니다."
@@ -85,23 +101,19 @@ def show_result():
 
     analysis = st.session_state["analysis_result"]
 
-    # 오류 체크
-    if "error" in analysis:
+    # 오류 체크 (실패하면 {"error": ...}, 성공하면 AnalysisResult)
+    if isinstance(analysis, dict):
         st.error(analysis["error"])
         if st.button("처음으로 돌아가기"):
             st.session_state.clear()
             st.rerun()
         return
 
-    my_persona = analysis.get("my_persona", {})
-    compatibility = analysis.get("compatibility", {})
-    insights = analysis.get("insights", {})
-
     # =============================================
     # 1. 메인 타이틀: 당신의 연애 스타일
     # =============================================
-    style_name = my_persona.get("style", "알 수 없음")
-    my_type = my_persona.get("type", "UNKNOWN")
+    style_name = analysis.style or "알 수 없음"
+    my_type = analysis.user_type or "UNKNOWN"
 
     st.title(f"💖 {nickname}님의 연애 스타일")
     st.header(f'**"{style_name}"**')
@@ -114,7 +126,7 @@ def show_result():
     }
     st.info(f"당신의 타입: **{type_emoji.get(my_type, '알 수 없음')}**")
 
-    keywords = my_persona.get("keywords", [])
+    keywords = analysis.keywords
     if keywords:
         st.markdown(" | ".join([f"`{k}`" for k in keywords]))
 
@@ -125,7 +137,7 @@ def show_result():
     # =============================================
     st.subheader("💘 가장 잘 맞는 상대")
 
-    best_match = compatibility.get("best_match", "UNKNOWN")
+    best_match = analysis.best_match or "UNKNOWN"
     best_match_name = get_persona_name(best_match, user_gender)
 
     # 호감도 점수 가져오기
@@ -135,7 +147,7 @@ def show_result():
     st.success(
         f"🎯 **{best_match_name}** 타입과 가장 잘 맞습니다! (호감도 {best_score}점)"
     )
-    st.markdown(f"**왜 잘 맞을까요?** {compatibility.get('best_reason', '-')}")
+    st.markdown(f"**왜 잘 맞을까요?** {analysis.best_reason or '-'}")
 
     st.divider()
 
@@ -147,24 +159,24 @@ def show_result():
     col_sim, col_opp = st.columns(2)
 
     with col_sim:
-        similar_style = compatibility.get("similar_style", "UNKNOWN")
+        similar_style = analysis.similar_style or "UNKNOWN"
         similar_name = (
             get_persona_name(similar_style, user_gender)
             if similar_style != "UNKNOWN"
             else "알 수 없음"
         )
         st.markdown(f"**비슷한 스타일**: {similar_name}")
-        st.caption(compatibility.get("similar_chemistry", "-"))
+        st.caption(analysis.similar_chemistry or "-")
 
     with col_opp:
-        opposite_style = compatibility.get("opposite_style", "UNKNOWN")
+        opposite_style = analysis.opposite_style or "UNKNOWN"
         opposite_name = (
             get_persona_name(opposite_style, user_gender)
             if opposite_style != "UNKNOWN"
             else "알 수 없음"
         )
         st.markdown(f"**반대 스타일**: {opposite_name}")
-        st.caption(compatibility.get("opposite_chemistry", "-"))
+        st.caption(analysis.opposite_chemistry or "-")
 
     st.divider()
 
@@ -231,20 +243,18 @@ def show_result():
     st.subheader("💡 연애 인사이트")
 
     # 긍정적인 모습
-    st.markdown(f"✅ **잘한 점**: {insights.get('positive', '-')}")
+    st.markdown(f"✅ **잘한 점**: {analysis.positive or '-'}")
 
     # 개선할 점
-    st.markdown(f"📈 **개선하면 좋을 점**: {insights.get('improvement', '-')}")
+    st.markdown(f"📈 **개선하면 좋을 점**: {analysis.improvement or '-'}")
 
     # 연애 팁
-    st.info(f"💡 **연애 팁**: {insights.get('dating_tip', '-')}")
+    st.info(f"💡 **연애 팁**: {analysis.dating_tip or '-'}")
 
     # 주의사항 (있으면)
-    warning = insights.get("warning", "")
-    # warning이 리스트인 경우 문자열로 변환
-    if isinstance(warning, list):
-        warning = ", ".join(str(w) for w in warning if w)
-    if warning and warning != "-" and str(warning).lower() != "none":
+    # (리스트는 쉼표로 합치고 "-"/"none"은 비우는 정규화는 파서에서 처리)
+    warning = analysis.warning
+    if warning:
         st.warning(f"⚠️ **주의**: {warning}")
 
     st.divider()
@@ -256,9 +266,9 @@ def show_result():
 
     col_a, col_b = st.columns(2)
     with col_a:
-        st.success(f"**강점**: {my_persona.get('strength', '-')}")
+        st.success(f"**강점**: {analysis.strength or '-'}")
     with col_b:
-        st.warning(f"**보완할 점**: {my_persona.get('weakness', '-')}")
+        st.warning(f"**보완할 점**: {analysis.weakness or '-'}")
 
     st.divider()
 
@@ -266,7 +276,7 @@ def show_result():
     # 8. 전체 요약
     # =============================================
     st.subheader("📝 분석 요약")
-    st.markdown(analysis.get("summary", "분석 결과 없음"))
+    st.markdown(analysis.summary or "분석 결과 없음")
 
     st.divider()
 
@@ -275,14 +285,15 @@ def show_result():
         session_id = st.session_state.get("session_id")
         if session_id:
             # 세션 업데이트
-            update_game_session(
+            queue_game_session_update(
                 session_id=session_id,
                 final_choice=final_choice,
-                my_persona=my_persona,
-                ideal_preference=compatibility,
+                my_persona=analysis.persona_dict(),
+                ideal_preference=analysis.compatibility_dict(),
             )
-            # 분석 결과 저장
-            save_analysis_result(session_id, analysis)
+            # 분석 결과 저장 (분석 작업에서 이미 저장했으면 생략)
+            if not st.session_state.get("analysis_persisted"):
+                queue_analysis_result(session_id, analysis)
             st.session_state["db_saved"] = True
 
     st.success("🎉 분석 결과가 저장되었습니다. 참여해주셔서 감사합니다!")